@@ -0,0 +1,79 @@
+# bench_backends.py
+# ============================================================
+# Compara os backends numéricos (backends.py) nas expressões da suíte
+# de benchmarks (perfis pequena/media/grande de suite.py): vazão de
+# parse e de eval_node em cada backend, e o maior desvio de cada um em
+# relação ao backend decimal, tomado como referência.
+#
+# Uso: python benchmarks/bench_backends.py [--perfis pequena,media] [--precisao 50]
+# ============================================================
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from parser import Parser
+from executor import eval_node
+from backends import BACKENDS, BackendDecimal
+from suite import PERFIS, gerar_caso, medir
+
+
+def _avaliar_todas(asts, valores, backend):
+    resultados = []
+    for ast in asts:
+        try:
+            resultados.append(eval_node(ast, valores, backend=backend))
+        except Exception as e:
+            resultados.append(type(e))
+    return resultados
+
+
+def desvio(resultados, referencia, backend, decimal):
+    """Maior diferença absoluta (parte real ou imaginária) em relação à
+    referência, e quantos casos divergem no tipo (valor x erro)."""
+    maior = 0.0
+    divergentes = 0
+    for r, ref in zip(resultados, referencia):
+        if isinstance(r, type) or isinstance(ref, type) or isinstance(r, bool):
+            divergentes += r != ref
+            continue
+        a, b = backend.para_complexo(r), decimal.para_complexo(ref)
+        maior = max(maior, abs(a.a - b.a), abs(a.b - b.b))
+    return maior, divergentes
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--perfis", default="pequena,media", help="perfis separados por vírgula")
+    ap.add_argument("--seed", type=int, default=2024)
+    ap.add_argument("--repeticoes", type=int, default=3)
+    ap.add_argument("--precisao", type=int, default=50, help="dígitos do backend decimal")
+    args = ap.parse_args()
+
+    backends = dict(BACKENDS, decimal=BackendDecimal(args.precisao))
+    decimal = backends["decimal"]
+    print(f"{'caso':<22}{'parse/s':>12}{'eval/s':>12}{'vs complexo':>13}{'desvio máx':>13}{'divergem':>10}")
+    for perfil in (p for p in args.perfis.split(",") if p):
+        if perfil not in PERFIS:
+            ap.error(f"perfil desconhecido: {perfil}")
+        exprs, valores = gerar_caso(perfil, args.seed)
+        medidas = {}
+        for nome, backend in backends.items():
+            p = Parser(backend=backend)
+            asts = [p.parse(e) for e in exprs]
+            vals = {n: backend.converter(v) for n, v in valores.items()}
+            t_parse = medir(lambda: [p.parse(e) for e in exprs], args.repeticoes)
+            t_eval = medir(lambda: _avaliar_todas(asts, vals, backend), args.repeticoes)
+            medidas[nome] = (t_parse, t_eval, _avaliar_todas(asts, vals, backend))
+        referencia = medidas["decimal"][2]
+        base = medidas["complexo"][1]
+        for nome, (t_parse, t_eval, resultados) in medidas.items():
+            maior, divergentes = desvio(resultados, referencia, backends[nome], decimal)
+            print(f"{perfil + '/' + nome:<22}{len(exprs) / t_parse:>12,.0f}{len(exprs) / t_eval:>12,.0f}"
+                  f"{base / t_eval:>12.2f}x{maior:>13.2e}{divergentes:>10}")
+
+
+if __name__ == "__main__":
+    main()
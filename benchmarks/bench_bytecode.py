@@ -0,0 +1,84 @@
+# bench_bytecode.py
+# ============================================================
+# Biblioteca de expressões: texto + Parser.parse contra bytecode
+# mapeado em memória (bytecode.Biblioteca). Mostra o tempo de carga,
+# a memória ocupada (tracemalloc) e a vazão de avaliação de
+# eval_node sobre a AST contra a máquina de pilha sobre os bytes.
+#
+# Uso: python benchmarks/bench_bytecode.py [-n N] [--perfil media]
+# ============================================================
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from parser import Parser
+from executor import eval_node
+from bytecode import salvar_biblioteca, Biblioteca
+from suite import PERFIS, gerar_expressao, gerar_caso
+
+
+def _medir(fn):
+    tracemalloc.start()
+    t = time.perf_counter()
+    resultado = fn()
+    dt = time.perf_counter() - t
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return resultado, dt, pico
+
+
+def _avaliar(fn):
+    try:
+        fn()
+    except Exception:
+        pass
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-n", type=int, default=20_000, help="expressões na biblioteca")
+    ap.add_argument("--perfil", default="pequena", choices=list(PERFIS))
+    ap.add_argument("--seed", type=int, default=2024)
+    args = ap.parse_args()
+
+    operadores, profundidade, variaveis, _ = PERFIS[args.perfil]
+    rng = random.Random(args.seed)
+    textos = [gerar_expressao(rng, operadores, profundidade, variaveis) for _ in range(args.n)]
+    _, valores = gerar_caso(args.perfil, args.seed)
+
+    p = Parser()
+    with tempfile.TemporaryDirectory() as d:
+        caminho = os.path.join(d, "biblioteca.cxbc")
+        salvar_biblioteca(caminho, (p.parse(t) for t in textos))
+        tamanho = os.path.getsize(caminho)
+
+        asts, t_parse, m_parse = _medir(lambda: [p.parse(t) for t in textos])
+        lib, t_mmap, m_mmap = _medir(lambda: Biblioteca(caminho))
+        print(f"{args.n} expressões ({args.perfil}), arquivo de {tamanho / 1024:.1f} KiB")
+        print(f"{'carga':<22}{'tempo (ms)':>12}{'memória (KiB)':>16}")
+        print(f"{'texto + parse':<22}{t_parse * 1e3:>12.1f}{m_parse / 1024:>16.1f}")
+        print(f"{'bytecode (mmap)':<22}{t_mmap * 1e3:>12.1f}{m_mmap / 1024:>16.1f}")
+
+        t = time.perf_counter()
+        for a in asts:
+            _avaliar(lambda: eval_node(a, valores))
+        t_ast = time.perf_counter() - t
+        t = time.perf_counter()
+        for i in range(len(lib)):
+            _avaliar(lambda: lib.avaliar(i, valores))
+        t_bc = time.perf_counter() - t
+        print(f"\n{'avaliação':<22}{'ops/s':>12}")
+        print(f"{'eval_node (AST)':<22}{args.n / t_ast:>12,.0f}")
+        print(f"{'executar (mmap)':<22}{args.n / t_bc:>12,.0f}")
+        lib.fechar()
+
+
+if __name__ == "__main__":
+    main()
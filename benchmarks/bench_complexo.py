@@ -0,0 +1,109 @@
+# bench_complexo.py
+# ============================================================
+# Compara a classe Complexo atual (slots, imutável, caminho rápido)
+# com a implementação anterior (objeto com __dict__ e _cast em toda
+# operação): memória por instância e operações por segundo.
+#
+# Uso: python benchmarks/bench_complexo.py [-n N]
+# ============================================================
+
+import argparse
+import os
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from complexos import Complexo, ErroMatematico
+
+
+class ComplexoLegado:
+    """Cópia das operações da versão anterior de Complexo (com __dict__)."""
+
+    def __init__(self, a, b=0.0):
+        if isinstance(a, ComplexoLegado):
+            self.a = float(a.a)
+            self.b = float(a.b)
+        else:
+            self.a = float(a)
+            self.b = float(b)
+
+    @staticmethod
+    def _cast(val):
+        if isinstance(val, ComplexoLegado):
+            return val
+        if isinstance(val, (int, float)):
+            return ComplexoLegado(float(val), 0.0)
+        raise TypeError("Operação com tipo incompatível")
+
+    def __add__(self, other):
+        other = ComplexoLegado._cast(other)
+        return ComplexoLegado(self.a + other.a, self.b + other.b)
+
+    def __sub__(self, other):
+        other = ComplexoLegado._cast(other)
+        return ComplexoLegado(self.a - other.a, self.b - other.b)
+
+    def __mul__(self, other):
+        other = ComplexoLegado._cast(other)
+        return ComplexoLegado(
+            self.a * other.a - self.b * other.b,
+            self.a * other.b + self.b * other.a
+        )
+
+    def __truediv__(self, other):
+        other = ComplexoLegado._cast(other)
+        if abs(other.a) < 1e-15 and abs(other.b) < 1e-15:
+            raise ErroMatematico("divisão por zero")
+        den = other.a * other.a + other.b * other.b
+        num = ComplexoLegado(self.a * other.a + self.b * other.b, self.b * other.a - self.a * other.b)
+        return ComplexoLegado(num.a / den, num.b / den)
+
+    def conjugado(self):
+        return ComplexoLegado(self.a, -self.b)
+
+    def __eq__(self, other):
+        other = ComplexoLegado._cast(other) if not isinstance(other, ComplexoLegado) else other
+        return abs(self.a - other.a) < 1e-9 and abs(self.b - other.b) < 1e-9
+
+
+def memoria_por_instancia(cls, n):
+    tracemalloc.start()
+    antes = tracemalloc.take_snapshot()
+    objs = [cls(i, -i) for i in range(n)]
+    depois = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    total = sum(s.size_diff for s in depois.compare_to(antes, "filename"))
+    del objs
+    # inclui os dois floats e o ponteiro na lista, iguais para as duas classes
+    return total / n
+
+
+def mistura(cls):
+    x = cls(1.5, -2.0)
+    y = cls(0.25, 3.0)
+
+    def rodada():
+        z = x * y + x - y
+        z = z / y
+        z = z.conjugado() * x
+        return z == x
+    return rodada
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("-n", type=int, default=200_000, help="repetições da mistura de operações")
+    args = ap.parse_args()
+
+    print(f"{'classe':<16}{'bytes/instância':>18}{'mistura ops/s':>18}")
+    for cls in (ComplexoLegado, Complexo):
+        mem = memoria_por_instancia(cls, 100_000)
+        t = min(timeit.repeat(mistura(cls), number=args.n, repeat=3))
+        # cada rodada faz 7 operações
+        print(f"{cls.__name__:<16}{mem:>18.1f}{7 * args.n / t:>18,.0f}")
+
+
+if __name__ == "__main__":
+    main()
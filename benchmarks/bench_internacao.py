@@ -0,0 +1,66 @@
+# bench_internacao.py
+# ============================================================
+# Memória de um corpus de ASTs com e sem internação de constantes e
+# nomes de variáveis (Parser(internar=True)). Mede com tracemalloc os
+# bytes ainda alocados depois de parsear e guardar todas as ASTs, e o
+# tempo de parse nos dois modos.
+#
+# Uso: python benchmarks/bench_internacao.py [-n N] [--perfil media]
+# ============================================================
+
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from parser import Parser
+from suite import PERFIS, gerar_expressao
+
+
+def corpus(n, perfil, seed):
+    operadores, profundidade, variaveis, _ = PERFIS[perfil]
+    rng = random.Random(seed)
+    return [gerar_expressao(rng, operadores, profundidade, variaveis) for _ in range(n)]
+
+
+def memoria_corpus(textos, internar):
+    """(bytes retidos pelas ASTs, segundos de parse, parser usado)."""
+    gc.collect()
+    tracemalloc.start()
+    antes = tracemalloc.get_traced_memory()[0]
+    p = Parser(internar=internar)
+    t = time.perf_counter()
+    asts = [p.parse(texto) for texto in textos]
+    dt = time.perf_counter() - t
+    gc.collect()
+    retidos = tracemalloc.get_traced_memory()[0] - antes
+    tracemalloc.stop()
+    del asts
+    return retidos, dt, p
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-n", type=int, default=20_000, help="expressões no corpus")
+    ap.add_argument("--perfil", default="pequena", choices=list(PERFIS))
+    ap.add_argument("--seed", type=int, default=2024)
+    args = ap.parse_args()
+
+    textos = corpus(args.n, args.perfil, args.seed)
+    sem, t_sem, _ = memoria_corpus(textos, False)
+    com, t_com, p = memoria_corpus(textos, True)
+    print(f"{args.n} expressões ({args.perfil})")
+    print(f"{'modo':<16}{'memória (KiB)':>16}{'parse (s)':>12}")
+    print(f"{'sem internação':<16}{sem / 1024:>16.1f}{t_sem:>12.3f}")
+    print(f"{'com internação':<16}{com / 1024:>16.1f}{t_com:>12.3f}")
+    print(f"economia: {(sem - com) / 1024:.1f} KiB ({(sem - com) / sem:.1%})")
+    print(f"tabela: {p.tabela.estatisticas()}")
+
+
+if __name__ == "__main__":
+    main()
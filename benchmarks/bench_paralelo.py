@@ -0,0 +1,70 @@
+# bench_paralelo.py
+# ============================================================
+# Escalabilidade do modo em lote paralelo: avalia a mesma entrada
+# sintética com 1..N processos e mostra linhas/s e o ganho sobre o
+# modo sequencial (executor.executar_lote).
+#
+# Uso: python benchmarks/bench_paralelo.py [--linhas L] [--max-processos N] [--bloco B]
+# ============================================================
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from executor import executar_lote
+from paralelo import executar_lote_paralelo
+
+
+class _Descarte:
+    def write(self, s):
+        pass
+
+    def writelines(self, linhas):
+        pass
+
+    def flush(self):
+        pass
+
+
+def gerar_entrada(n, seed=1234):
+    rng = random.Random(seed)
+    # poucas expressões distintas, como no tráfego real: o cache acerta
+    exprs = ["x**3 - 2x + conj(y)/3i", "raiz(x, 3) * (y - 1i)", "(x+1i)**2 = y",
+             "conj(x*y) / (x - y)", "2(x - 4i) ** 0.5 + y"]
+    linhas = []
+    for _ in range(n):
+        vars_ = {"x": f"{rng.uniform(-5, 5):.3f}+{rng.uniform(-5, 5):.3f}i",
+                 "y": f"{rng.uniform(-5, 5):.3f}"}
+        linhas.append(json.dumps({"expr": rng.choice(exprs), "vars": vars_}) + "\n")
+    return linhas
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--linhas", type=int, default=100_000)
+    ap.add_argument("--max-processos", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--bloco", type=int, default=2000)
+    args = ap.parse_args()
+
+    linhas = gerar_entrada(args.linhas)
+    print(f"{args.linhas} linhas, bloco={args.bloco}, CPUs={os.cpu_count()}")
+
+    t = time.perf_counter()
+    executar_lote(linhas, _Descarte())
+    base = time.perf_counter() - t
+    print(f"{'sequencial':<14}{args.linhas / base:>12,.0f} linhas/s")
+
+    for n in range(1, args.max_processos + 1):
+        t = time.perf_counter()
+        executar_lote_paralelo(linhas, _Descarte(), processos=n, bloco=args.bloco)
+        dt = time.perf_counter() - t
+        print(f"{n:>2} processo(s){args.linhas / dt:>12,.0f} linhas/s  ganho {base / dt:4.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# bench_potencia.py
+# ============================================================
+# Potência inteira: exponenciação binária (Complexo.__pow__) contra o
+# caminho De Moivre anterior (Complexo._de_moivre), e raiz de ordem
+# inteira (Complexo.raiz) contra base ** (1/ordem). Mostra tempo por
+# operação e o maior erro absoluto em potências de inteiros gaussianos.
+#
+# Uso: python benchmarks/bench_potencia.py [-n N]
+# ============================================================
+
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from complexos import Complexo
+
+
+def exato(a, b, k):
+    """Potência de inteiro gaussiano com aritmética inteira do Python."""
+    ra, rb = 1, 0
+    for _ in range(k):
+        ra, rb = ra * a - rb * b, ra * b + rb * a
+    return ra, rb
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-n", type=int, default=100_000)
+    args = ap.parse_args()
+
+    z = Complexo(1.25, -0.75)
+    print(f"{'k':>4}{'binária (µs)':>16}{'De Moivre (µs)':>18}")
+    for k in (2, 3, 5, 8, 16, 64, -3):
+        t_bin = min(timeit.repeat(lambda: z ** k, number=args.n, repeat=3))
+        t_dm = min(timeit.repeat(lambda: z._de_moivre(k), number=args.n, repeat=3))
+        print(f"{k:>4}{t_bin / args.n * 1e6:>16.3f}{t_dm / args.n * 1e6:>18.3f}")
+
+    erro_bin = erro_dm = 0.0
+    for a in range(-6, 7):
+        for b in range(-6, 7):
+            for k in range(1, 13):
+                ra, rb = exato(a, b, k)
+                w = Complexo(a, b)
+                p, q = w ** k, w._de_moivre(k)
+                erro_bin = max(erro_bin, abs(p.a - ra), abs(p.b - rb))
+                erro_dm = max(erro_dm, abs(q.a - ra), abs(q.b - rb))
+    print(f"\nmaior erro em (a+bi)**k, |a|,|b| <= 6, k <= 12: "
+          f"binária {erro_bin:.3g}, De Moivre {erro_dm:.3g}")
+
+    um = Complexo(1, 0)
+    print(f"\n{'ordem':>6}{'raiz() (µs)':>14}{'** (1/n) (µs)':>16}")
+    for n in (2, 3, 5):
+        ordem = Complexo(n, 0)
+        t_r = min(timeit.repeat(lambda: z.raiz(n), number=args.n, repeat=3))
+        t_g = min(timeit.repeat(lambda: z ** (um / ordem), number=args.n, repeat=3))
+        print(f"{n:>6}{t_r / args.n * 1e6:>14.3f}{t_g / args.n * 1e6:>16.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# bench_threads.py
+# ============================================================
+# Vazão do parse concorrente: um único Parser compartilhado por um
+# ThreadPoolExecutor contra um ProcessPoolExecutor (cada processo com o
+# seu Parser), para 1..N trabalhadores, e o modo sequencial como base.
+# Com o GIL as threads não ganham em CPU, mas servem de referência
+# para serviços que já rodam em threads; os processos pagam a
+# serialização das ASTs de volta ao processo principal.
+#
+# Uso: python benchmarks/bench_threads.py [-n N] [--perfil media] [--max-trabalhadores N]
+# ============================================================
+
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from parser import Parser, parse
+from suite import PERFIS, gerar_expressao
+
+
+def corpus(n, perfil, seed):
+    operadores, profundidade, variaveis, _ = PERFIS[perfil]
+    rng = random.Random(seed)
+    return [gerar_expressao(rng, operadores, profundidade, variaveis) for _ in range(n)]
+
+
+def _parse_bloco(textos):
+    # roda nos processos filhos: parse sem estado compartilhado
+    return [parse(t) for t in textos]
+
+
+def _blocos(textos, tamanho):
+    return [textos[i:i + tamanho] for i in range(0, len(textos), tamanho)]
+
+
+def medir_threads(textos, trabalhadores, bloco):
+    p = Parser()   # o mesmo Parser em todas as threads
+    with ThreadPoolExecutor(max_workers=trabalhadores) as pool:
+        t = time.perf_counter()
+        n = sum(len(asts) for asts in pool.map(lambda b: [p.parse(x) for x in b],
+                                               _blocos(textos, bloco)))
+        return n / (time.perf_counter() - t)
+
+
+def medir_processos(textos, trabalhadores, bloco):
+    contexto = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=trabalhadores, mp_context=contexto) as pool:
+        # aquece o pool: a inicialização dos processos não entra na medida
+        list(pool.map(_parse_bloco, [["1"]] * trabalhadores))
+        t = time.perf_counter()
+        n = sum(len(asts) for asts in pool.map(_parse_bloco, _blocos(textos, bloco)))
+        return n / (time.perf_counter() - t)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-n", type=int, default=20_000, help="expressões no corpus")
+    ap.add_argument("--perfil", default="media", choices=list(PERFIS))
+    ap.add_argument("--max-trabalhadores", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--bloco", type=int, default=500, help="expressões por tarefa")
+    ap.add_argument("--seed", type=int, default=2024)
+    args = ap.parse_args()
+
+    textos = corpus(args.n, args.perfil, args.seed)
+    p = Parser()
+    t = time.perf_counter()
+    for texto in textos:
+        p.parse(texto)
+    base = args.n / (time.perf_counter() - t)
+
+    print(f"{args.n} expressões ({args.perfil}), bloco={args.bloco}, CPUs={os.cpu_count()}")
+    print(f"{'sequencial':<14}{base:>14,.0f} expr/s")
+    print(f"{'trabalhadores':<14}{'threads':>14}{'processos':>14}{'ganho thr':>11}{'ganho proc':>12}")
+    for k in range(1, args.max_trabalhadores + 1):
+        thr = medir_threads(textos, k, args.bloco)
+        proc = medir_processos(textos, k, args.bloco)
+        print(f"{k:<14}{thr:>14,.0f}{proc:>14,.0f}{thr / base:>10.2f}x{proc / base:>11.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+# carga_servidor.py
+# ============================================================
+# Teste de carga do servidor (src/servidor.py). Abre várias conexões
+# simultâneas; cada uma envia pedidos um de cada vez (ou vários em
+# sequência, com --janela) e mede a latência de cada resposta.
+# Reporta vazão e percentis de latência (p50, p90, p99, máximo).
+#
+# Sem --endereco, sobe um servidor local em um subprocesso.
+#
+# Uso:
+#   python benchmarks/carga_servidor.py --conexoes 16 --pedidos 500
+#   python benchmarks/carga_servidor.py --endereco 127.0.0.1:8765
+# ============================================================
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(RAIZ, "src"))
+
+from suite import PERFIS, gerar_expressao
+
+
+def percentis(latencias, pontos=(50, 90, 99)):
+    """Percentis (método do vizinho mais próximo) de uma lista de latências."""
+    if not latencias:
+        return {}
+    ordenadas = sorted(latencias)
+    n = len(ordenadas)
+    resultado = {f"p{p}": ordenadas[min(n - 1, max(0, -(-p * n // 100) - 1))] for p in pontos}
+    resultado["max"] = ordenadas[-1]
+    return resultado
+
+
+async def _abrir(endereco):
+    if endereco.startswith("unix:"):
+        return await asyncio.open_unix_connection(endereco[len("unix:"):], limit=1 << 24)
+    host, _, porta = endereco.rpartition(":")
+    return await asyncio.open_connection(host or "127.0.0.1", int(porta), limit=1 << 24)
+
+
+async def _cliente(endereco, pedidos, janela, latencias, erros):
+    leitor, escritor = await _abrir(endereco)
+    try:
+        for i in range(0, len(pedidos), janela):
+            grupo = pedidos[i:i + janela]
+            inicio = time.perf_counter()
+            escritor.write(b"".join(json.dumps(p).encode() + b"\n" for p in grupo))
+            await escritor.drain()
+            for _ in grupo:
+                resposta = json.loads(await leitor.readline())
+                latencias.append(time.perf_counter() - inicio)
+                if "erro" in resposta:
+                    erros.append(resposta["tipo_erro"])
+    finally:
+        escritor.close()
+        await escritor.wait_closed()
+
+
+async def carga(endereco, conexoes, pedidos, janela=1, perfil="pequena", expressoes=200, seed=2024):
+    """Roda a carga e devolve o relatório (dict)."""
+    operadores, profundidade, variaveis, _ = PERFIS[perfil]
+    rng = random.Random(seed)
+    textos = [gerar_expressao(rng, operadores, profundidade, variaveis) for _ in range(expressoes)]
+    valores = {f"x{i}": f"{rng.uniform(0.6, 0.8):.3f}+{rng.uniform(0.6, 0.8):.3f}i" for i in range(variaveis)}
+    por_conexao = [[{"id": i, "expr": rng.choice(textos), "vars": valores} for i in range(pedidos)]
+                   for _ in range(conexoes)]
+
+    latencias, erros = [], []
+    inicio = time.perf_counter()
+    await asyncio.gather(*(_cliente(endereco, p, janela, latencias, erros) for p in por_conexao))
+    duracao = time.perf_counter() - inicio
+    return {
+        "pedidos": len(latencias),
+        "erros": len(erros),
+        "duracao_s": duracao,
+        "pedidos_s": len(latencias) / duracao,
+        "latencia_ms": {k: v * 1e3 for k, v in percentis(latencias).items()},
+    }
+
+
+def _porta_livre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _subir_servidor(processos):
+    endereco = f"127.0.0.1:{_porta_livre()}"
+    cmd = [sys.executable, os.path.join(RAIZ, "src", "servidor.py"), endereco]
+    if processos is not None:
+        cmd += ["--processos", str(processos)]
+    proc = subprocess.Popen(cmd, stderr=subprocess.PIPE, text=True)
+    proc.stderr.readline()  # "Servindo em ..."
+    return proc, endereco
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Teste de carga do servidor da calculadora")
+    ap.add_argument("--endereco", help='servidor já em execução ("host:porta" ou "unix:caminho")')
+    ap.add_argument("--processos", type=int, help="processos do servidor local (sem --endereco)")
+    ap.add_argument("--conexoes", type=int, default=8)
+    ap.add_argument("--pedidos", type=int, default=200, help="pedidos por conexão")
+    ap.add_argument("--janela", type=int, default=1, help="pedidos enviados de uma vez por conexão")
+    ap.add_argument("--perfil", default="pequena", choices=list(PERFIS))
+    ap.add_argument("--seed", type=int, default=2024)
+    args = ap.parse_args()
+
+    proc = None
+    endereco = args.endereco
+    if endereco is None:
+        proc, endereco = _subir_servidor(args.processos)
+    try:
+        r = asyncio.run(carga(endereco, args.conexoes, args.pedidos, args.janela,
+                              args.perfil, seed=args.seed))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+
+    print(f"{r['pedidos']} pedidos em {r['duracao_s']:.2f} s ({r['pedidos_s']:,.0f}/s), {r['erros']} com erro")
+    print("latência (ms): " + "  ".join(f"{k} {v:.2f}" for k, v in r["latencia_ms"].items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+# suite.py
+# ============================================================
+# Suíte de benchmarks reprodutível da calculadora.
+#
+# Gera expressões aleatórias (semente fixa) com tamanho, profundidade
+# e número de variáveis controlados e mede, separadamente:
+#   tokenize, parse, eval_node, lisp e arvore
+# reportando operações por segundo e pico de memória (tracemalloc).
+# Os resultados podem ser salvos como linha de base (JSON) e comparados
+# depois: quedas de desempenho acima do limite são marcadas como regressão
+# (código de saída 1).
+#
+# Uso:
+#   python benchmarks/suite.py --salvar base.json
+#   python benchmarks/suite.py --comparar base.json --limite 0.10
+# ============================================================
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from parser import Parser
+from executor import eval_node
+from arvore import lisp, arvore
+from complexos import Complexo
+
+# nome -> (operadores por expressão, profundidade máxima, variáveis, expressões)
+PERFIS = {
+    "pequena": (8, 4, 2, 400),
+    "media": (120, 10, 4, 60),
+    "grande": (3000, 30, 8, 4),
+}
+
+_BINARIOS = ("+", "-", "*", "/", "**")
+
+
+# ------------------ gerador de expressões ------------------
+def gerar_expressao(rng, operadores, profundidade, variaveis):
+    """Texto de uma expressão com `operadores` operações e profundidade de
+    aninhamento até `profundidade`, usando as variáveis x0..x{n-1}."""
+    nomes = [f"x{i}" for i in range(variaveis)]
+
+    def folha():
+        escolha = rng.random()
+        if nomes and escolha < 0.5:
+            return rng.choice(nomes)
+        # constantes com módulo perto de 1 mantêm os valores finitos e
+        # longe de zero, para que a avaliação percorra a árvore inteira
+        if escolha < 0.75:
+            return f"{rng.uniform(0.8, 1.25):.2f}"
+        return f"{rng.uniform(0.8, 1.25):.2f}i"
+
+    def gerar(ops, prof):
+        if ops == 0 or prof == 0:
+            return folha()
+        escolha = rng.random()
+        if escolha < 0.1:
+            return f"conj({gerar(ops - 1, prof - 1)})"
+        if escolha < 0.15:
+            return f"-({gerar(ops - 1, prof - 1)})"
+        if escolha < 0.2:
+            return f"raiz({gerar(ops - 1, prof - 1)}, {rng.randint(2, 4)})"
+        op = rng.choice(_BINARIOS)
+        if op == "**":
+            # expoente pequeno e constante, para não estourar os valores
+            return f"({gerar(ops - 1, prof - 1)})**{rng.randint(1, 2)}"
+        esq = rng.randint(0, ops - 1)
+        return f"({gerar(esq, prof - 1)} {op} {gerar(ops - 1 - esq, prof - 1)})"
+
+    return gerar(operadores, profundidade)
+
+
+def gerar_caso(perfil, seed):
+    operadores, profundidade, variaveis, quantidade = PERFIS[perfil]
+    rng = random.Random(f"{seed}:{perfil}")
+    exprs = [gerar_expressao(rng, operadores, profundidade, variaveis) for _ in range(quantidade)]
+    valores = {f"x{i}": Complexo(rng.uniform(0.6, 0.8), rng.uniform(0.6, 0.8)) for i in range(variaveis)}
+    return exprs, valores
+
+
+# ------------------ medição ------------------
+class _Descarte:
+    def write(self, s):
+        return len(s)
+
+    def flush(self):
+        pass
+
+
+def _avaliar(ast, valores):
+    try:
+        eval_node(ast, valores)
+    except Exception:
+        pass  # erros matemáticos fazem parte da carga
+
+
+def _funcoes(exprs, valores):
+    p = Parser()
+    asts = [p.parse(e) for e in exprs]
+    descarte = _Descarte()
+
+    def rodar_arvore():
+        with contextlib.redirect_stdout(descarte):
+            for a in asts:
+                arvore(a)
+
+    return {
+        "tokenize": lambda: [p.tokenize(e) for e in exprs],
+        "parse": lambda: [p.parse(e) for e in exprs],
+        "eval_node": lambda: [_avaliar(a, valores) for a in asts],
+        "lisp": lambda: [lisp(a) for a in asts],
+        "arvore": rodar_arvore,
+    }
+
+
+def medir(fn, repeticoes, tempo_minimo=0.2):
+    """Menor tempo de uma rodada de fn(), repetindo até somar `tempo_minimo`."""
+    melhor = float("inf")
+    total = 0.0
+    n = 0
+    while n < repeticoes or total < tempo_minimo:
+        t = time.perf_counter()
+        fn()
+        dt = time.perf_counter() - t
+        melhor = min(melhor, dt)
+        total += dt
+        n += 1
+    return melhor
+
+
+def pico_memoria(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def rodar(perfis, seed, repeticoes):
+    resultados = {}
+    for perfil in perfis:
+        exprs, valores = gerar_caso(perfil, seed)
+        for etapa, fn in _funcoes(exprs, valores).items():
+            dt = medir(fn, repeticoes)
+            resultados[f"{perfil}/{etapa}"] = {
+                "ops_s": len(exprs) / dt,
+                "pico_bytes": pico_memoria(fn),
+            }
+    return resultados
+
+
+# ------------------ linha de base ------------------
+def comparar(atual, base, limite):
+    """Lista (chave, ops/s base, ops/s atual, variação) das regressões: casos
+    cujo ops/s caiu mais que `limite` (fração) em relação à linha de base."""
+    regressoes = []
+    for chave, medida in atual.items():
+        if chave not in base:
+            continue
+        antes = base[chave]["ops_s"]
+        variacao = (medida["ops_s"] - antes) / antes
+        if variacao < -limite:
+            regressoes.append((chave, antes, medida["ops_s"], variacao))
+    return regressoes
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmarks de tokenize/parse/eval_node/lisp/arvore")
+    ap.add_argument("--seed", type=int, default=2024)
+    ap.add_argument("--perfis", default=",".join(PERFIS), help="perfis separados por vírgula")
+    ap.add_argument("--repeticoes", type=int, default=5)
+    ap.add_argument("--salvar", metavar="ARQUIVO", help="grava os resultados como linha de base")
+    ap.add_argument("--comparar", metavar="ARQUIVO", help="compara com uma linha de base salva")
+    ap.add_argument("--limite", type=float, default=0.10, help="queda tolerada de ops/s (padrão 0.10 = 10%%)")
+    args = ap.parse_args()
+
+    perfis = [p for p in args.perfis.split(",") if p]
+    for p in perfis:
+        if p not in PERFIS:
+            ap.error(f"perfil desconhecido: {p}")
+
+    resultados = rodar(perfis, args.seed, args.repeticoes)
+    base = None
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            base = json.load(f)["resultados"]
+
+    print(f"{'caso':<22}{'ops/s':>14}{'pico (KiB)':>12}{'vs base':>10}")
+    for chave, m in resultados.items():
+        delta = ""
+        if base and chave in base:
+            delta = f"{(m['ops_s'] - base[chave]['ops_s']) / base[chave]['ops_s']:+.1%}"
+        print(f"{chave:<22}{m['ops_s']:>14,.1f}{m['pico_bytes'] / 1024:>12.1f}{delta:>10}")
+
+    if args.salvar:
+        with open(args.salvar, "w", encoding="utf-8") as f:
+            json.dump({
+                "seed": args.seed,
+                "python": platform.python_version(),
+                "resultados": resultados,
+            }, f, indent=2)
+
+    if base is not None:
+        regressoes = comparar(resultados, base, args.limite)
+        for chave, antes, depois, variacao in regressoes:
+            print(f"REGRESSÃO {chave}: {antes:,.1f} -> {depois:,.1f} ops/s ({variacao:+.1%})")
+        if regressoes:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,10 @@
 # Impressão da AST em notação LISP e impressão visual
 # ============================================================
 
-from parser import NumberNode, VariableNode, UnaryOpNode, BinaryOpNode
+import sys
+
+import instrumentacao
+from parser import NumberNode, VariableNode, UnaryOpNode, BinaryOpNode, SeriesNode
 
 # ------------------ no (export) ------------------
 
@@ -14,53 +17,201 @@ class no:
         self.direita = direita
 
     def to_lisp(self):
-        # Leaf
-        if self.esquerda is None and self.direita is None:
-            return str(self.valor)
-        if self.esquerda is None or self.direita is None:
-            child = self.esquerda if self.esquerda is not None else self.direita
-            return f"({self.valor} {child.to_lisp()})"
-        # Binary
-        return f"({self.valor} {self.esquerda.to_lisp()} {self.direita.to_lisp()})"
+        # pilha explícita de nós e trechos prontos, juntados uma vez no final
+        partes = []
+        pilha = [self]
+        while pilha:
+            item = pilha.pop()
+            if type(item) is str:
+                partes.append(item)
+                continue
+            esquerda, direita = item.esquerda, item.direita
+            # Leaf
+            if esquerda is None and direita is None:
+                partes.append(str(item.valor))
+                continue
+            partes.append(f"({item.valor} ")
+            pilha.append(")")
+            # Binary
+            if esquerda is not None and direita is not None:
+                pilha.append(direita)
+                pilha.append(" ")
+                pilha.append(esquerda)
+            else:
+                pilha.append(esquerda if esquerda is not None else direita)
+        return "".join(partes)
+
+# limites usados pelo REPL ao mostrar árvores grandes
+LIMITE_PROFUNDIDADE = 40
+LIMITE_NOS = 2000
+
+# quantos trechos (lisp) ou caracteres (arvore) acumular antes de cada write
+_TAMANHO_LOTE = 4096
+_CARACTERES_LOTE = 1 << 16
 
 # ------------------ lisp (notação) ------------------
-def lisp(no):
-    """Retorna string em notação LISP para a subárvore `no`."""
-    if no is None:
-        return ""
-    # número
-    if isinstance(no, NumberNode):
-        return str(no.value)
-    # variável
-    if isinstance(no, VariableNode):
-        return str(no.name)
-    # unário
-    if isinstance(no, UnaryOpNode):
-        return f"({no.op} {lisp(no.child)})"
-    # binário
-    if isinstance(no, BinaryOpNode):
-        return f"({no.op} {lisp(no.left)} {lisp(no.right)})"
-    return "?"
+def lisp(no, max_profundidade=None, max_nos=None):
+    """Retorna string em notação LISP para a subárvore `no`.
+
+    Subárvores abaixo de `max_profundidade` (a raiz tem profundidade 0) e
+    as que viriam depois dos primeiros `max_nos` nós viram "...".
+    """
+    if instrumentacao.ATIVA is not None:
+        with instrumentacao.ATIVA.etapa("lisp"):
+            return "".join(_lisp(no, max_profundidade, max_nos))
+    return "".join(_lisp(no, max_profundidade, max_nos))
+
+def escrever_lisp(no, saida=None, max_profundidade=None, max_nos=None):
+    """Como lisp, mas escreve em `saida` (padrão: sys.stdout) em blocos,
+    sem montar a string inteira. Não acrescenta quebra de linha."""
+    if saida is None:
+        saida = sys.stdout
+    _escrever(saida, _lisp(no, max_profundidade, max_nos))
+
+def _lisp(no, max_profundidade, max_nos):
+    # pilha explícita (de nós e trechos de texto já prontos), sem recursão;
+    # devolve a lista de pedaços, na ordem
+    partes = []
+    if max_profundidade is None and max_nos is None:
+        pilha = [no]
+        while pilha:
+            item = pilha.pop()
+            if item is None:
+                continue
+            if type(item) is str:
+                partes.append(item)
+            # número
+            elif isinstance(item, NumberNode):
+                partes.append(str(item.value))
+            # variável
+            elif isinstance(item, VariableNode):
+                partes.append(str(item.name))
+            # unário
+            elif isinstance(item, UnaryOpNode):
+                pilha.append(")")
+                pilha.append(item.child)
+                partes.append(f"({item.op} ")
+            # binário
+            elif isinstance(item, BinaryOpNode):
+                pilha.append(")")
+                pilha.append(item.right)
+                pilha.append(" ")
+                pilha.append(item.left)
+                partes.append(f"({item.op} ")
+            # soma/produto: (soma termo k inicio fim)
+            elif isinstance(item, SeriesNode):
+                pilha.append(")")
+                pilha.append(item.end)
+                pilha.append(" ")
+                pilha.append(item.start)
+                pilha.append(f" {item.index} ")
+                pilha.append(item.body)
+                partes.append(f"({item.op} ")
+            else:
+                partes.append("?")
+        return partes
+
+    # versão com limites: a pilha guarda (nó, profundidade)
+    restantes = max_nos if max_nos is not None else -1
+    pilha = [(no, 0)]
+    while pilha:
+        item, prof = pilha.pop()
+        if item is None:
+            continue
+        if type(item) is str:
+            partes.append(item)
+            continue
+        if restantes == 0 or (max_profundidade is not None and prof > max_profundidade):
+            partes.append("...")
+            continue
+        restantes -= 1
+        if isinstance(item, NumberNode):
+            partes.append(str(item.value))
+        elif isinstance(item, VariableNode):
+            partes.append(str(item.name))
+        elif isinstance(item, UnaryOpNode):
+            pilha.append((")", prof))
+            pilha.append((item.child, prof + 1))
+            partes.append(f"({item.op} ")
+        elif isinstance(item, BinaryOpNode):
+            pilha.append((")", prof))
+            pilha.append((item.right, prof + 1))
+            pilha.append((" ", prof))
+            pilha.append((item.left, prof + 1))
+            partes.append(f"({item.op} ")
+        elif isinstance(item, SeriesNode):
+            pilha.append((")", prof))
+            pilha.append((item.end, prof + 1))
+            pilha.append((" ", prof))
+            pilha.append((item.start, prof + 1))
+            pilha.append((f" {item.index} ", prof))
+            pilha.append((item.body, prof + 1))
+            partes.append(f"({item.op} ")
+        else:
+            partes.append("?")
+    return partes
+
+def _escrever(saida, partes):
+    for i in range(0, len(partes), _TAMANHO_LOTE):
+        saida.write("".join(partes[i:i + _TAMANHO_LOTE]))
 
 # ------------------ arvore (visual) ------------------
-def arvore(no, prefix=""):
-    """Imprime a árvore em formato visual legível."""
-    if no is None:
-        return
-    # mostrar o próprio nó
-    if isinstance(no, NumberNode):
-        print(prefix + f"└── Number: {no.value}")
-        return
-    if isinstance(no, VariableNode):
-        print(prefix + f"└── Variable: {no.name}")
-        return
-    if isinstance(no, UnaryOpNode):
-        print(prefix + f"└── UnaryOp: {no.op}")
-        arvore(no.child, prefix + "    ")
-        return
-    if isinstance(no, BinaryOpNode):
-        print(prefix + f"└── BinaryOp: {no.op}")
-        arvore(no.left, prefix + "    ")
-        arvore(no.right, prefix + "    ")
+def arvore(no, prefix="", saida=None, max_profundidade=None, max_nos=None):
+    """Imprime a árvore em formato visual legível (pré-ordem, pilha explícita).
+
+    Escreve em `saida` (padrão: sys.stdout) em blocos de linhas. Abaixo de
+    `max_profundidade` e depois de `max_nos` nós, o resto é omitido e
+    marcado com "└── ...".
+    """
+    if saida is None:
+        saida = sys.stdout
+    if instrumentacao.ATIVA is not None:
+        with instrumentacao.ATIVA.etapa("arvore"):
+            _arvore(no, prefix, saida, max_profundidade, max_nos)
         return
-    print(prefix + "└── ?")
+    _arvore(no, prefix, saida, max_profundidade, max_nos)
+
+def _arvore(no, prefix, saida, max_profundidade, max_nos):
+    # a pilha guarda a profundidade; o recuo de cada linha é montado só na
+    # hora de escrevê-la, sem uma string de prefixo por nível
+    linhas = []
+    pendentes = 0
+    restantes = max_nos if max_nos is not None else -1
+    pilha = [(no, 0)]
+    while pilha:
+        no, prof = pilha.pop()
+        if no is None:
+            continue
+        recuo = prefix + "    " * prof
+        if restantes == 0:
+            linhas.append(recuo + "└── ...\n")
+            break
+        if max_profundidade is not None and prof > max_profundidade:
+            linhas.append(recuo + "└── ...\n")
+            continue
+        restantes -= 1
+        # mostrar o próprio nó
+        if isinstance(no, NumberNode):
+            linhas.append(recuo + f"└── Number: {no.value}\n")
+        elif isinstance(no, VariableNode):
+            linhas.append(recuo + f"└── Variable: {no.name}\n")
+        elif isinstance(no, UnaryOpNode):
+            linhas.append(recuo + f"└── UnaryOp: {no.op}\n")
+            pilha.append((no.child, prof + 1))
+        elif isinstance(no, BinaryOpNode):
+            linhas.append(recuo + f"└── BinaryOp: {no.op}\n")
+            pilha.append((no.right, prof + 1))
+            pilha.append((no.left, prof + 1))
+        elif isinstance(no, SeriesNode):
+            linhas.append(recuo + f"└── Series: {no.op} ({no.index})\n")
+            pilha.append((no.end, prof + 1))
+            pilha.append((no.start, prof + 1))
+            pilha.append((no.body, prof + 1))
+        else:
+            linhas.append(recuo + "└── ?\n")
+        pendentes += len(linhas[-1])
+        if pendentes >= _CARACTERES_LOTE:
+            saida.write("".join(linhas))
+            linhas.clear()
+            pendentes = 0
+    saida.write("".join(linhas))
@@ -0,0 +1,476 @@
+# backends.py
+# ============================================================
+# Backends numéricos: definem como os números da calculadora são
+# representados e operados.
+#   - "complexo": a classe Complexo (padrão);
+#   - "nativo":   o complex do Python, com as operações em C;
+#   - "decimal":  ComplexoDecimal, com partes decimal.Decimal de precisão
+#                 configurável, para auditar resultados.
+# Todos seguem a semântica de Complexo: ErroMatematico na divisão por
+# zero (|parte real| e |parte imaginária| < 1e-15), 0**0 = 1, 0 elevado
+# a potência real negativa é erro, '=' compara com tolerância 1e-9 e
+# raiz(base, ordem) é a raiz principal.
+#
+# Uso:
+#     b = obter_backend("nativo")
+#     ast = Parser(backend=b).parse("x**2 / 3")
+#     eval_node(ast, {"x": parse_complex_input("1+2i", backend=b)}, backend=b)
+# ============================================================
+
+import cmath
+import math
+import operator
+from decimal import Decimal, Context, localcontext
+
+from complexos import Complexo, ErroMatematico
+from executor import OPERADORES_UNARIOS, OPERADORES_BINARIOS
+
+_TOL_ZERO = 1e-15
+_TOL_IGUAL = 1e-9
+
+
+class Backend:
+    """Interface de um backend.
+
+    numero(a, b)        valor a partir de dois floats (literais e entrada)
+    converter(valor)    Complexo, complex, int ou float -> valor do backend
+    para_complexo(v)    valor do backend -> Complexo (bool continua bool)
+    texto(v)            como o resultado é mostrado
+    unarios, binarios   tabelas operador -> função, como em executor
+    """
+    nome = None
+    unarios = None
+    binarios = None
+
+    def numero(self, a, b):
+        raise NotImplementedError
+
+    def converter(self, valor):
+        raise NotImplementedError
+
+    def para_complexo(self, valor):
+        raise NotImplementedError
+
+    def texto(self, valor):
+        return str(self.para_complexo(valor))
+
+    def __repr__(self):
+        return f"{type(self).__name__}()"
+
+
+# ------------------ Complexo ------------------
+class BackendComplexo(Backend):
+    nome = "complexo"
+    unarios = OPERADORES_UNARIOS
+    binarios = OPERADORES_BINARIOS
+
+    def numero(self, a, b):
+        return Complexo(a, b)
+
+    def converter(self, valor):
+        if type(valor) is Complexo or type(valor) is bool:
+            return valor
+        if isinstance(valor, complex):
+            return Complexo(valor.real, valor.imag)
+        return Complexo(valor)
+
+    def para_complexo(self, valor):
+        return valor
+
+
+# ------------------ complex nativo ------------------
+def _dividir_nativo(left, right):
+    if abs(right.real) < _TOL_ZERO and abs(right.imag) < _TOL_ZERO:
+        raise ErroMatematico("divisão por zero")
+    return complex(left) / right
+
+
+def _base_nula(expoente):
+    # 0 ** w fora do caso inteiro, como Complexo.__pow__
+    wa, wb = expoente.real, expoente.imag
+    if wa == 0 and wb == 0:
+        return 1 + 0j
+    if wa < 0 and wb == 0:
+        raise ErroMatematico("0 elevado a potência negativa")
+    return 0j
+
+
+def _potencia_nativa(left, right):
+    left = complex(left)
+    if right.imag == 0 and float(right.real).is_integer():
+        try:
+            return left ** int(right.real)
+        except ZeroDivisionError:
+            raise ErroMatematico("0 elevado a potência negativa") from None
+    if left == 0:
+        return _base_nula(right)
+    return left ** right
+
+
+def _raiz_nativa(left, right):
+    left = complex(left)
+    if right.imag == 0 and right.real != 0 and float(right.real).is_integer():
+        n = int(right.real)
+        if left == 0:
+            if n < 0:
+                raise ErroMatematico("0 elevado a potência negativa")
+            return 0j
+        if n == 1:
+            return left
+        if left.imag == 0 and left.real > 0:
+            return complex(math.sqrt(left.real) if n == 2 else left.real ** (1.0 / n), 0.0)
+        if n == 2:
+            return cmath.sqrt(left)
+        return cmath.rect(abs(left) ** (1.0 / n), cmath.phase(left) / n)
+    return _potencia_nativa(left, _dividir_nativo(1 + 0j, right))
+
+
+def _igual_nativo(left, right):
+    return abs(left.real - right.real) < _TOL_IGUAL and abs(left.imag - right.imag) < _TOL_IGUAL
+
+
+class BackendNativo(Backend):
+    nome = "nativo"
+    unarios = {
+        "u+": lambda v: v,
+        "+": lambda v: v,
+        "u-": operator.neg,
+        "-": operator.neg,
+        "conj": lambda v: complex(v).conjugate(),
+    }
+    binarios = {
+        "+": operator.add,
+        "-": operator.sub,
+        "*": operator.mul,
+        "/": _dividir_nativo,
+        "**": _potencia_nativa,
+        "raiz": _raiz_nativa,
+        "=": _igual_nativo,
+    }
+
+    def numero(self, a, b):
+        return complex(a, b)
+
+    def converter(self, valor):
+        if isinstance(valor, Complexo):
+            return complex(valor.a, valor.b)
+        if type(valor) is complex or type(valor) is bool:
+            return valor
+        return complex(valor)
+
+    def para_complexo(self, valor):
+        if type(valor) is bool:
+            return valor
+        return Complexo(valor.real, valor.imag)
+
+
+# ------------------ decimal ------------------
+class ComplexoDecimal:
+    """Número complexo com partes Decimal (imutável)."""
+    __slots__ = ("a", "b")
+
+    def __init__(self, a, b=Decimal(0)):
+        object.__setattr__(self, "a", a)
+        object.__setattr__(self, "b", b)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ComplexoDecimal é imutável")
+
+    def __reduce__(self):
+        return (ComplexoDecimal, (self.a, self.b))
+
+    def __repr__(self):
+        return f"ComplexoDecimal({self.a}, {self.b})"
+
+    def __str__(self):
+        a, b = self.a, self.b
+        if abs(b) < Decimal("1e-12"):
+            return f"{a}"
+        if abs(a) < Decimal("1e-12"):
+            return f"{b}i"
+        if b >= 0:
+            return f"{a} + {b}i"
+        return f"{a} - {b.copy_negate()}i"
+
+
+_D0 = Decimal(0)
+_D1 = Decimal(1)
+_TOL_ZERO_D = Decimal("1e-15")
+_TOL_IGUAL_D = Decimal("1e-9")
+
+
+def _decimal(v):
+    # inteiros sem ".0" (2 -> Decimal("2")); zero mantém o sinal
+    if v != 0 and v.is_integer() and abs(v) < 1e16:
+        return Decimal(int(v))
+    return Decimal(repr(v))
+
+
+def _cd(v):
+    # bool (resultado de '=') usado como número vale 0 ou 1
+    if type(v) is bool:
+        return ComplexoDecimal(Decimal(int(v)), _D0)
+    return v
+
+
+class BackendDecimal(Backend):
+    """Partes Decimal com `precisao` dígitos significativos. Os literais
+    são convertidos pelo repr do float (0.1 -> Decimal("0.1")), então
+    valem exatamente como escritos até 17 dígitos."""
+    nome = "decimal"
+
+    def __init__(self, precisao=50):
+        if precisao < 20:
+            raise ValueError("A precisão do backend decimal deve ser de pelo menos 20 dígitos")
+        self.precisao = precisao
+        self.contexto = Context(prec=precisao)
+        # funções elementares usam dígitos de guarda
+        self._interno = Context(prec=precisao + 10)
+        self._pi = None
+        self.unarios = {
+            "u+": _cd,
+            "+": _cd,
+            "u-": self._negar,
+            "-": self._negar,
+            "conj": self._conjugar,
+        }
+        self.binarios = {
+            "+": self._somar,
+            "-": self._subtrair,
+            "*": self._multiplicar,
+            "/": self._dividir,
+            "**": self._potencia,
+            "raiz": self._raiz,
+            "=": self._igual,
+        }
+
+    def __repr__(self):
+        return f"BackendDecimal(precisao={self.precisao})"
+
+    def numero(self, a, b):
+        return ComplexoDecimal(_decimal(float(a)), _decimal(float(b)))
+
+    def converter(self, valor):
+        if type(valor) is ComplexoDecimal or type(valor) is bool:
+            return valor
+        if isinstance(valor, Complexo):
+            return self.numero(valor.a, valor.b)
+        if isinstance(valor, complex):
+            return self.numero(valor.real, valor.imag)
+        return self.numero(valor, 0.0)
+
+    def para_complexo(self, valor):
+        if type(valor) is bool:
+            return valor
+        return Complexo(float(valor.a), float(valor.b))
+
+    def texto(self, valor):
+        return str(valor)
+
+    # ------------------ operações ------------------
+    def _novo(self, a, b):
+        # arredonda para a precisão do backend
+        c = self.contexto
+        return ComplexoDecimal(c.plus(a), c.plus(b))
+
+    # copy_negate preserva o sinal do zero (-0), como o float de Complexo
+    def _negar(self, v):
+        v = _cd(v)
+        return ComplexoDecimal(v.a.copy_negate(), v.b.copy_negate())
+
+    def _conjugar(self, v):
+        v = _cd(v)
+        return ComplexoDecimal(v.a, v.b.copy_negate())
+
+    def _somar(self, x, y):
+        x, y = _cd(x), _cd(y)
+        c = self.contexto
+        return ComplexoDecimal(c.add(x.a, y.a), c.add(x.b, y.b))
+
+    def _subtrair(self, x, y):
+        x, y = _cd(x), _cd(y)
+        c = self.contexto
+        return ComplexoDecimal(c.subtract(x.a, y.a), c.subtract(x.b, y.b))
+
+    def _multiplicar(self, x, y):
+        x, y = _cd(x), _cd(y)
+        with localcontext(self._interno):
+            a, b = x.a * y.a - x.b * y.b, x.a * y.b + x.b * y.a
+        return self._novo(a, b)
+
+    def _dividir(self, x, y):
+        x, y = _cd(x), _cd(y)
+        if abs(y.a) < _TOL_ZERO_D and abs(y.b) < _TOL_ZERO_D:
+            raise ErroMatematico("divisão por zero")
+        with localcontext(self._interno):
+            den = y.a * y.a + y.b * y.b
+            a, b = (x.a * y.a + x.b * y.b) / den, (x.b * y.a - x.a * y.b) / den
+        return self._novo(a, b)
+
+    def _igual(self, x, y):
+        x, y = _cd(x), _cd(y)
+        return abs(x.a - y.a) < _TOL_IGUAL_D and abs(x.b - y.b) < _TOL_IGUAL_D
+
+    def _potencia(self, x, y):
+        x, y = _cd(x), _cd(y)
+        nula = x.a == 0 and x.b == 0
+        if y.b == 0 and y.a == y.a.to_integral_value():
+            return self._potencia_inteira(x, int(y.a))
+        if nula:
+            if y.a == 0 and y.b == 0:
+                return ComplexoDecimal(_D1, _D0)
+            if y.a < 0 and y.b == 0:
+                raise ErroMatematico("0 elevado a potência negativa")
+            return ComplexoDecimal(_D0, _D0)
+        # z^w = exp(w * ln z)
+        with localcontext(self._interno):
+            ln_r = (x.a * x.a + x.b * x.b).ln() / 2
+            theta = self._atan2(x.b, x.a)
+            re = y.a * ln_r - y.b * theta
+            im = y.a * theta + y.b * ln_r
+            expx = re.exp()
+            a, b = expx * self._cos(im), expx * self._sin(im)
+        return self._novo(a, b)
+
+    def _potencia_inteira(self, x, k):
+        if k < 0 and x.a == 0 and x.b == 0:
+            raise ErroMatematico("0 elevado a potência negativa")
+        e = -k if k < 0 else k
+        with localcontext(self._interno):
+            ra, rb = _D1, _D0
+            ba, bb = x.a, x.b
+            while e:
+                if e & 1:
+                    ra, rb = ra * ba - rb * bb, ra * bb + rb * ba
+                ba, bb = ba * ba - bb * bb, 2 * ba * bb
+                e >>= 1
+            if k < 0:
+                den = ra * ra + rb * rb
+                ra, rb = ra / den, -rb / den
+        return self._novo(ra, rb)
+
+    def _raiz(self, x, y):
+        x, y = _cd(x), _cd(y)
+        if not (y.b == 0 and y.a != 0 and y.a == y.a.to_integral_value()):
+            return self._potencia(x, self._dividir(ComplexoDecimal(_D1, _D0), y))
+        n = int(y.a)
+        if x.a == 0 and x.b == 0:
+            if n < 0:
+                raise ErroMatematico("0 elevado a potência negativa")
+            return ComplexoDecimal(_D0, _D0)
+        if n == 1:
+            return x
+        with localcontext(self._interno):
+            if x.b == 0 and x.a > 0:
+                return self._novo(x.a.sqrt() if n == 2 else (x.a.ln() / n).exp(), _D0)
+            r = (x.a * x.a + x.b * x.b).sqrt()
+            if n == 2:
+                # mesma fórmula algébrica de Complexo.raiz
+                if x.a >= 0:
+                    t = ((r + x.a) / 2).sqrt()
+                    return self._novo(t, x.b / (2 * t))
+                t = ((r - x.a) / 2).sqrt()
+                return self._novo(abs(x.b) / (2 * t), t.copy_sign(x.b))
+            rn = (r.ln() / n).exp()
+            ang = self._atan2(x.b, x.a) / n
+            a, b = rn * self._cos(ang), rn * self._sin(ang)
+        return self._novo(a, b)
+
+    # ------------------ funções elementares (contexto interno ativo) ------------------
+    def _valor_pi(self):
+        if self._pi is None:
+            # série de Machin: pi = 16 atan(1/5) - 4 atan(1/239)
+            with localcontext(self._interno):
+                self._pi = 16 * _atan_serie(_D1 / 5) - 4 * _atan_serie(_D1 / 239)
+        return self._pi
+
+    def _cos(self, x):
+        return _cos_serie(self._reduzir(x))
+
+    def _sin(self, x):
+        return _sin_serie(self._reduzir(x))
+
+    def _reduzir(self, x):
+        # x em [-pi, pi]
+        pi = self._valor_pi()
+        if -pi <= x <= pi:
+            return x
+        dois_pi = 2 * pi
+        return x - dois_pi * ((x + pi) / dois_pi).to_integral_value(rounding="ROUND_FLOOR")
+
+    def _atan2(self, y, x):
+        pi = self._valor_pi()
+        if x > 0:
+            return _atan(y / x)
+        if x < 0:
+            if y == 0:
+                return -pi if y.is_signed() else pi
+            return _atan(y / x) + (pi if y > 0 else -pi)
+        if y == 0:
+            return _D0
+        return pi / 2 if y > 0 else -pi / 2
+
+
+def _atan(x):
+    # atan(x) = 2 atan(x / (1 + sqrt(1 + x²))): duas reduções levam |x| a
+    # no máximo tan(pi/8), onde a série converge depressa
+    fator = 1
+    for _ in range(3):
+        x = x / (1 + (1 + x * x).sqrt())
+        fator *= 2
+    return fator * _atan_serie(x)
+
+
+def _atan_serie(x):
+    # x - x³/3 + x⁵/5 - ...
+    total, potencia, x2, n = _D0, x, x * x, 1
+    while True:
+        termo = potencia / n
+        novo = total + termo if n % 4 == 1 else total - termo
+        if novo == total:
+            return total
+        total, potencia, n = novo, potencia * x2, n + 2
+
+
+def _cos_serie(x):
+    total, termo, x2, n = _D1, _D1, x * x, 0
+    while True:
+        n += 2
+        termo = -termo * x2 / (n * (n - 1))
+        novo = total + termo
+        if novo == total:
+            return total
+        total = novo
+
+
+def _sin_serie(x):
+    total, termo, x2, n = x, x, x * x, 1
+    while True:
+        n += 2
+        termo = -termo * x2 / (n * (n - 1))
+        novo = total + termo
+        if novo == total:
+            return total
+        total = novo
+
+
+# ------------------ registro ------------------
+BACKENDS = {
+    "complexo": BackendComplexo(),
+    "nativo": BackendNativo(),
+    "decimal": BackendDecimal(),
+}
+
+
+def obter_backend(backend):
+    """Backend pelo nome ("complexo", "nativo", "decimal") ou o próprio
+    objeto; None devolve o padrão (Complexo)."""
+    if backend is None:
+        return BACKENDS["complexo"]
+    if isinstance(backend, Backend):
+        return backend
+    try:
+        return BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"Backend desconhecido: {backend} "
+                         f"(use {', '.join(BACKENDS)})") from None
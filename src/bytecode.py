@@ -0,0 +1,356 @@
+# bytecode.py
+# ============================================================
+# Codificação binária compacta da AST em notação pós-fixa, com uma
+# máquina de pilha que avalia direto sobre os bytes, e um arquivo
+# contêiner (biblioteca) que pode ser mapeado em memória (mmap).
+#
+# Programa (uma expressão), little-endian:
+#   cabeçalho   <III   nº de constantes, nº de variáveis, bytes de código
+#   constantes  <dd    parte real e imaginária de cada Complexo
+#   variáveis   <H + UTF-8   tamanho e nome de cada variável
+#   código      1 byte de opcode; CONST e VAR seguidos de <I (índice);
+#               SERIE (depois dos limites) seguido de <BII (0 = soma,
+#               1 = produto; índice do nome de k; tamanho do código do
+#               termo) e do código do termo
+#
+# Biblioteca (arquivo):
+#   cabeçalho   <4sHHQQ  b"CXBC", versão, reservado, nº de programas,
+#                        posição do índice
+#   programas   um após o outro
+#   índice      <QI      posição e tamanho de cada programa
+# ============================================================
+
+import mmap
+import struct
+from collections import OrderedDict
+
+from parser import NumberNode, VariableNode, UnaryOpNode, BinaryOpNode, SeriesNode, FUNCOES_SERIE
+from complexos import Complexo
+from executor import OPERADORES_UNARIOS, OPERADORES_BINARIOS, funcao_serie
+from recursos import ESTOUROS
+
+_CAB = struct.Struct("<III")
+_PAR = struct.Struct("<dd")
+_U16 = struct.Struct("<H")
+_U32 = struct.Struct("<I")
+_SERIE = struct.Struct("<BII")
+_CAB_ARQ = struct.Struct("<4sHHQQ")
+_ENTRADA = struct.Struct("<QI")
+
+MAGIA = b"CXBC"
+VERSAO = 1
+
+# opcodes (fazem parte do formato em disco: só acrescentar no final)
+CONST = 0
+VAR = 1
+_UNARIOS = ("u+", "+", "u-", "-", "conj")
+_BINARIOS = ("+", "-", "*", "/", "**", "raiz", "=")
+_OP_UNARIO = {op: 2 + i for i, op in enumerate(_UNARIOS)}
+_OP_BINARIO = {op: 2 + len(_UNARIOS) + i for i, op in enumerate(_BINARIOS)}
+SERIE = 2 + len(_UNARIOS) + len(_BINARIOS)
+
+# opcode -> (função, aridade) para a máquina de pilha
+_TABELA = [None, None]
+_TABELA += [(OPERADORES_UNARIOS[op], 1) for op in _UNARIOS]
+_TABELA += [(OPERADORES_BINARIOS[op], 2) for op in _BINARIOS]
+
+
+# ------------------ codificação ------------------
+def codificar(ast):
+    """Converte a AST em um programa (bytes). Constantes e variáveis
+    repetidas são guardadas uma única vez."""
+    constantes = {}    # bytes do par (distingue 0.0 de -0.0) -> índice
+    variaveis = {}     # nome -> índice
+    codigo = _emitir(ast, constantes, variaveis)
+
+    partes = [_CAB.pack(len(constantes), len(variaveis), len(codigo))]
+    partes.extend(constantes)
+    for nome in variaveis:
+        dados = nome.encode("utf-8")
+        partes.append(_U16.pack(len(dados)))
+        partes.append(dados)
+    partes.append(bytes(codigo))
+    return b"".join(partes)
+
+
+def _emitir(ast, constantes, variaveis):
+    # código pós-fixo de `ast`, acrescentando às tabelas do programa
+    codigo = bytearray()
+    pilha = [ast]
+    while pilha:
+        node = pilha.pop()
+        if type(node) is int:
+            codigo.append(node)
+        elif type(node) is bytes:
+            codigo += node
+        elif isinstance(node, NumberNode):
+            v = node.value
+            chave = _PAR.pack(v.a, v.b)
+            i = constantes.setdefault(chave, len(constantes))
+            codigo.append(CONST)
+            codigo += _U32.pack(i)
+        elif isinstance(node, VariableNode):
+            i = variaveis.setdefault(node.name, len(variaveis))
+            codigo.append(VAR)
+            codigo += _U32.pack(i)
+        elif isinstance(node, UnaryOpNode):
+            if node.op not in _OP_UNARIO:
+                raise ValueError(f"Operador unário desconhecido: {node.op}")
+            pilha.append(_OP_UNARIO[node.op])
+            pilha.append(node.child)
+        elif isinstance(node, BinaryOpNode):
+            if node.op not in _OP_BINARIO:
+                raise ValueError(f"Operador binário desconhecido: {node.op}")
+            pilha.append(_OP_BINARIO[node.op])
+            pilha.append(node.right)
+            pilha.append(node.left)
+        elif isinstance(node, SeriesNode):
+            if node.op not in FUNCOES_SERIE:
+                raise ValueError(f"Função desconhecida: {node.op}")
+            corpo = _emitir(node.body, constantes, variaveis)
+            i = variaveis.setdefault(node.index, len(variaveis))
+            pilha.append(bytes((SERIE,)) + _SERIE.pack(FUNCOES_SERIE.index(node.op), i, len(corpo))
+                         + corpo)
+            pilha.append(node.end)
+            pilha.append(node.start)
+        else:
+            raise TypeError("Nó AST desconhecido")
+    return codigo
+
+
+def _localizar(dados, inicio):
+    """Onde estão as partes do programa em `dados[inicio:]`, sem converter
+    nada: (nº de constantes, posição da primeira, (posição, tamanho) do
+    UTF-8 de cada nome, posição e tamanho do código)."""
+    n_const, n_var, tamanho = _CAB.unpack_from(dados, inicio)
+    pos_const = inicio + _CAB.size
+    pos = pos_const + n_const * _PAR.size
+    lugares = []
+    for _ in range(n_var):
+        (n,) = _U16.unpack_from(dados, pos)
+        pos += _U16.size
+        lugares.append((pos, n))
+        pos += n
+    return n_const, pos_const, lugares, pos, tamanho
+
+
+def _ler_tabelas(dados, inicio):
+    """Constantes (Complexo) e nomes do programa em `dados[inicio:]`;
+    devolve também a posição e o tamanho do código."""
+    n_const, pos_const, lugares, pos, tamanho = _localizar(dados, inicio)
+    constantes = [Complexo(*_PAR.unpack_from(dados, pos_const + i * _PAR.size))
+                  for i in range(n_const)]
+    nomes = [str(dados[p:p + n], "utf-8") for p, n in lugares]
+    return constantes, nomes, pos, tamanho
+
+
+def decodificar(dados, inicio=0):
+    """Reconstrói a AST de um programa."""
+    constantes, nomes, pos, tamanho = _ler_tabelas(dados, inicio)
+    return _decodificar_codigo(dados, pos, pos + tamanho, constantes, nomes)
+
+
+def _serie(dados, pos, constantes, nomes):
+    # (op, nome de k, AST do termo, posição depois do termo) de um SERIE em `pos`
+    tipo, i, tamanho = _SERIE.unpack_from(dados, pos + 1)
+    pos += 1 + _SERIE.size
+    corpo = _decodificar_codigo(dados, pos, pos + tamanho, constantes, nomes)
+    return FUNCOES_SERIE[tipo], nomes[i], corpo, pos + tamanho
+
+
+def _decodificar_codigo(dados, pos, fim, constantes, nomes):
+    pilha = []
+    while pos < fim:
+        op = dados[pos]
+        if op == CONST or op == VAR:
+            (i,) = _U32.unpack_from(dados, pos + 1)
+            pos += 5
+            pilha.append(NumberNode(constantes[i]) if op == CONST else VariableNode(nomes[i]))
+            continue
+        if op == SERIE:
+            nome_op, indice, corpo, pos = _serie(dados, pos, constantes, nomes)
+            end = pilha.pop()
+            pilha[-1] = SeriesNode(nome_op, corpo, indice, pilha[-1], end)
+            continue
+        pos += 1
+        i = op - 2
+        if i < len(_UNARIOS):
+            pilha[-1] = UnaryOpNode(_UNARIOS[i], pilha[-1])
+        elif i - len(_UNARIOS) < len(_BINARIOS):
+            right = pilha.pop()
+            pilha[-1] = BinaryOpNode(_BINARIOS[i - len(_UNARIOS)], pilha[-1], right)
+        else:
+            raise ValueError(f"Opcode inválido: {op}")
+    if len(pilha) != 1:
+        raise ValueError("Programa malformado")
+    return pilha[0]
+
+
+# ------------------ máquina de pilha ------------------
+def executar(dados, vars_dict, inicio=0, limites=None):
+    """Avalia o programa em `dados[inicio:]` (bytes, memoryview ou mmap)
+    sem reconstruir a AST. Resultado e erros iguais aos de eval_node,
+    inclusive com `limites` (recursos.Limites). Cada constante e cada nome
+    é lido dos bytes só no ponto em que o código o usa."""
+    return _executar_limitado(dados, vars_dict, inicio, limites, None)
+
+
+def _executar_limitado(dados, vars_dict, inicio, limites, tabelas):
+    orcamento = None if limites is None else limites.orcamento()
+    try:
+        return _executar(dados, vars_dict, inicio, orcamento, tabelas)
+    except ESTOUROS as e:
+        if orcamento is None:
+            raise
+        raise orcamento.estouro() from e
+
+
+def _executar(dados, vars_dict, inicio, orcamento, tabelas):
+    # `tabelas`: resultado de _ler_tabelas já guardado (Biblioteca), ou
+    # None para ler cada constante e cada nome no ponto em que é usado
+    if tabelas is None:
+        n_const, pos_const, lugares, pos, tamanho = _localizar(dados, inicio)
+        constantes = nomes = None
+    else:
+        constantes, nomes, pos, tamanho = tabelas
+    fim = pos + tamanho
+    tabela = _TABELA
+    u32 = _U32.unpack_from
+    par = _PAR.unpack_from
+    pilha = []
+    while pos < fim:
+        op = dados[pos]
+        if op == CONST:
+            (i,) = u32(dados, pos + 1)
+            if constantes is not None:
+                pilha.append(constantes[i])
+            elif i < n_const:
+                pilha.append(Complexo(*par(dados, pos_const + i * _PAR.size)))
+            else:
+                raise IndexError("Índice de constante fora do intervalo")
+            pos += 5
+        elif op == VAR:
+            (i,) = u32(dados, pos + 1)
+            if nomes is not None:
+                nome = nomes[i]
+            else:
+                p, n = lugares[i]
+                nome = str(dados[p:p + n], "utf-8")
+            if nome not in vars_dict:
+                raise NameError(f"Valor para variável '{nome}' não fornecido")
+            pilha.append(vars_dict[nome])
+            pos += 5
+        elif op == SERIE:
+            # o termo é reconstruído e avaliado por somatorio (formas
+            # fechadas e lotes); os limites já estão na pilha. Só aqui as
+            # tabelas inteiras são necessárias.
+            if constantes is None:
+                constantes, nomes = _ler_tabelas(dados, inicio)[:2]
+            nome_op, indice, corpo, pos = _serie(dados, pos, constantes, nomes)
+            fim_serie = pilha.pop()
+            serie = SeriesNode(nome_op, corpo, indice, None, None)
+            pilha[-1] = funcao_serie(serie, vars_dict, None, orcamento)(pilha[-1], fim_serie)
+            if orcamento is not None:
+                orcamento.passo(pilha[-1])
+        else:
+            if op >= len(tabela):
+                raise ValueError(f"Opcode inválido: {op}")
+            fn, aridade = tabela[op]
+            if aridade == 1:
+                pilha[-1] = fn(pilha[-1])
+            else:
+                right = pilha.pop()
+                pilha[-1] = fn(pilha[-1], right)
+            if orcamento is not None:
+                orcamento.passo(pilha[-1])
+            pos += 1
+    if len(pilha) != 1:
+        raise ValueError("Programa malformado")
+    return pilha[0]
+
+
+# ------------------ biblioteca em disco ------------------
+def salvar_biblioteca(caminho, asts):
+    """Grava as ASTs (ou programas já codificados) em `caminho`, sem
+    manter todas em memória. Retorna quantos programas foram gravados."""
+    indice = []
+    with open(caminho, "wb") as f:
+        f.write(_CAB_ARQ.pack(MAGIA, VERSAO, 0, 0, 0))
+        pos = _CAB_ARQ.size
+        for ast in asts:
+            dados = ast if isinstance(ast, (bytes, bytearray)) else codificar(ast)
+            f.write(dados)
+            indice.append(_ENTRADA.pack(pos, len(dados)))
+            pos += len(dados)
+        f.writelines(indice)
+        f.seek(0)
+        f.write(_CAB_ARQ.pack(MAGIA, VERSAO, 0, len(indice), pos))
+    return len(indice)
+
+
+class Biblioteca:
+    """Biblioteca de programas mapeada em memória. Cada programa é lido e
+    avaliado direto do mapa, sem carregar o arquivo inteiro. As tabelas
+    de constantes e nomes convertidas ficam guardadas para os `tabelas`
+    programas usados mais recentemente (LRU), e não para o arquivo todo."""
+
+    def __init__(self, caminho, tabelas=64):
+        if tabelas < 1:
+            raise ValueError("O número de tabelas guardadas deve ser pelo menos 1")
+        with open(caminho, "rb") as f:
+            self._mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magia, versao, _, n, self._indice = _CAB_ARQ.unpack_from(self._mapa, 0)
+            if magia != MAGIA:
+                raise ValueError("Arquivo não é uma biblioteca de bytecode")
+            if versao != VERSAO:
+                raise ValueError(f"Versão de bytecode não suportada: {versao}")
+        except Exception:
+            self._mapa.close()
+            raise
+        self._n = n
+        self._max_tabelas = tabelas
+        self._tabelas = OrderedDict()     # posição do programa -> _ler_tabelas
+
+    def __len__(self):
+        return self._n
+
+    def _entrada(self, i):
+        if not -self._n <= i < self._n:
+            raise IndexError("Índice de programa fora do intervalo")
+        if i < 0:
+            i += self._n
+        return _ENTRADA.unpack_from(self._mapa, self._indice + i * _ENTRADA.size)
+
+    def programa(self, i):
+        """Bytes do i-ésimo programa (cópia só dele)."""
+        pos, tamanho = self._entrada(i)
+        return self._mapa[pos:pos + tamanho]
+
+    def _tabelas_de(self, inicio):
+        tabelas = self._tabelas.get(inicio)
+        if tabelas is not None:
+            self._tabelas.move_to_end(inicio)
+            return tabelas
+        tabelas = self._tabelas[inicio] = _ler_tabelas(self._mapa, inicio)
+        if len(self._tabelas) > self._max_tabelas:
+            self._tabelas.popitem(last=False)
+        return tabelas
+
+    def ast(self, i):
+        constantes, nomes, pos, tamanho = self._tabelas_de(self._entrada(i)[0])
+        return _decodificar_codigo(self._mapa, pos, pos + tamanho, constantes, nomes)
+
+    def avaliar(self, i, vars_dict, limites=None):
+        """Como executar, para o i-ésimo programa."""
+        inicio = self._entrada(i)[0]
+        return _executar_limitado(self._mapa, vars_dict, inicio, limites, self._tabelas_de(inicio))
+
+    def fechar(self):
+        self._mapa.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
@@ -0,0 +1,67 @@
+# cache.py
+# ============================================================
+# Cache LRU de ASTs na frente de Parser.parse, indexado pelo texto
+# da expressão. As ASTs devolvidas são compartilhadas entre chamadas;
+# isso é seguro porque nós e valores Complexo são imutáveis.
+# ============================================================
+
+from collections import OrderedDict
+
+from parser import Parser
+
+
+class CacheParse:
+    """Guarda até `tamanho` ASTs, descartando a usada há mais tempo.
+
+    Contadores: `acertos` (hits), `falhas` (misses) e `despejos`
+    (evictions). Expressões com erro de sintaxe não são guardadas.
+    """
+
+    def __init__(self, tamanho=256, parser=None):
+        if tamanho < 1:
+            raise ValueError("O tamanho do cache deve ser pelo menos 1")
+        self.tamanho = tamanho
+        self.parser = parser if parser is not None else Parser()
+        self._entradas = OrderedDict()
+        self.acertos = 0
+        self.falhas = 0
+        self.despejos = 0
+
+    def parse(self, text: str):
+        """Mesmo contrato de Parser.parse, consultando o cache antes."""
+        ast = self._entradas.get(text)
+        if ast is not None:
+            self._entradas.move_to_end(text)
+            self.acertos += 1
+            return ast
+        self.falhas += 1
+        ast = self.parser.parse(text)
+        self._entradas[text] = ast
+        if len(self._entradas) > self.tamanho:
+            self._entradas.popitem(last=False)
+            self.despejos += 1
+        return ast
+
+    def estatisticas(self):
+        total = self.acertos + self.falhas
+        return {
+            "tamanho": self.tamanho,
+            "entradas": len(self._entradas),
+            "acertos": self.acertos,
+            "falhas": self.falhas,
+            "despejos": self.despejos,
+            "taxa_acerto": self.acertos / total if total else 0.0,
+        }
+
+    def limpar(self):
+        """Esvazia o cache e zera os contadores."""
+        self._entradas.clear()
+        self.acertos = 0
+        self.falhas = 0
+        self.despejos = 0
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def __contains__(self, text):
+        return text in self._entradas
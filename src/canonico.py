@@ -0,0 +1,240 @@
+# canonico.py
+# ============================================================
+# Forma canônica e impressão digital estrutural da AST.
+#
+# canonizar reescreve a árvore de modo que expressões que só diferem
+# pela ordem de operandos comutativos fiquem iguais:
+#   - cadeias de + e de * são achatadas e os operandos ordenados
+#     (variáveis, depois subexpressões, depois constantes), e a cadeia é
+#     remontada associando à esquerda: 2 + x + (y * 3) -> (x + y*3) + 2;
+#   - os dois lados de '=' ficam em ordem fixa;
+#   - '+' unário some e '-' unário vira 'u-'.
+# O resultado é o mesmo da expressão original, a menos de arredondamento
+# (a soma de ponto flutuante não é associativa). Se mais de uma parte
+# da expressão falha, o erro lançado pode ser o de outra parte.
+#
+# assinatura é um hash estável (BLAKE2b, igual entre execuções e
+# processos) da forma canônica: serve de chave para deduplicar cálculos
+# idênticos e reaproveitar resultados.
+# ============================================================
+
+import hashlib
+import struct
+from collections import OrderedDict
+
+from parser import Parser, NumberNode, VariableNode, UnaryOpNode, BinaryOpNode, SeriesNode
+from complexos import Complexo
+from executor import coletar_variaveis, eval_node
+
+_COMUTATIVOS = ("+", "*")
+_PAR = struct.Struct("<dd")
+
+
+def _digerir(*partes):
+    return hashlib.blake2b(b"\0".join(partes), digest_size=16).digest()
+
+
+def _operandos(node):
+    """Filhos a canonizar: toda a cadeia de um operador comutativo, ou os
+    filhos diretos."""
+    if isinstance(node, UnaryOpNode):
+        return [node.child]
+    if isinstance(node, SeriesNode):
+        return [node.body, node.start, node.end]
+    if isinstance(node, BinaryOpNode):
+        if node.op not in _COMUTATIVOS:
+            return [node.left, node.right]
+        operandos = []
+        pilha = [node.right, node.left]
+        while pilha:
+            n = pilha.pop()
+            if isinstance(n, BinaryOpNode) and n.op == node.op:
+                pilha.append(n.right)
+                pilha.append(n.left)
+            else:
+                operandos.append(n)
+        return operandos
+    return []
+
+
+def _ordem(item):
+    # item = (nó canônico, digest): variáveis, subexpressões, constantes
+    node, digest = item
+    if isinstance(node, VariableNode):
+        return (0, node.name, digest)
+    if isinstance(node, NumberNode):
+        v = node.value
+        return (2, v.a, v.b, digest)
+    return (1, digest)
+
+
+def canonizar_com_assinatura(ast):
+    """Retorna (AST canônica, assinatura em hexadecimal)."""
+    feitos = {}   # id(nó original) -> (nó canônico, digest)
+    pilha = [(ast, None)]
+    while pilha:
+        node, filhos = pilha.pop()
+        if filhos is None:
+            filhos = _operandos(node)
+            if filhos:
+                pilha.append((node, filhos))
+                pilha.extend((f, None) for f in reversed(filhos))
+                continue
+        feitos[id(node)] = _canonico(node, [feitos[id(f)] for f in filhos])
+    node, digest = feitos[id(ast)]
+    return node, digest.hex()
+
+
+def _canonico(node, filhos):
+    if isinstance(node, NumberNode):
+        v = node.value
+        if isinstance(v, Complexo):
+            return node, _digerir(b"N", _PAR.pack(v.a, v.b))
+        return node, _digerir(b"N", repr(v).encode())
+    if isinstance(node, VariableNode):
+        return node, _digerir(b"V", node.name.encode())
+    if isinstance(node, UnaryOpNode):
+        (child, d), = filhos
+        if node.op in ("u+", "+"):
+            return child, d
+        op = "u-" if node.op == "-" else node.op
+        if child is node.child and op == node.op:
+            return node, _digerir(b"U", op.encode(), d)
+        return UnaryOpNode(op, child), _digerir(b"U", op.encode(), d)
+    if isinstance(node, BinaryOpNode):
+        op = node.op
+        if op in _COMUTATIVOS or op == "=":
+            filhos = sorted(filhos, key=_ordem)
+        chave = op.encode()
+        atual, d = filhos[0]
+        for direito, dd in filhos[1:]:
+            atual = BinaryOpNode(op, atual, direito)
+            d = _digerir(b"B", chave, d, dd)
+        if len(filhos) == 2 and filhos[0][0] is node.left and filhos[1][0] is node.right:
+            atual = node   # nada mudou: reaproveita o nó original
+        return atual, d
+    if isinstance(node, SeriesNode):
+        (body, db), (start, ds), (end, de) = filhos
+        d = _digerir(b"S", node.op.encode(), node.index.encode(), db, ds, de)
+        if body is node.body and start is node.start and end is node.end:
+            return node, d
+        return SeriesNode(node.op, body, node.index, start, end), d
+    raise TypeError("Nó AST desconhecido")
+
+
+def canonizar(ast):
+    """AST canônica equivalente a `ast` (a original não é alterada)."""
+    return canonizar_com_assinatura(ast)[0]
+
+
+def assinatura(ast):
+    """Impressão digital estrutural da forma canônica de `ast` (hex)."""
+    return canonizar_com_assinatura(ast)[1]
+
+
+# ------------------ cache e deduplicação ------------------
+class CacheCanonico:
+    """Como CacheParse, mas expressões com a mesma forma canônica (ex.:
+    "x+2", "2+x" e "(x)+2") devolvem a mesma AST canônica.
+
+    Contadores: `acertos_texto` (texto já visto), `acertos_estrutura`
+    (texto novo, estrutura já vista) e `falhas`.
+    """
+
+    def __init__(self, tamanho=256, parser=None):
+        if tamanho < 1:
+            raise ValueError("O tamanho do cache deve ser pelo menos 1")
+        self.tamanho = tamanho
+        self.parser = parser if parser is not None else Parser()
+        self._textos = OrderedDict()      # texto -> assinatura
+        self._estruturas = OrderedDict()  # assinatura -> AST canônica
+        self.acertos_texto = 0
+        self.acertos_estrutura = 0
+        self.falhas = 0
+
+    def parse_com_assinatura(self, text):
+        chave = self._textos.get(text)
+        if chave is not None and chave in self._estruturas:
+            self._textos.move_to_end(text)
+            self._estruturas.move_to_end(chave)
+            self.acertos_texto += 1
+            return self._estruturas[chave], chave
+        ast, chave = canonizar_com_assinatura(self.parser.parse(text))
+        existente = self._estruturas.get(chave)
+        if existente is not None:
+            self.acertos_estrutura += 1
+            self._estruturas.move_to_end(chave)
+            ast = existente
+        else:
+            self.falhas += 1
+            self._estruturas[chave] = ast
+            if len(self._estruturas) > self.tamanho:
+                self._estruturas.popitem(last=False)
+        self._textos[text] = chave
+        self._textos.move_to_end(text)
+        if len(self._textos) > self.tamanho:
+            self._textos.popitem(last=False)
+        return ast, chave
+
+    def parse(self, text):
+        """Mesmo contrato de Parser.parse, devolvendo a AST canônica."""
+        return self.parse_com_assinatura(text)[0]
+
+    def estatisticas(self):
+        total = self.acertos_texto + self.acertos_estrutura + self.falhas
+        return {
+            "tamanho": self.tamanho,
+            "estruturas": len(self._estruturas),
+            "acertos_texto": self.acertos_texto,
+            "acertos_estrutura": self.acertos_estrutura,
+            "falhas": self.falhas,
+            "taxa_acerto": (self.acertos_texto + self.acertos_estrutura) / total if total else 0.0,
+        }
+
+    def __len__(self):
+        return len(self._estruturas)
+
+
+def deduplicar(asts):
+    """Agrupa ASTs pela assinatura. Retorna (representantes canônicos,
+    índice do representante de cada AST de entrada)."""
+    representantes = []
+    posicao = {}
+    indices = []
+    for ast in asts:
+        node, chave = canonizar_com_assinatura(ast)
+        if chave not in posicao:
+            posicao[chave] = len(representantes)
+            representantes.append(node)
+        indices.append(posicao[chave])
+    return representantes, indices
+
+
+def avaliar_deduplicado(pares):
+    """Avalia uma lista de (ast, vars_dict), calculando uma única vez cada
+    combinação de forma canônica e valores das variáveis usadas.
+
+    Retorna (resultados, reaproveitados): resultados[i] é o valor ou a
+    exceção lançada pelo i-ésimo par.
+    """
+    feitos = {}
+    resultados = []
+    reaproveitados = 0
+    for ast, vars_dict in pares:
+        node, chave = canonizar_com_assinatura(ast)
+        usadas = set()
+        coletar_variaveis(node, usadas)
+        valores = []
+        for nome in sorted(usadas):
+            v = vars_dict.get(nome)
+            valores.append((nome, (v.a, v.b) if isinstance(v, Complexo) else v))
+        chave = (chave, tuple(valores))
+        if chave in feitos:
+            reaproveitados += 1
+        else:
+            try:
+                feitos[chave] = eval_node(node, vars_dict)
+            except Exception as e:
+                feitos[chave] = e
+        resultados.append(feitos[chave])
+    return resultados, reaproveitados
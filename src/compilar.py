@@ -0,0 +1,204 @@
+# compilar.py
+# ============================================================
+# Compila a AST produzida por Parser.parse em uma closure Python.
+# O despacho por tipo de nó e por operador acontece uma única vez,
+# na compilação; a função gerada só encadeia as operações.
+# Resultado e erros são os mesmos de executor.eval_node.
+#
+# A compilação percorre a árvore com pilhas explícitas. Subárvores de
+# altura até _ALTURA_MAXIMA viram closures aninhadas (uma chamada
+# Python por nível); acima disso a função gerada percorre uma lista de
+# passos em pós-ordem, como executor._avaliar, e nenhuma das duas
+# esbarra no limite de recursão em ASTs profundas.
+# ============================================================
+
+from parser import NumberNode, VariableNode, UnaryOpNode, BinaryOpNode, SeriesNode
+from executor import OPERADORES_UNARIOS, OPERADORES_BINARIOS, funcao_serie, _operador_desconhecido
+
+_ALTURA_MAXIMA = 100
+
+
+def compilar_ast(node):
+    """Converte a AST em fn(vars_dict), equivalente a eval_node(node, vars_dict).
+
+    Um operador desconhecido só lança ValueError quando fn é chamada,
+    depois de avaliar os operandos, como em eval_node.
+    """
+    fn = _fechar(node)
+    if fn is not None:
+        return fn
+    alturas = _alturas(node)
+
+    # passos (fn, aridade): aridade 0 empilha fn(vars_dict), 1 e 2 aplicam
+    # fn aos últimos valores; -1 avalia a série fn sobre os dois limites
+    passos = []
+    pilha = [node]
+    while pilha:
+        node = pilha.pop()
+        if type(node) is tuple:
+            passos.append(node)
+        elif alturas[id(node)] <= _ALTURA_MAXIMA:
+            passos.append((_fechar(node), 0))
+        elif isinstance(node, UnaryOpNode):
+            pilha.append((_operador(OPERADORES_UNARIOS, "unário", node.op), 1))
+            pilha.append(node.child)
+        elif isinstance(node, BinaryOpNode):
+            pilha.append((_operador(OPERADORES_BINARIOS, "binário", node.op), 2))
+            pilha.append(node.right)
+            pilha.append(node.left)
+        else:
+            pilha.append((node, -1))
+            pilha.append(node.end)
+            pilha.append(node.start)
+
+    def programa(vars_dict):
+        valores = []
+        for fn, aridade in passos:
+            if aridade == 0:
+                valores.append(fn(vars_dict))
+            elif aridade == 1:
+                valores[-1] = fn(valores[-1])
+            else:
+                right = valores.pop()
+                if aridade == 2:
+                    valores[-1] = fn(valores[-1], right)
+                else:
+                    valores[-1] = funcao_serie(fn, vars_dict)(valores[-1], right)
+        return valores[-1]
+    return programa
+
+
+def _filhos(node):
+    # filhos avaliados pela função compilada (o termo de uma série é
+    # avaliado por somatorio)
+    if isinstance(node, UnaryOpNode):
+        return (node.child,)
+    if isinstance(node, BinaryOpNode):
+        return (node.left, node.right)
+    if isinstance(node, SeriesNode):
+        return (node.start, node.end)
+    return ()
+
+
+def _alturas(raiz):
+    """id(nó) -> altura da subárvore (folha = 1)."""
+    alturas = {}
+    pilha = [raiz]
+    while pilha:
+        node = pilha[-1]
+        if id(node) in alturas:
+            pilha.pop()
+            continue
+        filhos = _filhos(node)
+        pendentes = [f for f in filhos if id(f) not in alturas]
+        if pendentes:
+            pilha.extend(pendentes)
+            continue
+        pilha.pop()
+        alturas[id(node)] = 1 + max((alturas[id(f)] for f in filhos), default=0)
+    return alturas
+
+
+def _operador(tabela, tipo, op):
+    fn = tabela.get(op)
+    return _operador_desconhecido(tipo, op) if fn is None else fn
+
+
+def _fechar(raiz):
+    """Closures aninhadas para a subárvore `raiz`, montadas de baixo para
+    cima com uma pilha explícita; None se ela passa de _ALTURA_MAXIMA."""
+    pilha = [raiz]
+    fechos = []
+    alturas = []     # altura de cada closure em `fechos`
+    while pilha:
+        node = pilha.pop()
+        if type(node) is tuple:
+            (node,) = node
+            if isinstance(node, BinaryOpNode):
+                right = fechos.pop()
+                fechos[-1] = _binario(node.op, fechos[-1], right)
+                altura = max(alturas.pop(), alturas[-1]) + 1
+            elif isinstance(node, UnaryOpNode):
+                fechos[-1] = _unario(node.op, fechos[-1])
+                altura = alturas[-1] + 1
+            else:
+                right = fechos.pop()
+                fechos[-1] = _serie(node, fechos[-1], right)
+                altura = max(alturas.pop(), alturas[-1]) + 1
+            if altura > _ALTURA_MAXIMA:
+                return None
+            alturas[-1] = altura
+        elif isinstance(node, NumberNode):
+            fechos.append(_constante(node.value))
+            alturas.append(1)
+        elif isinstance(node, VariableNode):
+            fechos.append(_variavel(node.name))
+            alturas.append(1)
+        elif isinstance(node, BinaryOpNode):
+            pilha += ((node,), node.right, node.left)
+        elif isinstance(node, UnaryOpNode):
+            pilha += ((node,), node.child)
+        elif isinstance(node, SeriesNode):
+            pilha += ((node,), node.end, node.start)
+        else:
+            raise TypeError("Nó AST desconhecido")
+    return fechos[-1]
+
+
+# ------------------ closures de cada tipo de nó ------------------
+def _constante(value):
+    def constante(vars_dict):
+        return value
+    return constante
+
+
+def _variavel(name):
+    msg = f"Valor para variável '{name}' não fornecido"
+
+    def variavel(vars_dict):
+        if name not in vars_dict:
+            raise NameError(msg)
+        return vars_dict[name]
+    return variavel
+
+
+def _unario(op, child):
+    if op in ("u+", "+"):
+        # identidade: nada a fazer além de avaliar o filho
+        return child
+    fn = _operador(OPERADORES_UNARIOS, "unário", op)
+
+    def unario(vars_dict):
+        return fn(child(vars_dict))
+    return unario
+
+
+def _binario(op, left, right):
+    # operadores aritméticos simples ficam embutidos na closure
+    if op == "+":
+        def soma(vars_dict):
+            return left(vars_dict) + right(vars_dict)
+        return soma
+    if op == "-":
+        def subtracao(vars_dict):
+            return left(vars_dict) - right(vars_dict)
+        return subtracao
+    if op == "*":
+        def multiplicacao(vars_dict):
+            return left(vars_dict) * right(vars_dict)
+        return multiplicacao
+    if op == "/":
+        def divisao(vars_dict):
+            return left(vars_dict) / right(vars_dict)
+        return divisao
+    fn = _operador(OPERADORES_BINARIOS, "binário", op)
+
+    def binario(vars_dict):
+        return fn(left(vars_dict), right(vars_dict))
+    return binario
+
+
+def _serie(node, inicio, fim):
+    def serie(vars_dict):
+        return funcao_serie(node, vars_dict)(inicio(vars_dict), fim(vars_dict))
+    return serie
@@ -10,13 +10,26 @@ class ErroMatematico(Exception):
     pass
 
 class Complexo:
+    # valor imutável e compacto (sem __dict__): pode ser compartilhado
+    # entre ASTs e caches
+    __slots__ = ("a", "b")
+
     def __init__(self, a, b=0.0):
         if isinstance(a, Complexo):
-            self.a = float(a.a)
-            self.b = float(a.b)
+            _set_a(self, float(a.a))
+            _set_b(self, float(a.b))
         else:
-            self.a = float(a)
-            self.b = float(b)
+            _set_a(self, float(a))
+            _set_b(self, float(b))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Complexo é imutável")
+
+    def __delattr__(self, name):
+        raise AttributeError("Complexo é imutável")
+
+    def __reduce__(self):
+        return (Complexo, (self.a, self.b))
 
     def __repr__(self):
         return f"Complexo({self.a}, {self.b})"
@@ -41,44 +54,60 @@ class Complexo:
         raise TypeError("Operação com tipo incompatível")
 
     # soma/subtração
+    # caminho rápido: operando já Complexo dispensa _cast, e o resultado
+    # é montado direto nos slots (sem passar por __init__)
     def __add__(self, other):
-        other = Complexo._cast(other)
-        return Complexo(self.a + other.a, self.b + other.b)
+        if type(other) is not Complexo:
+            other = Complexo._cast(other)
+        z = _criar(Complexo)
+        _set_a(z, self.a + other.a)
+        _set_b(z, self.b + other.b)
+        return z
     def __radd__(self, other):
         return self.__add__(other)
     def __sub__(self, other):
-        other = Complexo._cast(other)
-        return Complexo(self.a - other.a, self.b - other.b)
+        if type(other) is not Complexo:
+            other = Complexo._cast(other)
+        z = _criar(Complexo)
+        _set_a(z, self.a - other.a)
+        _set_b(z, self.b - other.b)
+        return z
     def __rsub__(self, other):
         other = Complexo._cast(other)
-        return Complexo(other.a - self.a, other.b - self.b)
+        return _novo(other.a - self.a, other.b - self.b)
 
     # multiplicação
     def __mul__(self, other):
-        other = Complexo._cast(other)
-        return Complexo(
-            self.a * other.a - self.b * other.b,
-            self.a * other.b + self.b * other.a
-        )
+        if type(other) is not Complexo:
+            other = Complexo._cast(other)
+        a, b, c, d = self.a, self.b, other.a, other.b
+        z = _criar(Complexo)
+        _set_a(z, a * c - b * d)
+        _set_b(z, a * d + b * c)
+        return z
     def __rmul__(self, other):
         return self.__mul__(other)
 
     # divisão
     def __truediv__(self, other):
-        other = Complexo._cast(other)
-        if abs(other.a) < 1e-15 and abs(other.b) < 1e-15:
+        if type(other) is not Complexo:
+            other = Complexo._cast(other)
+        a, b, c, d = self.a, self.b, other.a, other.b
+        if abs(c) < 1e-15 and abs(d) < 1e-15:
             raise ErroMatematico("divisão por zero")
-        den = other.a * other.a + other.b * other.b
+        den = c * c + d * d
         # multiplicar pelo conjugado do denominador
-        num = Complexo(self.a * other.a + self.b * other.b, self.b * other.a - self.a * other.b)
-        return Complexo(num.a / den, num.b / den)
+        z = _criar(Complexo)
+        _set_a(z, (a * c + b * d) / den)
+        _set_b(z, (b * c - a * d) / den)
+        return z
     def __rtruediv__(self, other):
         other = Complexo._cast(other)
         return other.__truediv__(self)
 
     # conjugado
     def conjugado(self):
-        return Complexo(self.a, -self.b)
+        return _novo(self.a, -self.b)
 
     # módulo e argumento
     def modulo(self):
@@ -88,21 +117,16 @@ class Complexo:
 
     # potência (aceita int/float/Complexo)
     def __pow__(self, n):
-        if isinstance(n, (int, float)):
-            n = Complexo(float(n), 0.0)
+        if isinstance(n, int):
+            return self._potencia_inteira(n)
+        if isinstance(n, float):
+            n = Complexo(n, 0.0)
         elif not isinstance(n, Complexo):
             raise TypeError("Expoente inválido")
 
-        # caso expoente inteiro real -> De Moivre
+        # expoente inteiro real
         if n.b == 0 and float(n.a).is_integer():
-            k = int(n.a)
-            if self.modulo() == 0 and k < 0:
-                raise ErroMatematico("0 elevado a potência negativa")
-            r = self.modulo()
-            theta = self.argumento()
-            rn = (r ** k)
-            ang = k * theta
-            return Complexo(rn * math.cos(ang), rn * math.sin(ang))
+            return self._potencia_inteira(int(n.a))
 
         # caso geral: z^w = exp(w * ln z)
         r = self.modulo()
@@ -123,10 +147,116 @@ class Complexo:
         expx = math.exp(x)
         return Complexo(expx * math.cos(y), expx * math.sin(y))
 
+    def _potencia_inteira(self, k):
+        """self ** k para k inteiro, por exponenciação binária (quadrados
+        sucessivos). Só usa multiplicações, então inteiros gaussianos dão
+        resultado exato, ex.: (1+1i)**8 == 16. Expoente negativo: uma única
+        recíproca no final. Se algum passo estourar, recorre a De Moivre."""
+        if k < 0 and self.a == 0 and self.b == 0:
+            raise ErroMatematico("0 elevado a potência negativa")
+        e = -k if k < 0 else k
+        if e == 0:
+            return _novo(1.0, 0.0)
+        ba, bb = self.a, self.b
+        # o bit menos significativo igual a 1 inicia o acumulador (sem multiplicar por 1)
+        while not e & 1:
+            ba, bb = ba * ba - bb * bb, 2.0 * ba * bb
+            e >>= 1
+        ra, rb = ba, bb
+        e >>= 1
+        while e:
+            ba, bb = ba * ba - bb * bb, 2.0 * ba * bb
+            if e & 1:
+                ra, rb = ra * ba - rb * bb, ra * bb + rb * ba
+            e >>= 1
+        if k < 0:
+            den = ra * ra + rb * rb
+            if den == 0 or not _finito(den):
+                return self._de_moivre(k)
+            ra, rb = ra / den, -rb / den
+        if not (_finito(ra) and _finito(rb)):
+            return self._de_moivre(k)
+        return _novo(ra, rb)
+
+    def _de_moivre(self, k):
+        r = self.modulo()
+        if r == 0 and k < 0:
+            raise ErroMatematico("0 elevado a potência negativa")
+        theta = self.argumento()
+        rn = (r ** k)
+        ang = k * theta
+        return Complexo(rn * math.cos(ang), rn * math.sin(ang))
+
+    # raiz de ordem inteira
+    def raiz(self, n):
+        """Raiz principal de ordem inteira n != 0, equivalente a self ** (1/n).
+
+        Base real positiva usa a raiz real (math.sqrt para n = 2); n = 2 usa
+        a fórmula algébrica da raiz quadrada complexa; os demais casos, a
+        forma polar r**(1/n) * cis(theta/n).
+        """
+        n = int(n)
+        if n == 0:
+            raise ErroMatematico("divisão por zero")
+        a, b = self.a, self.b
+        if a == 0 and b == 0:
+            if n < 0:
+                raise ErroMatematico("0 elevado a potência negativa")
+            return Complexo(0.0, 0.0)
+        if n == 1:
+            return self
+        if b == 0 and a > 0:
+            return _novo(math.sqrt(a) if n == 2 else a ** (1.0 / n), 0.0)
+        if n == 2:
+            r = math.hypot(a, b)
+            # evita cancelamento em r + a quando a < 0
+            if a >= 0:
+                t = math.sqrt((r + a) / 2.0)
+                return _novo(t, b / (2.0 * t))
+            t = math.sqrt((r - a) / 2.0)
+            return _novo(abs(b) / (2.0 * t), math.copysign(t, b))
+        rn = self.modulo() ** (1.0 / n)
+        ang = self.argumento() / n
+        return _novo(rn * math.cos(ang), rn * math.sin(ang))
+
     # igualdade (tolerância)
     def __eq__(self, other):
+        if type(other) is Complexo:
+            return abs(self.a - other.a) < 1e-9 and abs(self.b - other.b) < 1e-9
         try:
             other = Complexo._cast(other) if not isinstance(other, Complexo) else other
             return abs(self.a - other.a) < 1e-9 and abs(self.b - other.b) < 1e-9
         except TypeError:
             return NotImplemented
+
+    def chave(self):
+        """Partes arredondadas a 9 casas (célula de uma grade de 1e-9):
+        chave canônica para hash e tabelas. A igualdade continua sendo por
+        tolerância; só a chave usa a grade."""
+        return round(self.a, 9), round(self.b, 9)
+
+    # hash da chave: valores iguais na mesma célula têm o mesmo hash e
+    # reais puros têm o mesmo hash do float/int. A igualdade por tolerância
+    # não é transitiva, então valores iguais em lados opostos da borda de
+    # uma célula ainda podem ter hashes distintos; nenhum hash não
+    # constante consegue evitar isso.
+    def __hash__(self):
+        a, b = self.chave()
+        if b == 0:
+            return hash(a)
+        return hash((a, b))
+
+
+# escrita direta nos slots (ignora o __setattr__ que bloqueia alterações)
+_set_a = Complexo.a.__set__
+_set_b = Complexo.b.__set__
+_criar = object.__new__
+_finito = math.isfinite
+
+
+def _novo(a, b):
+    """Cria Complexo a partir de dois floats, sem conversões nem checagens."""
+    z = _criar(Complexo)
+    _set_a(z, a)
+    _set_b(z, b)
+    return z
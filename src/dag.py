@@ -0,0 +1,165 @@
+# dag.py
+# ============================================================
+# Hash-consing da AST: subárvores estruturalmente idênticas passam a
+# ser o mesmo objeto, transformando a árvore em um DAG. Como os nós
+# são imutáveis, o compartilhamento é seguro; lisp/arvore continuam
+# imprimindo a forma de árvore, pois apenas percorrem os filhos.
+# eval_dag avalia cada nó compartilhado uma única vez por chamada.
+# ============================================================
+
+from parser import NumberNode, VariableNode, UnaryOpNode, BinaryOpNode, SeriesNode
+from complexos import Complexo
+from executor import OPERADORES_UNARIOS, OPERADORES_BINARIOS, funcao_serie
+
+
+class TabelaNos:
+    """Tabela de nós únicos. Pode ser reaproveitada entre várias ASTs,
+    compartilhando subexpressões também entre expressões diferentes."""
+
+    def __init__(self):
+        self._nos = {}
+        self.visitados = 0       # nós da forma de árvore já processados
+        self.reutilizados = 0    # quantos deles viraram referência a um nó existente
+
+    def __len__(self):
+        return len(self._nos)
+
+    def _chave(self, node):
+        if isinstance(node, NumberNode):
+            v = node.value
+            if isinstance(v, Complexo):
+                # hex distingue 0.0 de -0.0, que imprimem diferente
+                return ("N", v.a.hex(), v.b.hex())
+            return ("N", type(v), v)
+        if isinstance(node, VariableNode):
+            return ("V", node.name)
+        if isinstance(node, UnaryOpNode):
+            return ("U", node.op, id(node.child))
+        if isinstance(node, BinaryOpNode):
+            return ("B", node.op, id(node.left), id(node.right))
+        if isinstance(node, SeriesNode):
+            return ("S", node.op, node.index, id(node.body), id(node.start), id(node.end))
+        raise TypeError("Nó AST desconhecido")
+
+    def internar(self, node):
+        """Retorna o nó único equivalente a `node` (filhos já internados).
+        Percorre a árvore em pós-ordem com uma pilha explícita, como
+        executor._avaliar: a pilha guarda nós a expandir e pares (nó,
+        número de filhos) a remontar com os últimos filhos internados."""
+        pilha = [node]
+        feitos = []
+        while pilha:
+            node = pilha.pop()
+            if type(node) is tuple:
+                node, n = node
+                filhos = feitos[-n:]
+                del feitos[-n:]
+                if isinstance(node, UnaryOpNode):
+                    (child,) = filhos
+                    if child is not node.child:
+                        node = UnaryOpNode(node.op, child)
+                elif isinstance(node, BinaryOpNode):
+                    left, right = filhos
+                    if left is not node.left or right is not node.right:
+                        node = BinaryOpNode(node.op, left, right)
+                else:
+                    body, start, end = filhos
+                    if body is not node.body or start is not node.start or end is not node.end:
+                        node = SeriesNode(node.op, body, node.index, start, end)
+                feitos.append(self._unico(node))
+            elif node is None:
+                feitos.append(None)
+            elif isinstance(node, UnaryOpNode):
+                pilha.append((node, 1))
+                pilha.append(node.child)
+            elif isinstance(node, BinaryOpNode):
+                pilha.append((node, 2))
+                pilha.append(node.right)
+                pilha.append(node.left)
+            elif isinstance(node, SeriesNode):
+                pilha.append((node, 3))
+                pilha.append(node.end)
+                pilha.append(node.start)
+                pilha.append(node.body)
+            else:
+                feitos.append(self._unico(node))
+        return feitos[-1]
+
+    def _unico(self, node):
+        # o nó já guardado com a mesma chave, ou `node`, que passa a sê-lo
+        self.visitados += 1
+        chave = self._chave(node)
+        existente = self._nos.get(chave)
+        if existente is not None:
+            self.reutilizados += 1
+            return existente
+        self._nos[chave] = node
+        return node
+
+    def relatorio(self):
+        return {
+            "nos_arvore": self.visitados,
+            "nos_unicos": len(self._nos),
+            "compartilhados": self.reutilizados,
+        }
+
+
+def para_dag(ast, tabela=None):
+    """Converte a AST em DAG. Retorna (dag, relatorio)."""
+    if tabela is None:
+        tabela = TabelaNos()
+    dag = tabela.internar(ast)
+    return dag, tabela.relatorio()
+
+
+def eval_dag(node, vars_dict, _memo=None):
+    """Como eval_node, mas calcula cada nó compartilhado só uma vez. A
+    travessia usa uma pilha explícita (ver executor._avaliar), então a
+    profundidade do DAG não é limitada pela recursão do Python."""
+    if _memo is None:
+        _memo = {}
+    pilha = [node]
+    valores = []
+    while pilha:
+        node = pilha.pop()
+        if type(node) is tuple:
+            # (nó, aridade): aplica o operador aos últimos valores
+            node, aridade = node
+            if aridade == 1:
+                fn = OPERADORES_UNARIOS.get(node.op)
+                if fn is None:
+                    raise ValueError(f"Operador unário desconhecido: {node.op}")
+                res = fn(valores[-1])
+            else:
+                right = valores.pop()
+                if isinstance(node, SeriesNode):
+                    res = funcao_serie(node, vars_dict)(valores[-1], right)
+                else:
+                    fn = OPERADORES_BINARIOS.get(node.op)
+                    if fn is None:
+                        raise ValueError(f"Operador binário desconhecido: {node.op}")
+                    res = fn(valores[-1], right)
+            valores[-1] = _memo[id(node)] = res
+        elif id(node) in _memo:
+            valores.append(_memo[id(node)])
+        elif isinstance(node, NumberNode):
+            valores.append(node.value)
+        elif isinstance(node, VariableNode):
+            if node.name not in vars_dict:
+                raise NameError(f"Valor para variável '{node.name}' não fornecido")
+            valores.append(vars_dict[node.name])
+        elif isinstance(node, UnaryOpNode):
+            pilha.append((node, 1))
+            pilha.append(node.child)
+        elif isinstance(node, BinaryOpNode):
+            pilha.append((node, 2))
+            pilha.append(node.right)
+            pilha.append(node.left)
+        elif isinstance(node, SeriesNode):
+            # o termo depende do índice: só os limites usam a memória
+            pilha.append((node, 2))
+            pilha.append(node.end)
+            pilha.append(node.start)
+        else:
+            raise TypeError("Nó AST desconhecido")
+    return valores[-1]
@@ -4,15 +4,28 @@
 # pede valores, avalia AST e imprime árvore (LISP e visual).
 # ============================================================
 
-from parser import Parser, NumberNode, VariableNode, UnaryOpNode, BinaryOpNode
+import io
+import json
+import operator
+
+import instrumentacao
+from parser import Parser, NumberNode, VariableNode, UnaryOpNode, BinaryOpNode, SeriesNode
 from complexos import Complexo, ErroMatematico
-from arvore import lisp, arvore
+from arvore import lisp, arvore, LIMITE_PROFUNDIDADE, LIMITE_NOS
+from recursos import LimiteExcedido, ESTOUROS
 
 # ------------------ utilitário: parse de entrada complexa ------------------
-def parse_complex_input(s: str) -> Complexo:
-    """Converte texto do usuário para Complexo.
+def parse_complex_input(s: str, backend=None):
+    """Converte texto do usuário para Complexo (ou para o valor do
+    `backend` numérico; ver backends).
     Formatos aceitos: 'a+bi', 'a-bi', 'bi', 'a', '+i', '-i', '3.2+4.1i', etc.
     """
+    valor = _ler_complexo(s)
+    if backend is None:
+        return valor
+    return backend.numero(valor.a, valor.b)
+
+def _ler_complexo(s: str) -> Complexo:
     s = s.strip().replace(" ", "")
     if s == "":
         raise ValueError("Entrada vazia")
@@ -52,61 +65,287 @@ def parse_complex_input(s: str) -> Complexo:
 # ------------------ coletar variáveis ------------------
 def coletar_variaveis(node, conjunto):
     """Popula 'conjunto' com nomes de variáveis presentes na AST."""
-    if node is None:
+    if instrumentacao.ATIVA is not None:
+        with instrumentacao.ATIVA.etapa("coletar_variaveis"):
+            _coletar(node, conjunto)
         return
-    if isinstance(node, VariableNode):
-        conjunto.add(node.name)
-    elif isinstance(node, UnaryOpNode):
-        coletar_variaveis(node.child, conjunto)
-    elif isinstance(node, BinaryOpNode):
-        coletar_variaveis(node.left, conjunto)
-        coletar_variaveis(node.right, conjunto)
+    _coletar(node, conjunto)
+
+def _coletar(node, conjunto):
+    pilha = [node]
+    while pilha:
+        node = pilha.pop()
+        if isinstance(node, VariableNode):
+            conjunto.add(node.name)
+        elif isinstance(node, UnaryOpNode):
+            pilha.append(node.child)
+        elif isinstance(node, BinaryOpNode):
+            pilha.append(node.right)
+            pilha.append(node.left)
+        elif isinstance(node, SeriesNode):
+            # o índice é ligado pela soma/produto: só conta se aparecer nos limites
+            internas = set()
+            _coletar(node.body, internas)
+            internas.discard(node.index)
+            conjunto.update(internas)
+            pilha.append(node.end)
+            pilha.append(node.start)
+
+# ------------------ tabelas de operadores ------------------
+def _identidade(val):
+    return val
+
+def _negar(val):
+    return Complexo(-val.a, -val.b)
+
+def _conjugar(val):
+    return val.conjugado()
+
+def _potencia(left, right):
+    if right.b == 0 and float(right.a).is_integer():
+        return left ** int(right.a)
+    return left ** right
+
+def _raiz(left, right):
+    # ordem inteira: caminho rápido de Complexo.raiz
+    if right.b == 0 and right.a != 0 and float(right.a).is_integer():
+        return left.raiz(int(right.a))
+    # raiz(base, ordem) -> base ** (1/ordem)
+    one = Complexo(1.0, 0.0)
+    return left ** (one / right)
+
+OPERADORES_UNARIOS = {
+    "u+": _identidade,
+    "+": _identidade,
+    "u-": _negar,
+    "-": _negar,
+    "conj": _conjugar,
+}
+
+OPERADORES_BINARIOS = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": operator.truediv,
+    "**": _potencia,
+    "raiz": _raiz,
+    "=": operator.eq,
+}
 
 # ------------------ avaliador ------------------
-def eval_node(node, vars_dict):
-    """Avalia a AST recursivamente retornando Complexo ou bool (para '=')"""
-    if isinstance(node, NumberNode):
-        return node.value
-    if isinstance(node, VariableNode):
-        if node.name not in vars_dict:
-            raise NameError(f"Valor para variável '{node.name}' não fornecido")
-        return vars_dict[node.name]
-    if isinstance(node, UnaryOpNode):
-        val = eval_node(node.child, vars_dict)
-        if node.op in ("u+", "+"):
-            return val
-        if node.op in ("u-", "-"):
-            return Complexo(-val.a, -val.b)
-        if node.op == "conj":
-            return val.conjugado()
-        raise ValueError(f"Operador unário desconhecido: {node.op}")
-    if isinstance(node, BinaryOpNode):
-        left = eval_node(node.left, vars_dict)
-        right = eval_node(node.right, vars_dict)
-        op = node.op
-        if op == "+":
-            return left + right
-        if op == "-":
-            return left - right
-        if op == "*":
-            return left * right
-        if op == "/":
-            return left / right
-        if op == "**":
-            if right.b == 0 and float(right.a).is_integer():
-                return left ** int(right.a)
-            return left ** right
-        if op == "raiz":
-            # raiz(base, ordem) -> base ** (1/ordem)
-            one = Complexo(1.0, 0.0)
-            return left ** (one / right)
-        if op == "=":
-            return left == right
-        raise ValueError(f"Operador binário desconhecido: {op}")
-    raise TypeError("Nó AST desconhecido")
+def _operador_desconhecido(tipo, op):
+    def falhar(*valores):
+        raise ValueError(f"Operador {tipo} desconhecido: {op}")
+    return falhar
+
+def funcao_serie(node, vars_dict, backend=None, orcamento=None):
+    """fn(inicio, fim) que avalia o SeriesNode `node` com `vars_dict`,
+    recebendo os limites já avaliados (ver somatorio)."""
+    from somatorio import avaliar_serie
+
+    def serie(inicio, fim):
+        return avaliar_serie(node, vars_dict, inicio, fim, backend, orcamento)
+    return serie
+
+def eval_node(node, vars_dict, backend=None, limites=None):
+    """Avalia a AST retornando Complexo ou bool (para '=').
+
+    Com `backend` (ver backends), as constantes e os valores das variáveis
+    são convertidos para ele e as operações são as dele.
+
+    Com `limites` (recursos.Limites), a avaliação lança LimiteExcedido ao
+    passar do limite de operações, de tempo ou de magnitude.
+    """
+    orcamento = None if limites is None else limites.orcamento()
+    inst = instrumentacao.ATIVA
+    try:
+        if inst is None:
+            return _avaliar(node, vars_dict, None, backend, orcamento)
+        inst.contar("avaliacoes")
+        try:
+            with inst.etapa("eval_node"):
+                return _avaliar(node, vars_dict, inst.operadores, backend, orcamento)
+        except ErroMatematico:
+            inst.contar("erros_matematicos")
+            raise
+    except ESTOUROS as e:
+        if orcamento is None:
+            raise
+        raise orcamento.estouro() from e
+
+def _avaliar(node, vars_dict, contagem, backend=None, orcamento=None):
+    """Percorre a árvore em pós-ordem com uma pilha explícita: a pilha
+    guarda nós a expandir e triplas (função, aridade, operador) a aplicar
+    sobre os últimos valores calculados. Assim a profundidade da AST não
+    é limitada pela recursão do Python. Se `contagem` não for None, soma
+    nela quantas vezes cada operador foi aplicado; se `orcamento` não for
+    None (recursos.Orcamento), cada operação é descontada dele.
+    """
+    if backend is None:
+        unarios, binarios, converter = OPERADORES_UNARIOS, OPERADORES_BINARIOS, None
+    else:
+        unarios, binarios, converter = backend.unarios, backend.binarios, backend.converter
+    pilha = [node]
+    valores = []
+    while pilha:
+        node = pilha.pop()
+        if type(node) is tuple:
+            fn, aridade, op = node
+            if aridade == 1:
+                valores[-1] = fn(valores[-1])
+            else:
+                right = valores.pop()
+                valores[-1] = fn(valores[-1], right)
+            if contagem is not None:
+                contagem[op] = contagem.get(op, 0) + 1
+            if orcamento is not None:
+                orcamento.passo(valores[-1])
+        elif isinstance(node, NumberNode):
+            valores.append(node.value if converter is None else converter(node.value))
+        elif isinstance(node, VariableNode):
+            if node.name not in vars_dict:
+                raise NameError(f"Valor para variável '{node.name}' não fornecido")
+            valor = vars_dict[node.name]
+            valores.append(valor if converter is None else converter(valor))
+        elif isinstance(node, UnaryOpNode):
+            fn = unarios.get(node.op)
+            if fn is None:
+                fn = _operador_desconhecido("unário", node.op)
+            pilha.append((fn, 1, node.op))
+            pilha.append(node.child)
+        elif isinstance(node, BinaryOpNode):
+            fn = binarios.get(node.op)
+            if fn is None:
+                fn = _operador_desconhecido("binário", node.op)
+            pilha.append((fn, 2, node.op))
+            pilha.append(node.right)
+            pilha.append(node.left)
+        elif isinstance(node, SeriesNode):
+            # os limites entram na pilha; o termo é avaliado por somatorio
+            pilha.append((funcao_serie(node, vars_dict, backend, orcamento), 2, node.op))
+            pilha.append(node.end)
+            pilha.append(node.start)
+        else:
+            raise TypeError("Nó AST desconhecido")
+    return valores[-1]
+
+# ------------------ modo em lote (JSON Lines) ------------------
+def _mensagem_erro(e):
+    msg = str(e)
+    if not isinstance(e, ErroMatematico) and "division by zero" in msg.lower():
+        return "divisão por zero"
+    return msg
+
+def _valor_json(res):
+    # '=' produz bool; números vão no mesmo formato impresso pelo loop interativo
+    if isinstance(res, bool):
+        return res
+    return str(res)
+
+def avaliar_registro(registro, parser, com_lisp=False, com_arvore=False, limites=None):
+    """Avalia um registro {"expr": "...", "vars": {"x": "1+2i"}}.
+
+    Retorna o registro de saída com "resultado" ou "erro"; o campo "id",
+    se presente, é repetido na saída. Nunca lança exceção. Os `limites`
+    (recursos.Limites) valem para a avaliação; os do parse são os do
+    `parser`. Um limite excedido aparece como erro, com o nome dele em
+    "limite".
+    """
+    saida = {}
+    try:
+        expr, valores = _validar_registro(registro, saida)
+        ast = parser.parse(expr)
+        _incluir_arvores(ast, saida, com_lisp, com_arvore)
+        vars_set = set()
+        coletar_variaveis(ast, vars_set)
+        vars_dict = _valores_variaveis(vars_set, valores)
+        saida["resultado"] = _valor_json(eval_node(ast, vars_dict, limites=limites))
+    except Exception as e:
+        _registrar_erro(saida, e)
+    return saida
+
+def _validar_registro(registro, saida):
+    """Confere o formato do registro e copia id/expr para `saida`.
+    Retorna (expr, valores das variáveis)."""
+    if not isinstance(registro, dict) or not isinstance(registro.get("expr"), str):
+        raise ValueError("Registro deve ser um objeto com o campo 'expr' (texto)")
+    if "id" in registro:
+        saida["id"] = registro["id"]
+    saida["expr"] = registro["expr"]
+    valores = registro.get("vars") or {}
+    if not isinstance(valores, dict):
+        raise ValueError("Campo 'vars' deve ser um objeto")
+    return registro["expr"], valores
+
+def _incluir_arvores(ast, saida, com_lisp, com_arvore):
+    if com_lisp:
+        saida["lisp"] = lisp(ast)
+    if com_arvore:
+        buf = io.StringIO()
+        arvore(ast, saida=buf)
+        saida["arvore"] = buf.getvalue()
+
+def _valores_variaveis(vars_set, valores):
+    """Converte os valores (texto) das variáveis usadas na expressão."""
+    vars_dict = {}
+    for var in sorted(vars_set):
+        if var in valores:
+            vars_dict[var] = parse_complex_input(str(valores[var]))
+    return vars_dict
+
+def _registrar_erro(saida, e):
+    saida["erro"] = _mensagem_erro(e)
+    saida["tipo_erro"] = type(e).__name__
+    if isinstance(e, LimiteExcedido):
+        saida["limite"] = e.limite
+
+def processar_linha(numero, linha, parser, com_lisp=False, com_arvore=False, limites=None):
+    """Converte uma linha JSON da entrada no registro de resultado (None se em branco)."""
+    if not linha.strip():
+        return None
+    try:
+        registro = json.loads(linha)
+    except ValueError as e:
+        resultado = {"erro": f"JSON inválido: {e}", "tipo_erro": "JSONDecodeError"}
+    else:
+        resultado = avaliar_registro(registro, parser, com_lisp, com_arvore, limites)
+    return {"linha": numero, **resultado}
+
+def executar_lote(entrada, saida, com_lisp=False, com_arvore=False, parser=None,
+                  limites=None):
+    """Lê registros JSON (um por linha) de `entrada` e escreve um resultado
+    por linha em `saida`, à medida que avalia. Linhas em branco são ignoradas.
+
+    A memória não cresce com o tamanho da entrada: cada linha é descartada
+    após a escrita, e o cache de ASTs é limitado. Com `limites`
+    (recursos.Limites), uma expressão que passa de um limite vira um
+    registro de erro e o lote continua. Retorna (total, erros).
+    """
+    from cache import CacheParse
+
+    if parser is None and limites is not None:
+        parser = Parser(limites=limites)
+    cache = CacheParse(parser=parser)
+    total = erros = 0
+    for numero, linha in enumerate(entrada, start=1):
+        resultado = processar_linha(numero, linha, cache, com_lisp, com_arvore, limites)
+        if resultado is None:
+            continue
+        total += 1
+        if "erro" in resultado:
+            erros += 1
+        saida.write(json.dumps(resultado, ensure_ascii=False) + "\n")
+        saida.flush()
+    return total, erros
 
 # ------------------ loop principal ------------------
-if __name__ == "__main__":
+def repl(otimizar_ast=False):
+    """Loop interativo. Com `otimizar_ast` (opção --otimizar), a árvore
+    otimizada (ver otimizador) também é mostrada e é ela que é avaliada;
+    os valores pedidos continuam sendo os das variáveis da expressão
+    digitada."""
+    from otimizador import otimizar
+
     p = Parser()
     try:
         while True:
@@ -119,16 +358,25 @@ if __name__ == "__main__":
                 # parse
                 ast = p.parse(expr)
 
-                # imprimir LISP
+                # imprimir LISP (árvores enormes são resumidas com "...")
                 print("\nÁrvore (LISP):")
-                print(lisp(ast))
+                print(lisp(ast, LIMITE_PROFUNDIDADE, LIMITE_NOS))
 
                 # imprimir visual
                 print("\nÁrvore (visual):")
-                arvore(ast)
+                arvore(ast, max_profundidade=LIMITE_PROFUNDIDADE, max_nos=LIMITE_NOS)
 
                 vars_set = set()
                 coletar_variaveis(ast, vars_set)
+
+                # dobra de constantes / identidades antes de avaliar
+                if otimizar_ast:
+                    otimizada = otimizar(ast)
+                    if otimizada is not ast:
+                        print("\nÁrvore otimizada (LISP):")
+                        print(lisp(otimizada, LIMITE_PROFUNDIDADE, LIMITE_NOS))
+                    ast = otimizada
+
                 vars_dict = {}
                 for var in sorted(vars_set):
                     while True:
@@ -153,3 +401,81 @@ if __name__ == "__main__":
                     print("Erro:", msg)
     except KeyboardInterrupt:
         print("\nEncerrando.")
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    ap = argparse.ArgumentParser(description="Calculadora de números complexos")
+    ap.add_argument("--lote", nargs="?", const="-", metavar="ARQUIVO",
+                    help="modo em lote: lê JSON Lines do arquivo (ou da entrada padrão)")
+    ap.add_argument("--saida", metavar="ARQUIVO", help="arquivo de resultados do modo em lote (padrão: saída padrão)")
+    ap.add_argument("--lisp", action="store_true", help="inclui a árvore em notação LISP em cada resultado")
+    ap.add_argument("--arvore", action="store_true", help="inclui a árvore visual em cada resultado")
+    ap.add_argument("--processos", type=int, metavar="N",
+                    help="modo em lote com N processos trabalhadores (saída na ordem da entrada)")
+    ap.add_argument("--bloco", type=int, default=1000, metavar="LINHAS",
+                    help="linhas por bloco enviado a cada processo (padrão: 1000)")
+    ap.add_argument("--servidor", metavar="ENDERECO",
+                    help='atende pedidos JSON em "host:porta" ou "unix:caminho" (ver servidor.py)')
+    ap.add_argument("--resolver", metavar="EQUACAO",
+                    help='procura as raízes de uma equação em uma variável, ex.: "x**3 - 2x = 1i"')
+    ap.add_argument("--metricas", metavar="ARQUIVO",
+                    help="grava em JSON o tempo por etapa e os contadores do modo em lote")
+    ap.add_argument("--otimizar", action="store_true",
+                    help="no modo interativo, mostra e avalia a árvore otimizada (dobra de constantes)")
+    ap.add_argument("--limites", metavar="NOME=VALOR,...",
+                    help='limites por expressão nos modos em lote e servidor, ex.: '
+                         '"tokens=10000,nos=5000,profundidade=500,operacoes=1000000,tempo=0.5"')
+    args = ap.parse_args()
+    if args.metricas and args.processos is not None:
+        ap.error("--metricas não pode ser usado com --processos")
+    limites = None
+    if args.limites is not None:
+        from recursos import Limites
+
+        try:
+            limites = Limites.de_texto(args.limites)
+        except ValueError as e:
+            ap.error(str(e))
+
+    if args.resolver is not None:
+        from resolvedor import resolver
+
+        try:
+            raizes, estatisticas = resolver(Parser().parse(args.resolver))
+        except Exception as e:
+            print("Erro:", _mensagem_erro(e), file=sys.stderr)
+            sys.exit(1)
+        for raiz in raizes:
+            print(raiz)
+        print(json.dumps(estatisticas, ensure_ascii=False), file=sys.stderr)
+    elif args.servidor is not None:
+        from servidor import servir
+
+        servir(args.servidor, processos=args.processos, limites=limites)
+    elif args.lote is None:
+        repl(otimizar_ast=args.otimizar)
+    else:
+        entrada = sys.stdin if args.lote == "-" else open(args.lote, encoding="utf-8")
+        saida = sys.stdout if args.saida is None else open(args.saida, "w", encoding="utf-8")
+        try:
+            if args.metricas:
+                with instrumentacao.instrumentar() as inst:
+                    executar_lote(entrada, saida, com_lisp=args.lisp, com_arvore=args.arvore,
+                                  limites=limites)
+                with open(args.metricas, "w", encoding="utf-8") as f:
+                    f.write(inst.para_json(indent=2))
+            elif args.processos is None:
+                executar_lote(entrada, saida, com_lisp=args.lisp, com_arvore=args.arvore,
+                              limites=limites)
+            else:
+                from paralelo import executar_lote_paralelo
+
+                executar_lote_paralelo(entrada, saida, processos=args.processos, bloco=args.bloco,
+                                       com_lisp=args.lisp, com_arvore=args.arvore, limites=limites)
+        finally:
+            if entrada is not sys.stdin:
+                entrada.close()
+            if saida is not sys.stdout:
+                saida.close()
@@ -0,0 +1,143 @@
+# grade.py
+# ============================================================
+# Avaliação de f(z) em uma grade retangular do plano complexo, em
+# blocos (ladrilhos) de tamanho fixo, com a saída em arquivos .npy
+# mapeados em memória:
+#   real.npy, imag.npy, modulo.npy (float64) e erros.npy (bool)
+# A linha 0 é a de maior parte imaginária e a coluna 0 a de menor
+# parte real, como em uma imagem do plano. Cada ladrilho é avaliado
+# de uma vez por vetorizado.avaliar_vetorizado; só um ladrilho e uma
+# faixa de linhas mapeada ficam em memória, então o pico não depende
+# do tamanho da grade.
+#
+# Uso:
+#   python src/grade.py "(z**3 - 1)/(z - 1i)" --limites -2 2 -2 2 \
+#       --resolucao 10000 10000 --destino saida/
+# ============================================================
+
+import os
+import time
+from collections import namedtuple
+
+try:
+    import numpy as np
+except ImportError:  # numpy é opcional para o resto da calculadora
+    np = None
+
+from executor import coletar_variaveis
+from vetorizado import avaliar_vetorizado
+
+# caminhos: nome -> arquivo .npy; estatisticas: dict
+ResultadoGrade = namedtuple("ResultadoGrade", ["caminhos", "estatisticas"])
+
+SAIDAS = (("real", "float64"), ("imag", "float64"), ("modulo", "float64"), ("erros", "bool"))
+
+
+def _eixo(inicio, fim, n):
+    # n pontos igualmente espaçados de inicio a fim (inclusive)
+    if n == 1:
+        return lambda k: np.full(np.shape(k), float(inicio))
+    passo = (fim - inicio) / (n - 1)
+    return lambda k: inicio + passo * k
+
+
+def avaliar_grade(ast, limites, resolucao, destino, variavel=None, valores=None, bloco=256):
+    """Avalia `ast` em todos os pontos da grade e grava os .npy em `destino`.
+
+    `limites` = (re_min, re_max, im_min, im_max); `resolucao` = (largura,
+    altura) em pontos. `variavel` é a coordenada z (pode ser omitida se a
+    expressão só tiver uma variável sem valor em `valores`). Os ladrilhos
+    têm `bloco` x `bloco` pontos.
+
+    Retorna ResultadoGrade(caminhos, estatisticas).
+    """
+    if np is None:
+        raise ImportError("A avaliação em grade requer o pacote numpy")
+    re_min, re_max, im_min, im_max = (float(v) for v in limites)
+    largura, altura = (int(v) for v in resolucao)
+    if largura < 1 or altura < 1:
+        raise ValueError("A resolução deve ser de pelo menos 1 x 1 ponto")
+    if bloco < 1:
+        raise ValueError("O tamanho do bloco deve ser pelo menos 1")
+
+    valores = dict(valores or {})
+    if variavel is None:
+        nomes = set()
+        coletar_variaveis(ast, nomes)
+        livres = nomes - set(valores)
+        if len(livres) > 1:
+            raise ValueError("Informe a variável da grade: a expressão tem "
+                             f"{len(livres)} variáveis sem valor")
+        variavel = livres.pop() if livres else "z"
+    fixos = {n: v for n, v in valores.items() if n != variavel}
+
+    os.makedirs(destino, exist_ok=True)
+    caminhos = {nome: os.path.join(destino, f"{nome}.npy") for nome, _ in SAIDAS}
+    for nome, tipo in SAIDAS:
+        arquivo = np.lib.format.open_memmap(caminhos[nome], mode="w+", dtype=tipo,
+                                            shape=(altura, largura))
+        del arquivo
+
+    eixo_re = _eixo(re_min, re_max, largura)
+    eixo_im = _eixo(im_max, im_min, altura)   # linha 0 = maior parte imaginária
+    inicio = time.perf_counter()
+    erros = blocos = 0
+    for i0 in range(0, altura, bloco):
+        i1 = min(i0 + bloco, altura)
+        # uma faixa de linhas mapeada por vez: as páginas gravadas vão para o
+        # disco e são liberadas antes da próxima faixa
+        faixa = {nome: np.load(caminhos[nome], mmap_mode="r+") for nome, _ in SAIDAS}
+        im = eixo_im(np.arange(i0, i1))[:, None]
+        for j0 in range(0, largura, bloco):
+            j1 = min(j0 + bloco, largura)
+            z = eixo_re(np.arange(j0, j1))[None, :] + 1j * im
+            valores_bloco, erros_bloco = avaliar_vetorizado(ast, {**fixos, variavel: z})
+            valores_bloco = np.broadcast_to(valores_bloco, z.shape).astype(np.complex128, copy=False)
+            erros_bloco = np.broadcast_to(erros_bloco, z.shape)
+            faixa["real"][i0:i1, j0:j1] = valores_bloco.real
+            faixa["imag"][i0:i1, j0:j1] = valores_bloco.imag
+            faixa["modulo"][i0:i1, j0:j1] = np.abs(valores_bloco)
+            faixa["erros"][i0:i1, j0:j1] = erros_bloco
+            erros += int(erros_bloco.sum())
+            blocos += 1
+        for nome in faixa:
+            faixa[nome].flush()
+        del faixa
+
+    return ResultadoGrade(caminhos, {
+        "variavel": variavel,
+        "pontos": largura * altura,
+        "erros": erros,
+        "blocos": blocos,
+        "segundos": time.perf_counter() - inicio,
+    })
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    import sys
+
+    from parser import Parser
+    from executor import parse_complex_input
+
+    ap = argparse.ArgumentParser(description="Avalia f(z) em uma grade do plano complexo")
+    ap.add_argument("expressao")
+    ap.add_argument("--limites", nargs=4, type=float, required=True,
+                    metavar=("RE_MIN", "RE_MAX", "IM_MIN", "IM_MAX"))
+    ap.add_argument("--resolucao", nargs=2, type=int, required=True, metavar=("LARGURA", "ALTURA"))
+    ap.add_argument("--destino", required=True, metavar="DIRETORIO")
+    ap.add_argument("--variavel", help="variável da grade (padrão: a única sem valor)")
+    ap.add_argument("--valor", action="append", default=[], metavar="NOME=VALOR",
+                    help="valor fixo de outra variável, ex.: c=0.3+0.5i (pode repetir)")
+    ap.add_argument("--bloco", type=int, default=256, metavar="PONTOS")
+    args = ap.parse_args()
+
+    fixos = {}
+    for item in args.valor:
+        nome, _, texto = item.partition("=")
+        fixos[nome.strip()] = parse_complex_input(texto)
+    _, estatisticas = avaliar_grade(Parser().parse(args.expressao), args.limites, args.resolucao,
+                                    args.destino, variavel=args.variavel, valores=fixos,
+                                    bloco=args.bloco)
+    print(json.dumps(estatisticas, ensure_ascii=False), file=sys.stderr)
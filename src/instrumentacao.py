@@ -0,0 +1,97 @@
+# instrumentacao.py
+# ============================================================
+# Medição opcional das etapas do pipeline: tokenize, parse,
+# coletar_variaveis, eval_node, lisp e arvore.
+#
+# Registra tempo por etapa, número de tokens e de nós, quantas vezes
+# cada operador foi avaliado e a taxa de ErroMatematico. Quando nenhuma
+# instrumentação está ativa, cada etapa só testa `ATIVA is None`.
+#
+# Uso:
+#     with instrumentar() as inst:
+#         ...  # parse / eval_node / lisp ...
+#     print(inst.para_json())
+# ============================================================
+
+import json
+from contextlib import contextmanager
+from time import perf_counter
+
+# instrumentação corrente (None = desligada); lida pelas etapas
+ATIVA = None
+
+
+class Instrumentacao:
+    """Registro das medições. `callback(etapa, segundos)`, se fornecido,
+    é chamado ao fim de cada etapa medida."""
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.etapas = {}        # etapa -> {"chamadas": n, "segundos": total}
+        self.contadores = {}    # ex.: tokens, nos, avaliacoes, erros_matematicos
+        self.operadores = {}    # operador -> vezes avaliado
+
+    def registrar_etapa(self, etapa, segundos):
+        dados = self.etapas.get(etapa)
+        if dados is None:
+            dados = self.etapas[etapa] = {"chamadas": 0, "segundos": 0.0}
+        dados["chamadas"] += 1
+        dados["segundos"] += segundos
+        if self.callback is not None:
+            self.callback(etapa, segundos)
+
+    @contextmanager
+    def etapa(self, nome):
+        """Mede o bloco como uma chamada da etapa `nome` (mesmo se lançar erro)."""
+        inicio = perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar_etapa(nome, perf_counter() - inicio)
+
+    def contar(self, nome, n=1):
+        self.contadores[nome] = self.contadores.get(nome, 0) + n
+
+    def resumo(self):
+        avaliacoes = self.contadores.get("avaliacoes", 0)
+        erros = self.contadores.get("erros_matematicos", 0)
+        return {
+            "etapas": {k: dict(v) for k, v in self.etapas.items()},
+            "contadores": dict(self.contadores),
+            "operadores": dict(self.operadores),
+            "taxa_erro_matematico": erros / avaliacoes if avaliacoes else 0.0,
+        }
+
+    def para_json(self, **kwargs):
+        return json.dumps(self.resumo(), ensure_ascii=False, **kwargs)
+
+    def limpar(self):
+        self.etapas.clear()
+        self.contadores.clear()
+        self.operadores.clear()
+
+
+def ativar(inst=None):
+    """Liga a instrumentação (cria uma nova se `inst` for None) e a retorna."""
+    global ATIVA
+    ATIVA = inst if inst is not None else Instrumentacao()
+    return ATIVA
+
+
+def desativar():
+    global ATIVA
+    ATIVA = None
+
+
+@contextmanager
+def instrumentar(inst=None, callback=None):
+    """Ativa a instrumentação dentro do bloco, restaurando a anterior ao sair."""
+    global ATIVA
+    anterior = ATIVA
+    if inst is None:
+        inst = Instrumentacao(callback=callback)
+    ATIVA = inst
+    try:
+        yield inst
+    finally:
+        ATIVA = anterior
@@ -0,0 +1,145 @@
+# otimizador.py
+# ============================================================
+# Passo de otimização entre Parser.parse e a avaliação:
+#   - dobra de constantes: subárvores só com NumberNode viram um nó;
+#   - identidades seguras: x*1, 1*x, x/1, x+0, 0+x, x-0, x**1,
+#     +x, -(-x) e conj(conj(x)) viram x;
+#   - soma/produto com limites constantes e termo que só usa o índice
+#     viram o valor calculado.
+# Nenhuma operação que lançaria erro é removida: se a dobra de uma
+# constante falha (ex.: 1/0), o nó fica como está e o erro aparece
+# na avaliação. Pelo mesmo motivo 0*x não vira 0 (esconderia um
+# NameError ou uma divisão por zero dentro de x).
+# ============================================================
+
+from parser import NumberNode, VariableNode, UnaryOpNode, BinaryOpNode, SeriesNode
+from complexos import Complexo
+from executor import OPERADORES_UNARIOS, OPERADORES_BINARIOS, coletar_variaveis, funcao_serie
+
+
+def _constante(node, a, b=0.0):
+    """True se `node` é um NumberNode com valor exatamente a+bi."""
+    if not isinstance(node, NumberNode) or not isinstance(node.value, Complexo):
+        return False
+    return node.value.a == a and node.value.b == b
+
+
+def _numerico(node):
+    # '=' produz bool; as identidades só valem para valores Complexo
+    return not (isinstance(node, BinaryOpNode) and node.op == "=")
+
+
+def _dobrar(fn, *valores):
+    """Aplica fn às constantes; None se falhar ou não produzir Complexo."""
+    if not all(isinstance(v, Complexo) for v in valores):
+        return None
+    try:
+        res = fn(*valores)
+    except Exception:
+        return None
+    return NumberNode(res) if isinstance(res, Complexo) else None
+
+
+def otimizar(node):
+    """Retorna uma AST equivalente, com constantes dobradas e identidades aplicadas.
+
+    A AST original não é alterada; subárvores sem mudança são reaproveitadas.
+    A árvore é percorrida em pós-ordem com uma pilha explícita (como em
+    executor._avaliar): a pilha guarda nós a visitar e pares (nó, número
+    de filhos) a reescrever com os últimos filhos já otimizados.
+    """
+    pilha = [node]
+    feitos = []
+    while pilha:
+        node = pilha.pop()
+        if type(node) is tuple:
+            node, n = node
+            filhos = feitos[-n:]
+            del feitos[-n:]
+            if isinstance(node, UnaryOpNode):
+                feitos.append(_unario(node, *filhos))
+            elif isinstance(node, BinaryOpNode):
+                feitos.append(_binario(node, *filhos))
+            else:
+                feitos.append(_serie(node, *filhos))
+        elif isinstance(node, (NumberNode, VariableNode)) or node is None:
+            feitos.append(node)
+        elif isinstance(node, UnaryOpNode):
+            pilha.append((node, 1))
+            pilha.append(node.child)
+        elif isinstance(node, BinaryOpNode):
+            pilha.append((node, 2))
+            pilha.append(node.right)
+            pilha.append(node.left)
+        elif isinstance(node, SeriesNode):
+            pilha.append((node, 3))
+            pilha.append(node.end)
+            pilha.append(node.start)
+            pilha.append(node.body)
+        else:
+            raise TypeError("Nó AST desconhecido")
+    return feitos[-1]
+
+
+def _unario(node, child):
+    # `node` com o filho já otimizado
+    op = node.op
+    if op in ("u+", "+"):
+        return child
+    if isinstance(child, NumberNode) and op in OPERADORES_UNARIOS:
+        dobrado = _dobrar(OPERADORES_UNARIOS[op], child.value)
+        if dobrado is not None:
+            return dobrado
+    # -(-x) e conj(conj(x))
+    if isinstance(child, UnaryOpNode) and _numerico(child.child):
+        if op in ("u-", "-") and child.op in ("u-", "-"):
+            return child.child
+        if op == "conj" and child.op == "conj":
+            return child.child
+    if child is node.child:
+        return node
+    return UnaryOpNode(op, child)
+
+
+def _binario(node, left, right):
+    op = node.op
+    if (op != "=" and op in OPERADORES_BINARIOS
+            and isinstance(left, NumberNode) and isinstance(right, NumberNode)):
+        dobrado = _dobrar(OPERADORES_BINARIOS[op], left.value, right.value)
+        if dobrado is not None:
+            return dobrado
+    if op == "+":
+        if _constante(right, 0.0) and _numerico(left):
+            return left
+        if _constante(left, 0.0) and _numerico(right):
+            return right
+    elif op == "-":
+        if _constante(right, 0.0) and _numerico(left):
+            return left
+    elif op == "*":
+        if _constante(right, 1.0) and _numerico(left):
+            return left
+        if _constante(left, 1.0) and _numerico(right):
+            return right
+    elif op == "/":
+        if _constante(right, 1.0) and _numerico(left):
+            return left
+    elif op == "**":
+        if _constante(right, 1.0) and _numerico(left):
+            return left
+    if left is node.left and right is node.right:
+        return node
+    return BinaryOpNode(op, left, right)
+
+
+def _serie(node, body, start, end):
+    if isinstance(start, NumberNode) and isinstance(end, NumberNode):
+        livres = set()
+        coletar_variaveis(body, livres)
+        if livres <= {node.index}:
+            dobrado = _dobrar(funcao_serie(node, {}), start.value, end.value)
+            if dobrado is not None:
+                return dobrado
+    if body is node.body and start is node.start and end is node.end:
+        return node
+    return SeriesNode(node.op, body, node.index, start, end)
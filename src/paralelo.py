@@ -0,0 +1,95 @@
+# paralelo.py
+# ============================================================
+# Modo em lote com vários processos: a entrada (JSON Lines, mesmo
+# formato de executor.executar_lote) é dividida em blocos de linhas,
+# avaliados por um pool de processos. Os resultados saem na ordem da
+# entrada. Cada processo mantém seu próprio CacheParse, reaproveitando
+# as ASTs das expressões que já viu. Com limites (recursos.Limites), uma
+# expressão que passa de um deles vira um registro de erro com o nome do
+# limite em "limite", e o trabalhador segue para a próxima linha.
+# ============================================================
+
+import itertools
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from parser import Parser
+from cache import CacheParse
+from executor import processar_linha
+
+# cache e limites do processo trabalhador (criados em _iniciar_trabalhador)
+_cache = None
+_limites = None
+
+
+def _iniciar_trabalhador(tamanho_cache, limites=None):
+    global _cache, _limites
+    _cache = CacheParse(tamanho=tamanho_cache, parser=Parser(limites=limites))
+    _limites = limites
+
+
+def _processar_bloco(inicio, linhas, com_lisp, com_arvore):
+    """Avalia um bloco de linhas; devolve as linhas de saída já serializadas."""
+    saida = []
+    erros = 0
+    for numero, linha in enumerate(linhas, start=inicio):
+        resultado = processar_linha(numero, linha, _cache, com_lisp, com_arvore, _limites)
+        if resultado is None:
+            continue
+        if "erro" in resultado:
+            erros += 1
+        saida.append(json.dumps(resultado, ensure_ascii=False) + "\n")
+    return saida, erros
+
+
+def _blocos(entrada, tamanho):
+    inicio = 1
+    entrada = iter(entrada)
+    while True:
+        linhas = list(itertools.islice(entrada, tamanho))
+        if not linhas:
+            return
+        yield inicio, linhas
+        inicio += len(linhas)
+
+
+def executar_lote_paralelo(entrada, saida, processos=None, bloco=1000,
+                           com_lisp=False, com_arvore=False, tamanho_cache=256, limites=None):
+    """Como executor.executar_lote, distribuindo blocos de `bloco` linhas
+    entre `processos` trabalhadores (padrão: número de CPUs).
+
+    No máximo 2 blocos por processo ficam em andamento ao mesmo tempo, então
+    a memória continua limitada mesmo para entradas muito grandes.
+    Retorna (total, erros).
+    """
+    if bloco < 1:
+        raise ValueError("O tamanho do bloco deve ser pelo menos 1")
+    if processos is None:
+        processos = os.cpu_count() or 1
+    if processos < 1:
+        raise ValueError("O número de processos deve ser pelo menos 1")
+
+    total = erros = 0
+    pendentes = deque()
+    limite = 2 * processos
+
+    def escrever(futuro):
+        nonlocal total, erros
+        linhas, erros_bloco = futuro.result()
+        saida.writelines(linhas)
+        saida.flush()
+        total += len(linhas)
+        erros += erros_bloco
+
+    with ProcessPoolExecutor(max_workers=processos, initializer=_iniciar_trabalhador,
+                             initargs=(tamanho_cache, limites)) as pool:
+        for inicio, linhas in _blocos(entrada, bloco):
+            pendentes.append(pool.submit(_processar_bloco, inicio, linhas, com_lisp, com_arvore))
+            # resultados saem na ordem de envio dos blocos
+            while len(pendentes) >= limite:
+                escrever(pendentes.popleft())
+        while pendentes:
+            escrever(pendentes.popleft())
+    return total, erros
@@ -1,19 +1,24 @@
 # parser.py
 # ============================================================
 # Parser de expressões para a calculadora de números complexos
-# Produz uma AST com nós: NumberNode, VariableNode, UnaryOpNode, BinaryOpNode
+# Produz uma AST com nós: NumberNode, VariableNode, UnaryOpNode, BinaryOpNode,
+#                         SeriesNode
 # Suporta: números reais, imaginários (ex.: 3i), + - * / ** =, conj(...), raiz(...),
+#          soma(expr, k, inicio, fim), produto(expr, k, inicio, fim),
 #          parênteses e multiplicação implícita (ex.: 2(3+1) ou 3i(1+2))
 # ============================================================
 
 import re
+import sys
+
+import instrumentacao
 from complexos import Complexo
 
 # ------------------ tokens ------------------
 TOKEN_SPEC = [
     ("POW",    r"\*\*"),
-    ("IMAG",   r"\d+(\.\d+)?i"),
-    ("NUMBER", r"\d+(\.\d+)?"),
+    ("IMAG",   r"\d+(?:\.\d+)?i"),
+    ("NUMBER", r"\d+(?:\.\d+)?"),
     ("PLUS",   r"\+"),
     ("MINUS",  r"-"),
     ("TIMES",  r"\*"),
@@ -29,180 +34,554 @@ TOKEN_SPEC = [
 
 TOKEN_REGEX = "|".join(f"(?P<{name}>{regex})" for name, regex in TOKEN_SPEC)
 
+# compilado uma vez, em vez de depender do cache interno do módulo re
+SCANNER = re.compile(TOKEN_REGEX)
+
 # ------------------ token class ------------------
 class Token:
+    __slots__ = ("type", "value")
     def __init__(self, type_, value):
         self.type = type_
         self.value = value
     def __repr__(self):
         return f"Token({self.type}, {self.value})"
 
+EOF_TOKEN = Token("EOF", None)
+
+# tokens de lexema fixo (operadores, parênteses, vírgula) são criados uma
+# única vez e compartilhados; só números e nomes geram objetos novos
+_TOKENS_FIXOS = {
+    type_: Token(type_, lexema)
+    for type_, lexema in (
+        ("POW", "**"), ("PLUS", "+"), ("MINUS", "-"), ("TIMES", "*"), ("DIV", "/"),
+        ("EQ", "="), ("LPAREN", "("), ("RPAREN", ")"), ("COMMA", ","),
+    )
+}
+
+def iter_tokens(text: str):
+    """Gera os tokens de `text` sob demanda, terminando com EOF.
+
+    Lança SyntaxError ao chegar a um caractere inválido.
+    """
+    for m in SCANNER.finditer(text):
+        type_ = m.lastgroup
+        if type_ == "SKIP":
+            continue
+        value = m.group()
+        tok = _TOKENS_FIXOS.get(type_)
+        if tok is not None:
+            yield tok
+        elif type_ == "NUMBER":
+            yield Token("NUMBER", float(value))
+        elif type_ == "NAME":
+            yield Token("NAME", value)
+        elif type_ == "IMAG":
+            yield Token("IMAG", float(value[:-1]))
+        else:
+            raise SyntaxError(f"Caractere inválido: {value}")
+    yield EOF_TOKEN
+
 # ------------------ AST nodes ------------------
-class NumberNode:
+# Os nós são imutáveis: a mesma AST pode ser compartilhada (ex.: pelo
+# cache de parse) sem que quem a recebe consiga alterá-la.
+class _NoImutavel:
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} é imutável")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} é imutável")
+
+class NumberNode(_NoImutavel):
+    __slots__ = ("value",)
     def __init__(self, value: Complexo):
-        self.value = value
+        object.__setattr__(self, "value", value)
+    def __reduce__(self):
+        return (NumberNode, (self.value,))
     def __repr__(self):
         return f"NumberNode({self.value})"
 
-class VariableNode:
+class VariableNode(_NoImutavel):
+    __slots__ = ("name",)
     def __init__(self, name: str):
-        self.name = name
+        object.__setattr__(self, "name", name)
+    def __reduce__(self):
+        return (VariableNode, (self.name,))
     def __repr__(self):
         return f"VariableNode({self.name})"
 
-class UnaryOpNode:
+class UnaryOpNode(_NoImutavel):
+    __slots__ = ("op", "child")
     def __init__(self, op: str, child):
-        self.op = op
-        self.child = child
+        object.__setattr__(self, "op", op)
+        object.__setattr__(self, "child", child)
+    def __reduce__(self):
+        return (UnaryOpNode, (self.op, self.child))
     def __repr__(self):
         return f"UnaryOpNode({self.op}, {self.child})"
 
-class BinaryOpNode:
+class BinaryOpNode(_NoImutavel):
+    __slots__ = ("op", "left", "right")
     def __init__(self, op: str, left, right):
-        self.op = op
-        self.left = left
-        self.right = right
+        object.__setattr__(self, "op", op)
+        object.__setattr__(self, "left", left)
+        object.__setattr__(self, "right", right)
+    def __reduce__(self):
+        return (BinaryOpNode, (self.op, self.left, self.right))
     def __repr__(self):
         return f"BinaryOpNode({self.op}, {self.left}, {self.right})"
 
+class SeriesNode(_NoImutavel):
+    """soma(body, index, start, end) ou produto(...): `index` é o nome da
+    variável ligada, que percorre os inteiros de start a end em `body`."""
+    __slots__ = ("op", "body", "index", "start", "end")
+    def __init__(self, op: str, body, index: str, start, end):
+        object.__setattr__(self, "op", op)
+        object.__setattr__(self, "body", body)
+        object.__setattr__(self, "index", index)
+        object.__setattr__(self, "start", start)
+        object.__setattr__(self, "end", end)
+    def __reduce__(self):
+        return (SeriesNode, (self.op, self.body, self.index, self.start, self.end))
+    def __repr__(self):
+        return f"SeriesNode({self.op}, {self.body}, {self.index}, {self.start}, {self.end})"
+
+FUNCOES_SERIE = ("soma", "produto")
+
+def contar_nos(node):
+    """Número de nós da AST (na forma de árvore)."""
+    total = 0
+    pilha = [node]
+    while pilha:
+        node = pilha.pop()
+        if node is None:
+            continue
+        total += 1
+        if isinstance(node, UnaryOpNode):
+            pilha.append(node.child)
+        elif isinstance(node, BinaryOpNode):
+            pilha.append(node.left)
+            pilha.append(node.right)
+        elif isinstance(node, SeriesNode):
+            pilha.append(node.body)
+            pilha.append(node.start)
+            pilha.append(node.end)
+    return total
+
+# ------------------ internação ------------------
+def _numero_novo(a, b):
+    return NumberNode(Complexo(a, b))
+
+class TabelaInternacao:
+    """Folhas compartilhadas entre as ASTs de um ou mais Parsers: cada
+    constante vira um único NumberNode (com um único Complexo, ou valor do
+    `backend` numérico) e cada nome de variável um único VariableNode, com
+    o nome internado (sys.intern). Como os nós são imutáveis, o
+    compartilhamento é seguro.
+
+    Os literais do parser nunca são negativos (o sinal é um operador
+    unário), então a chave (a, b) não mistura 0.0 com -0.0.
+
+    Pode ser usada por várias threads ao mesmo tempo; nesse caso os
+    contadores `pedidos` e `reaproveitados` são aproximados.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend
+        self._valor = Complexo if backend is None else backend.numero
+        self._numeros = {}
+        self._variaveis = {}
+        self.pedidos = 0          # folhas pedidas pelo parser
+        self.reaproveitados = 0   # quantas delas já existiam na tabela
+
+    def numero(self, a, b):
+        self.pedidos += 1
+        node = self._numeros.get((a, b))
+        if node is None:
+            # setdefault é atômico: duas threads que criam a mesma folha
+            # ao mesmo tempo recebem o mesmo nó
+            node = self._numeros.setdefault((a, b), NumberNode(self._valor(a, b)))
+        else:
+            self.reaproveitados += 1
+        return node
+
+    def variavel(self, nome):
+        self.pedidos += 1
+        node = self._variaveis.get(nome)
+        if node is None:
+            node = self._variaveis.setdefault(nome, VariableNode(sys.intern(nome)))
+        else:
+            self.reaproveitados += 1
+        return node
+
+    def estatisticas(self):
+        return {
+            "numeros": len(self._numeros),
+            "variaveis": len(self._variaveis),
+            "pedidos": self.pedidos,
+            "reaproveitados": self.reaproveitados,
+        }
+
+    def limpar(self):
+        self._numeros.clear()
+        self._variaveis.clear()
+        self.pedidos = 0
+        self.reaproveitados = 0
+
+    def __len__(self):
+        return len(self._numeros) + len(self._variaveis)
+
 # ------------------ Parser ------------------
 class Parser:
-    def __init__(self):
-        pass
+    """O estado de uma análise (token atual e fluxo de tokens) fica em um
+    contexto criado a cada chamada de parse(), e não no Parser: o mesmo
+    Parser pode ser usado por várias threads ao mesmo tempo (ex.: em um
+    ThreadPoolExecutor). Os métodos da gramática (expression(), eat(),
+    ...) continuam operando sobre o estado da própria instância."""
+
+    # construtores dos nós internos; um contexto com limites (ver
+    # _limitar) os troca por versões que contam nós e profundidade
+    _unario = UnaryOpNode
+    _binario = BinaryOpNode
+    _serie = SeriesNode
+
+    # quadros da pilha da gramática por nível de aninhamento: um par de
+    # parênteses ou uma chamada de função usa 5 (expression, sum_expr,
+    # term, power, factor); operadores unários e '**' usam menos
+    _QUADROS_POR_NIVEL = 5
+
+    def __init__(self, internar=False, tabela=None, backend=None, limites=None):
+        """Com `internar` (ou uma `tabela` própria, que pode ser comum a
+        vários parsers), constantes e variáveis iguais viram o mesmo nó
+        em todas as ASTs produzidas; ver TabelaInternacao.
+
+        Com `backend` (ver backends), as constantes são valores dele em vez
+        de Complexo.
+
+        Com `limites` (recursos.Limites), parse() lança LimiteExcedido se a
+        expressão passar do limite de tokens, de nós ou de profundidade. Os
+        limites são conferidos durante a análise, à medida que os tokens
+        são lidos e os nós criados; cada par de parênteses aninhado também
+        conta como um nível de profundidade.
+        """
+        if tabela is None and internar:
+            tabela = TabelaInternacao(backend)
+        elif tabela is not None and backend is not None and tabela.backend is not backend:
+            raise ValueError("A tabela de internação usa outro backend numérico")
+        self.tabela = tabela
+        self.backend = backend
+        self.limites = limites
+        if tabela is not None:
+            self._numero = tabela.numero
+            self._variavel = tabela.variavel
+        elif backend is not None:
+            valor = backend.numero
+            self._numero = lambda a, b: NumberNode(valor(a, b))
+            self._variavel = VariableNode
+        else:
+            self._numero = _numero_novo
+            self._variavel = VariableNode
 
     def parse(self, text: str):
-        self.tokens = self.tokenize(text)
-        self.pos = 0
-        if not self.tokens:
-            raise SyntaxError("Expressão vazia")
-        node = self.expression()
-        if self.current_type() != "EOF":
-            raise SyntaxError(f"Token extra após expressão: {self.current()}")
+        contexto = self._contexto()
+        if instrumentacao.ATIVA is not None:
+            return contexto._parse_instrumentado(text, instrumentacao.ATIVA)
+        # os tokens são lidos sob demanda, conforme a gramática avança
+        return contexto._parse_fluxo(contexto._tokens(text))
+
+    def _tokens(self, text):
+        fluxo = iter_tokens(text)
+        if self.limites is None:
+            return fluxo
+        return self.limites.limitar_tokens(fluxo)
+
+    def _contexto(self):
+        # cópia rasa só com a configuração: _fluxo e _atual de uma análise
+        # ficam nela, sem passar por __init__
+        contexto = object.__new__(type(self))
+        contexto.tabela = self.tabela
+        contexto.backend = self.backend
+        contexto.limites = self.limites
+        contexto._numero = self._numero
+        contexto._variavel = self._variavel
+        if self.limites is not None:
+            contexto._limitar()
+        return contexto
+
+    def _limitar(self):
+        # troca, só neste contexto, a criação de nós e a execução da
+        # gramática por versões que conferem os limites de nós e de
+        # profundidade a cada passo
+        contador = self.limites.contador_ast()
+        folha, no = contador.folha, contador.no
+        numero, variavel = self._numero, self._variavel
+        self._numero = lambda a, b: folha(numero(a, b))
+        self._variavel = lambda nome: folha(variavel(nome))
+        self._unario = lambda op, child: no(UnaryOpNode(op, child), child)
+        self._binario = lambda op, left, right: no(BinaryOpNode(op, left, right), left, right)
+        self._serie = lambda op, body, index, start, end: no(
+            SeriesNode(op, body, index, start, end), body, start, end)
+        # parênteses não criam nós: o aninhamento só é limitado pela
+        # profundidade
+        if self.limites.profundidade is not None:
+            self._executar = self._executar_limitado
+
+    def _parse_fluxo(self, fluxo):
+        self._fluxo = fluxo
+        self._atual = next(self._fluxo)
+        try:
+            node = self._executar(self._expression())
+            if self.current_type() != "EOF":
+                raise SyntaxError(f"Token extra após expressão: {self.current()}")
+        except SyntaxError:
+            # um caractere inválido mais adiante tem prioridade sobre o erro
+            # de sintaxe, como quando a lista de tokens era montada antes
+            self._drenar()
+            raise
         return node
 
+    def _parse_instrumentado(self, text, inst):
+        # tokeniza tudo antes para medir as duas etapas separadamente
+        with inst.etapa("tokenize"):
+            tokens = list(self._tokens(text))
+        inst.contar("tokens", len(tokens) - 1)  # sem o EOF
+        with inst.etapa("parse"):
+            node = self._parse_fluxo(iter(tokens))
+        inst.contar("nos", contar_nos(node))
+        return node
+
+    def _drenar(self):
+        try:
+            for _ in self._fluxo:
+                pass
+        except SyntaxError as erro:
+            raise erro from None
+
     # tokenização
     def tokenize(self, text: str):
-        tokens = []
-        for m in re.finditer(TOKEN_REGEX, text):
-            type_ = m.lastgroup
-            value = m.group()
-            if type_ == "SKIP":
+        return list(iter_tokens(text))
+
+    # ------------------ gramática ------------------
+    # Cada regra é um gerador: em vez de chamar outra regra diretamente,
+    # ela faz `yield` do gerador da sub-regra e recebe o nó resultante.
+    # _executar roda esses geradores com uma pilha explícita, então a
+    # profundidade da expressão não esbarra no limite de recursão do Python.
+
+    def _executar(self, regra):
+        pilha = [regra]
+        valor = None
+        while pilha:
+            try:
+                sub = pilha[-1].send(valor)
+            except StopIteration as fim:
+                pilha.pop()
+                valor = fim.value
                 continue
-            if type_ == "MISMATCH":
-                raise SyntaxError(f"Caractere inválido: {value}")
-            if type_ == "NUMBER":
-                tokens.append(Token("NUMBER", float(value)))
-            elif type_ == "IMAG":
-                tokens.append(Token("IMAG", float(value[:-1])))
-            elif type_ == "NAME":
-                tokens.append(Token("NAME", value))
-            else:
-                tokens.append(Token(type_, value))
-        tokens.append(Token("EOF", None))
-        return tokens
+            pilha.append(sub)
+            valor = None
+        return valor
+
+    def _executar_limitado(self, regra):
+        # _executar com a pilha limitada: o aninhamento de "((((" ou
+        # "----" só cria nós na volta, então é conferido aqui
+        pilha = [regra]
+        valor = None
+        niveis = self.limites.profundidade
+        maximo = self._QUADROS_POR_NIVEL * niveis + 3
+        while pilha:
+            try:
+                sub = pilha[-1].send(valor)
+            except StopIteration as fim:
+                pilha.pop()
+                valor = fim.value
+                continue
+            pilha.append(sub)
+            if len(pilha) > maximo:
+                from recursos import LimiteExcedido
+                raise LimiteExcedido("profundidade", niveis)
+            valor = None
+        return valor
 
     def expression(self):
-        left = self.sum_expr()
+        return self._executar(self._expression())
+
+    def sum_expr(self):
+        return self._executar(self._sum_expr())
+
+    def term(self):
+        return self._executar(self._term())
+
+    def power(self):
+        return self._executar(self._power())
+
+    def factor(self):
+        return self._executar(self._factor())
+
+    def _expression(self):
+        left = yield self._sum_expr()
         if self.current_type() == "EQ":
             op_tok = self.eat("EQ")
-            right = self.sum_expr()
-            return BinaryOpNode(op_tok.value, left, right)
+            right = yield self._sum_expr()
+            return self._binario(op_tok.value, left, right)
         return left
 
-    def sum_expr(self):
-        node = self.term()
+    def _sum_expr(self):
+        node = yield self._term()
         while self.current_type() in ("PLUS", "MINUS"):
             op_tok = self.eat(self.current_type())
-            right = self.term()
-            node = BinaryOpNode(op_tok.value, node, right)
+            right = yield self._term()
+            node = self._binario(op_tok.value, node, right)
         return node
 
-    def term(self):
-        node = self.power()
+    def _term(self):
+        node = None
+        op = None
         starts_factor = ("NUMBER", "IMAG", "LPAREN", "NAME")
         while True:
+            # operando simples (átomo sem '**' em seguida) dispensa o gerador de power()
+            right = self._atomo()
+            if right is None or type(right) is Token or self.current_type() == "POW":
+                right = yield self._power_apos(right)
+            node = right if op is None else self._binario(op, node, right)
             if self.current_type() in ("TIMES", "DIV"):
-                op_tok = self.eat(self.current_type())
-                right = self.power()
-                node = BinaryOpNode(op_tok.value, node, right)
-                continue
-            if self.current_type() in starts_factor:
-                right = self.power()
-                node = BinaryOpNode("*", node, right)
-                continue
-            break
-        return node
+                op = self.eat(self.current_type()).value
+            elif self.current_type() in starts_factor:
+                op = "*"
+            else:
+                return node
 
-    def power(self):
-        node = self.factor()
+    def _power(self):
+        return self._power_apos(self._atomo())
+
+    def _power_apos(self, node):
+        # power() a partir do resultado de _atomo()
+        if node is None:
+            node = yield self._factor()
+        elif type(node) is Token:
+            node = yield self._apos_nome(node)
         if self.current_type() == "POW":
             op_tok = self.eat("POW")
-            right = self.power()
-            node = BinaryOpNode(op_tok.value, node, right)
+            right = yield self._power()
+            node = self._binario(op_tok.value, node, right)
         return node
 
 
-    def factor(self):
+    def _atomo(self):
+        """Caminho rápido de factor() para números e variáveis, sem gerador.
+
+        Retorna o nó; None se o token atual exige factor(); ou o token NAME
+        já consumido, quando ele inicia uma função (continua em _apos_nome).
+        """
+        tok = self._atual
+        type_ = tok.type
+        if type_ == "NUMBER":
+            self.eat("NUMBER")
+            return self._numero(tok.value, 0.0)
+        if type_ == "IMAG":
+            self.eat("IMAG")
+            return self._numero(0.0, tok.value)
+        if type_ == "NAME":
+            self.eat("NAME")
+            name = tok.value.lower()
+            if name == "i":
+                return self._numero(0.0, 1.0)
+            if name == "conj" or self._atual.type == "LPAREN":
+                return tok
+            return self._variavel(tok.value)
+        return None
+
+    def _factor(self):
         tok = self.current()
         if tok.type == "PLUS":
             self.eat("PLUS")
-            child = self.factor()
-            return UnaryOpNode("u+", child)
+            child = yield self._factor()
+            return self._unario("u+", child)
         if tok.type == "MINUS":
             self.eat("MINUS")
-            child = self.factor()
-            return UnaryOpNode("u-", child)
+            child = yield self._factor()
+            return self._unario("u-", child)
         if tok.type == "NUMBER":
             t = self.eat("NUMBER")
-            return NumberNode(Complexo(t.value, 0.0))
+            return self._numero(t.value, 0.0)
         if tok.type == "IMAG":
             t = self.eat("IMAG")
-            return NumberNode(Complexo(0.0, t.value))
+            return self._numero(0.0, t.value)
         if tok.type == "LPAREN":
             self.eat("LPAREN")
-            node = self.expression()
+            node = yield self._expression()
             self.eat("RPAREN")
             return node
         if tok.type == "NAME":
             name_tok = self.eat("NAME")
-            name = name_tok.value.lower()
+            node = yield self._apos_nome(name_tok)
+            return node
+        raise SyntaxError(f"Token inesperado em factor(): {tok}")
 
+    def _apos_nome(self, name_tok):
+        # restante de factor() depois de consumir um NAME
+        name = name_tok.value.lower()
 
-            if name == "i":
-                return NumberNode(Complexo(0.0, 1.0))
-
-
-            if self.current_type() == "LPAREN":
-                self.eat("LPAREN")
-                if name == "conj":
-                    child = self.expression()
-                    self.eat("RPAREN")
-                    return UnaryOpNode("conj", child)
-                elif name == "raiz":
-                    left = self.expression()
-                    self.eat("COMMA")
-                    right = self.expression()
-                    self.eat("RPAREN")
-                    return BinaryOpNode("raiz", left, right)
-                else:
-                    raise SyntaxError(f"Função desconhecida: {name}")
+
+        if name == "i":
+            return self._numero(0.0, 1.0)
+
+
+        if self.current_type() == "LPAREN":
+            self.eat("LPAREN")
             if name == "conj":
-                child = self.factor()
-                return UnaryOpNode("conj", child)
-            return VariableNode(name_tok.value)
-        raise SyntaxError(f"Token inesperado em factor(): {tok}")
+                child = yield self._expression()
+                self.eat("RPAREN")
+                return self._unario("conj", child)
+            elif name == "raiz":
+                left = yield self._expression()
+                self.eat("COMMA")
+                right = yield self._expression()
+                self.eat("RPAREN")
+                return self._binario("raiz", left, right)
+            elif name in FUNCOES_SERIE:
+                # soma(expr, k, inicio, fim) / produto(expr, k, inicio, fim)
+                body = yield self._expression()
+                self.eat("COMMA")
+                index = self.eat("NAME").value
+                if index.lower() == "i" or index.lower() in FUNCOES_SERIE + ("conj", "raiz"):
+                    raise SyntaxError(f"Nome inválido para o índice de {name}: {index}")
+                self.eat("COMMA")
+                start = yield self._expression()
+                self.eat("COMMA")
+                end = yield self._expression()
+                self.eat("RPAREN")
+                return self._serie(name, body, index, start, end)
+            else:
+                raise SyntaxError(f"Função desconhecida: {name}")
+        if name == "conj":
+            child = yield self._factor()
+            return self._unario("conj", child)
+        return self._variavel(name_tok.value)
 
     def current(self):
-        if self.pos >= len(self.tokens):
-            return Token("EOF", None)
-        return self.tokens[self.pos]
+        return self._atual
 
     def current_type(self):
-        return self.current().type
+        return self._atual.type
 
     def eat(self, type_):
-        tok = self.current()
+        tok = self._atual
         if tok.type == type_:
-            self.pos += 1
+            if tok is not EOF_TOKEN:
+                self._atual = next(self._fluxo)
             return tok
         raise SyntaxError(f"Esperado {type_}, encontrado {tok.type} ({tok.value})")
+
+
+_PADRAO = Parser()
+
+def parse(text: str, tabela=None, backend=None, limites=None):
+    """Parse sem estado compartilhado, seguro para chamadas concorrentes.
+
+    Com `tabela` (TabelaInternacao), as folhas são internadas nela; com
+    `backend`, as constantes são valores dele; com `limites`, ver Parser.
+    """
+    if tabela is None and backend is None and limites is None:
+        return _PADRAO.parse(text)
+    return Parser(tabela=tabela, backend=backend, limites=limites).parse(text)
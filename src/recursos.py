@@ -0,0 +1,229 @@
+# recursos.py
+# ============================================================
+# Limites de recursos para entradas não confiáveis (modo em lote,
+# servidor): uma expressão enorme ou uma avaliação sem fim não deve
+# travar o processo que a atende.
+#   - no parse (Parser(limites=...)): número de tokens, lido à medida
+#     que o texto é tokenizado, e número de nós e profundidade da AST,
+#     conferidos à medida que o parser cria os nós;
+#   - na avaliação (eval_node / bytecode.executar com limites=...):
+#     operações aplicadas (cada termo de soma/produto conta como os nós
+#     do termo), tempo de relógio e módulo das partes de cada resultado;
+#     um estouro numérico (OverflowError, decimal.Overflow) também conta
+#     como limite de magnitude.
+# Passar de um limite lança LimiteExcedido, com o nome do limite em
+# `limite`. Limite None = sem limite.
+#
+# Uso:
+#     lim = Limites(tokens=10_000, operacoes=1_000_000, tempo=0.5)
+#     ast = Parser(limites=lim).parse(texto)
+#     eval_node(ast, valores, limites=lim)
+# ============================================================
+
+from decimal import Overflow as _OverflowDecimal
+from time import monotonic
+
+from parser import UnaryOpNode, BinaryOpNode, SeriesNode
+
+
+class LimiteExcedido(Exception):
+    """Uma expressão passou de um dos Limites. `limite` é o nome dele
+    ("tokens", "nos", "profundidade", "operacoes", "tempo", "magnitude")."""
+
+    def __init__(self, limite, maximo):
+        if maximo is None:
+            # estouro numérico sem limite de magnitude configurado
+            super().__init__(f"Limite de {limite} excedido (estouro numérico)")
+        else:
+            super().__init__(f"Limite de {limite} excedido (máximo: {maximo})")
+        self.limite = limite
+        self.maximo = maximo
+
+    def __reduce__(self):
+        # atravessa processos (pool de trabalhadores) com os atributos
+        return (LimiteExcedido, (self.limite, self.maximo))
+
+
+class Limites:
+    """Configuração imutável dos limites (None = sem limite).
+
+    tokens        tokens da expressão
+    nos           nós da AST (na forma de árvore)
+    profundidade  profundidade da AST (a raiz tem profundidade 1)
+    operacoes     operações por avaliação
+    tempo         segundos de relógio por avaliação
+    magnitude     maior |parte real| ou |parte imaginária| de um resultado
+    """
+    __slots__ = ("tokens", "nos", "profundidade", "operacoes", "tempo", "magnitude")
+
+    def __init__(self, tokens=None, nos=None, profundidade=None, operacoes=None,
+                 tempo=None, magnitude=None):
+        for nome, valor in zip(self.__slots__, (tokens, nos, profundidade, operacoes, tempo, magnitude)):
+            if valor is not None and not valor > 0:
+                raise ValueError(f"O limite de {nome} deve ser positivo: {valor}")
+            object.__setattr__(self, nome, valor)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Limites é imutável")
+
+    def __reduce__(self):
+        return (Limites, tuple(getattr(self, n) for n in self.__slots__))
+
+    def __repr__(self):
+        campos = ", ".join(f"{n}={getattr(self, n)}" for n in self.__slots__
+                           if getattr(self, n) is not None)
+        return f"Limites({campos})"
+
+    @classmethod
+    def de_texto(cls, texto):
+        """Limites a partir de "tokens=10000,tempo=0.5" (opção --limites)."""
+        valores = {}
+        for parte in texto.split(","):
+            if not parte.strip():
+                continue
+            nome, sep, valor = parte.partition("=")
+            nome = nome.strip()
+            if not sep or nome not in cls.__slots__:
+                raise ValueError(f"Limite inválido: {parte.strip()!r} "
+                                 f"(use {', '.join(cls.__slots__)})")
+            try:
+                valores[nome] = float(valor) if nome in ("tempo", "magnitude") else int(valor)
+            except ValueError:
+                raise ValueError(f"Valor inválido para o limite de {nome}: {valor.strip()!r}") from None
+        return cls(**valores)
+
+    # ------------------ parse ------------------
+    def limitar_tokens(self, fluxo):
+        """Repassa os tokens de `fluxo` (terminado em EOF), lançando
+        LimiteExcedido no primeiro token além do limite; o resto do texto
+        não chega a ser tokenizado."""
+        maximo = self.tokens
+        if maximo is None:
+            return fluxo
+        return _tokens_limitados(fluxo, maximo)
+
+    def contador_ast(self):
+        """ContadorAst para o parser conferir os nós à medida que os cria."""
+        return ContadorAst(self.nos, self.profundidade)
+
+    def conferir_ast(self, node):
+        """LimiteExcedido se uma AST já pronta (ex.: lida de bytecode) passa
+        do limite de nós ou de profundidade."""
+        max_nos, max_prof = self.nos, self.profundidade
+        if max_nos is None and max_prof is None:
+            return
+        total = 0
+        pilha = [(node, 1)]
+        while pilha:
+            node, prof = pilha.pop()
+            total += 1
+            if max_nos is not None and total > max_nos:
+                raise LimiteExcedido("nos", max_nos)
+            if max_prof is not None and prof > max_prof:
+                raise LimiteExcedido("profundidade", max_prof)
+            prof += 1
+            if isinstance(node, BinaryOpNode):
+                pilha.append((node.left, prof))
+                pilha.append((node.right, prof))
+            elif isinstance(node, UnaryOpNode):
+                pilha.append((node.child, prof))
+            elif isinstance(node, SeriesNode):
+                pilha.append((node.body, prof))
+                pilha.append((node.start, prof))
+                pilha.append((node.end, prof))
+
+    # ------------------ avaliação ------------------
+    def orcamento(self):
+        """Orcamento de uma avaliação; o prazo começa a contar agora."""
+        return Orcamento(self)
+
+
+class ContadorAst:
+    """Conta os nós de uma AST em construção. O parser passa por folha()
+    cada folha e por no() cada nó interno, com os filhos; a profundidade
+    de cada nó interno fica guardada (por id, enquanto a AST é montada)
+    para calcular a do pai."""
+    __slots__ = ("nos", "_max_nos", "_max_prof", "_prof")
+
+    def __init__(self, max_nos, max_prof):
+        self.nos = 0
+        self._max_nos = max_nos
+        self._max_prof = max_prof
+        self._prof = {}
+
+    def folha(self, node):
+        self.nos += 1
+        if self._max_nos is not None and self.nos > self._max_nos:
+            raise LimiteExcedido("nos", self._max_nos)
+        return node
+
+    def no(self, node, *filhos):
+        self.folha(node)
+        prof = self._prof
+        d = 1 + max(prof.get(id(f), 1) for f in filhos)
+        if self._max_prof is not None and d > self._max_prof:
+            raise LimiteExcedido("profundidade", self._max_prof)
+        prof[id(node)] = d
+        return node
+
+
+def _tokens_limitados(fluxo, maximo):
+    contados = 0
+    for tok in fluxo:
+        if tok.type != "EOF":
+            contados += 1
+            if contados > maximo:
+                raise LimiteExcedido("tokens", maximo)
+        yield tok
+
+
+class Orcamento:
+    """Consumo de uma avaliação em curso. Quem avalia chama passo() a cada
+    operação aplicada (ou gastar(n) antes de n operações de uma vez).
+
+    Um Orcamento também serve onde se espera Limites: orcamento() devolve
+    ele mesmo, então avaliações aninhadas (termos de soma/produto) gastam
+    do mesmo orçamento.
+    """
+    __slots__ = ("limites", "operacoes", "_max_operacoes", "_prazo", "_magnitude")
+
+    def __init__(self, limites):
+        self.limites = limites
+        self.operacoes = 0
+        self._max_operacoes = limites.operacoes
+        self._prazo = None if limites.tempo is None else monotonic() + limites.tempo
+        self._magnitude = limites.magnitude
+
+    def orcamento(self):
+        return self
+
+    def gastar(self, n=1):
+        self.operacoes += n
+        if self._max_operacoes is not None and self.operacoes > self._max_operacoes:
+            raise LimiteExcedido("operacoes", self._max_operacoes)
+        if self._prazo is not None and monotonic() > self._prazo:
+            raise LimiteExcedido("tempo", self.limites.tempo)
+
+    def passo(self, valor):
+        """Conta uma operação cujo resultado é `valor`."""
+        self.gastar()
+        maximo = self._magnitude
+        if maximo is not None and type(valor) is not bool:
+            if isinstance(valor, complex):
+                a, b = valor.real, valor.imag
+            else:
+                a, b = valor.a, valor.b
+            # inf passa do limite; nan não é comparável e passa adiante
+            if abs(a) > maximo or abs(b) > maximo:
+                raise LimiteExcedido("magnitude", maximo)
+
+    def estouro(self):
+        """LimiteExcedido("magnitude") para um estouro numérico (ver
+        ESTOUROS); o máximo é None se não há limite de magnitude."""
+        return LimiteExcedido("magnitude", self._magnitude)
+
+
+# erros de estouro que uma avaliação limitada relata como magnitude: o
+# OverflowError de float e o do backend decimal (expoente além do
+# contexto, que o decimal trata como erro em vez de devolver Infinity)
+ESTOUROS = (OverflowError, _OverflowDecimal)
@@ -0,0 +1,321 @@
+# resolvedor.py
+# ============================================================
+# Resolução numérica de equações "lhs = rhs" em uma variável complexa:
+# procura os zeros de f(x) = lhs - rhs pelo método de Newton,
+#     x <- x - f(x) / f'(x),
+# partindo de muitos pontos ao mesmo tempo. Cada iteração avalia f e
+# f' sobre arrays NumPy (vetorizado.avaliar_vetorizado), e não um
+# Complexo por vez.
+#
+# A derivada é obtida da AST (derivar) e simplificada pelo otimizador.
+# Quando a expressão usa algo sem derivada simbólica (conj, ou a variável
+# no expoente ou na ordem da raiz), usa-se diferença central numérica.
+# ============================================================
+
+import math
+from collections import namedtuple
+
+try:
+    import numpy as np
+except ImportError:  # numpy é opcional para o resto da calculadora
+    np = None
+
+from parser import NumberNode, VariableNode, UnaryOpNode, BinaryOpNode, SeriesNode
+from complexos import Complexo
+from executor import coletar_variaveis
+from otimizador import otimizar
+from vetorizado import avaliar_vetorizado
+
+# raizes: lista de Complexo (distintas, ordenadas); estatisticas: dict
+ResultadoNewton = namedtuple("ResultadoNewton", ["raizes", "estatisticas"])
+
+_ZERO = NumberNode(Complexo(0.0, 0.0))
+_UM = NumberNode(Complexo(1.0, 0.0))
+
+
+class DerivadaIndisponivel(ValueError):
+    """A expressão não tem derivada simbólica em relação à variável."""
+
+
+# ------------------ derivada simbólica ------------------
+def derivar(node, variavel):
+    """AST de d(node)/d(variavel), já simplificada.
+
+    Lança DerivadaIndisponivel para conj(...) que dependa da variável (não
+    é holomorfa), variável no expoente de ** ou na ordem de raiz, '=',
+    produto(...) e limites de soma(...) que dependam da variável.
+    """
+    depende = {}
+    _marcar_dependencias(node, variavel, depende)
+    d = _derivar(node, variavel, depende)
+    return otimizar(d if d is not None else _ZERO)
+
+
+def _marcar_dependencias(node, variavel, depende):
+    # id(nó) -> True se a subárvore contém a variável (pós-ordem, sem recursão)
+    pilha = [(node, variavel, False)]
+    while pilha:
+        n, variavel, pronto = pilha.pop()
+        if isinstance(n, VariableNode):
+            depende[id(n)] = n.name == variavel
+        elif isinstance(n, NumberNode):
+            depende[id(n)] = False
+        elif isinstance(n, UnaryOpNode):
+            if pronto:
+                depende[id(n)] = depende[id(n.child)]
+            else:
+                pilha.append((n, variavel, True))
+                pilha.append((n.child, variavel, False))
+        elif isinstance(n, BinaryOpNode):
+            if pronto:
+                depende[id(n)] = depende[id(n.left)] or depende[id(n.right)]
+            else:
+                pilha.append((n, variavel, True))
+                pilha.append((n.right, variavel, False))
+                pilha.append((n.left, variavel, False))
+        elif isinstance(n, SeriesNode):
+            if pronto:
+                depende[id(n)] = depende[id(n.body)] or depende[id(n.start)] or depende[id(n.end)]
+            else:
+                pilha.append((n, variavel, True))
+                pilha.append((n.end, variavel, False))
+                pilha.append((n.start, variavel, False))
+                # dentro do termo, o nome do índice é a variável ligada
+                pilha.append((n.body, variavel if n.index != variavel else None, False))
+        else:
+            raise TypeError("Nó AST desconhecido")
+
+
+def _derivar(node, variavel, depende):
+    """Derivada de `node` (None representa derivada nula, para não montar
+    termos "0 * ..."). Pós-ordem com pilha explícita: (nó, True) aplica a
+    regra do nó às derivadas dos filhos, já calculadas."""
+    pilha = [(node, False)]
+    derivadas = []
+    while pilha:
+        node, pronto = pilha.pop()
+        if pronto:
+            if isinstance(node, UnaryOpNode):
+                derivadas[-1] = _regra_unaria(node, derivadas[-1], variavel)
+            elif isinstance(node, SeriesNode):
+                # (soma f(k))' = soma f'(k)
+                d = derivadas[-1]
+                derivadas[-1] = d and SeriesNode("soma", d, node.index, node.start, node.end)
+            else:
+                dv = derivadas.pop()
+                derivadas[-1] = _regra_binaria(node, derivadas[-1], dv, variavel)
+        elif not depende[id(node)]:
+            derivadas.append(None)
+        elif isinstance(node, VariableNode):
+            derivadas.append(_UM)
+        elif isinstance(node, UnaryOpNode):
+            pilha.append((node, True))
+            pilha.append((node.child, False))
+        elif isinstance(node, SeriesNode):
+            if node.op != "soma":
+                raise DerivadaIndisponivel(f"'{node.op}' não tem derivada em relação a {variavel}")
+            if depende[id(node.start)] or depende[id(node.end)]:
+                raise DerivadaIndisponivel(f"limites de soma dependem de {variavel}")
+            pilha.append((node, True))
+            pilha.append((node.body, False))
+        else:
+            pilha.append((node, True))
+            pilha.append((node.right, False))
+            pilha.append((node.left, False))
+    return derivadas[-1]
+
+
+def _regra_unaria(node, d, variavel):
+    if node.op in ("u+", "+"):
+        return d
+    if node.op in ("u-", "-"):
+        return UnaryOpNode("u-", d)
+    raise DerivadaIndisponivel(f"'{node.op}' não tem derivada em relação a {variavel}")
+
+
+def _regra_binaria(node, du, dv, variavel):
+    op, u, v = node.op, node.left, node.right
+    if op in ("+", "-"):
+        if dv is None:
+            return du
+        if du is None:
+            return dv if op == "+" else UnaryOpNode("u-", dv)
+        return BinaryOpNode(op, du, dv)
+    if op == "*":
+        # (u v)' = u' v + u v'
+        termos = [BinaryOpNode("*", du, v) if du is not None else None,
+                  BinaryOpNode("*", u, dv) if dv is not None else None]
+        termos = [t for t in termos if t is not None]
+        return termos[0] if len(termos) == 1 else BinaryOpNode("+", *termos)
+    if op == "/":
+        # (u / v)' = u' / v - u v' / v²
+        if dv is None:
+            return BinaryOpNode("/", du, v)
+        termo = BinaryOpNode("/", BinaryOpNode("*", u, dv), BinaryOpNode("*", v, v))
+        if du is None:
+            return UnaryOpNode("u-", termo)
+        return BinaryOpNode("-", BinaryOpNode("/", du, v), termo)
+    if op == "**":
+        if dv is not None:
+            raise DerivadaIndisponivel(f"expoente depende de {variavel}")
+        # (u ** n)' = n u ** (n - 1) u'
+        potencia = BinaryOpNode("**", u, BinaryOpNode("-", v, _UM))
+        return BinaryOpNode("*", BinaryOpNode("*", v, potencia), du)
+    if op == "raiz":
+        if dv is not None:
+            raise DerivadaIndisponivel(f"ordem da raiz depende de {variavel}")
+        # raiz(u, n)' = raiz(u, n) / (n u) * u'
+        quociente = BinaryOpNode("/", node, BinaryOpNode("*", v, u))
+        return BinaryOpNode("*", quociente, du)
+    raise DerivadaIndisponivel(f"'{op}' não tem derivada em relação a {variavel}")
+
+
+# ------------------ Newton vetorizado ------------------
+def pontos_iniciais(quantidade, raio=4.0, centro=0j):
+    """`quantidade` pontos espalhados no disco de raio `raio` (espiral de
+    ângulo áureo), de modo determinístico."""
+    k = np.arange(quantidade, dtype=float) + 0.5
+    r = raio * np.sqrt(k / quantidade)
+    ang = k * (math.pi * (3.0 - math.sqrt(5.0)))
+    return centro + r * np.exp(1j * ang)
+
+
+def funcao_da_equacao(ast):
+    """AST de f tal que a equação `ast` equivale a f = 0."""
+    if isinstance(ast, BinaryOpNode) and ast.op == "=":
+        f = BinaryOpNode("-", ast.left, ast.right)
+    else:
+        f = ast
+    pilha = [f]
+    while pilha:
+        n = pilha.pop()
+        if isinstance(n, BinaryOpNode):
+            if n.op == "=":
+                raise ValueError("A equação deve ter um único '=' no nível mais externo")
+            pilha.append(n.left)
+            pilha.append(n.right)
+        elif isinstance(n, UnaryOpNode):
+            pilha.append(n.child)
+    return otimizar(f)
+
+
+def resolver(ast, variavel=None, valores=None, pontos=None, quantidade=64, raio=4.0,
+             max_iteracoes=100, tolerancia=1e-12, tolerancia_residuo=1e-8):
+    """Procura as raízes da equação `ast` ("lhs = rhs", ou f com f = 0).
+
+    `variavel` é a incógnita (pode ser omitida se a expressão só tiver uma);
+    as demais variáveis recebem valores fixos em `valores`. Newton parte de
+    `pontos` (array de complexos) ou de `quantidade` pontos no disco de
+    raio `raio`. Só são aceitas raízes com |f| < tolerancia_residuo; raízes
+    a menos de 1e-6 (relativo) uma da outra contam como a mesma.
+
+    Retorna ResultadoNewton(raizes, estatisticas).
+    """
+    if np is None:
+        raise ImportError("O resolvedor requer o pacote numpy")
+    f = funcao_da_equacao(ast)
+    nomes = set()
+    coletar_variaveis(f, nomes)
+    valores = dict(valores or {})
+    if variavel is None:
+        livres = nomes - set(valores)
+        if len(livres) != 1:
+            raise ValueError("Informe a variável a resolver: a expressão tem "
+                             f"{len(livres)} variáveis sem valor")
+        variavel = livres.pop()
+    faltando = nomes - set(valores) - {variavel}
+    if faltando:
+        raise NameError(f"Valor para variável '{sorted(faltando)[0]}' não fornecido")
+    fixos = {n: v for n, v in valores.items() if n != variavel}
+
+    try:
+        df = derivar(f, variavel)
+        tipo_derivada = "simbolica"
+    except DerivadaIndisponivel:
+        df = None
+        tipo_derivada = "numerica"
+
+    def avaliar(ast_, z):
+        return avaliar_vetorizado(ast_, {**fixos, variavel: z})
+
+    def derivada(z):
+        if df is not None:
+            return avaliar(df, z)
+        h = 1e-6 * (1.0 + np.abs(z))
+        mais = avaliar(f, z + h)
+        menos = avaliar(f, z - h)
+        return (mais.valores - menos.valores) / (2 * h), mais.erros | menos.erros
+
+    z = np.array(pontos if pontos is not None else pontos_iniciais(quantidade, raio),
+                 dtype=np.complex128).ravel()
+    n = z.size
+    iteracoes = np.zeros(n, dtype=int)
+    passo_relativo = np.full(n, np.inf)
+    estado = np.zeros(n, dtype=np.int8)   # 0 ativo, 1 convergiu, 2 falhou
+    ativos = np.arange(n)
+    with np.errstate(all="ignore"):
+        for _ in range(max_iteracoes):
+            if ativos.size == 0:
+                break
+            za = z[ativos]
+            fz, erro_f = avaliar(f, za)
+            dfz, erro_d = derivada(za)
+            passo = fz / dfz
+            falhou = erro_f | erro_d | ~np.isfinite(passo)
+            novo = za - passo
+            relativo = np.abs(passo) / (1.0 + np.abs(novo))
+            convergiu = ~falhou & (relativo <= tolerancia)
+            passo_relativo[ativos] = relativo
+            z[ativos] = np.where(falhou, za, novo)
+            iteracoes[ativos] += 1
+            estado[ativos[falhou]] = 2
+            estado[ativos[convergiu]] = 1
+            ativos = ativos[~falhou & ~convergiu]
+
+        # raízes de multiplicidade > 1 convergem devagar: aceita pelo resíduo,
+        # desde que o ponto tenha parado de andar (1/x "zera" fugindo para o
+        # infinito, com passos cada vez maiores)
+        candidatos = np.flatnonzero((estado == 1) | ((estado == 0) & (passo_relativo < 1e-6)))
+        residuo = np.full(n, np.inf)
+        if candidatos.size:
+            fz, erro_f = avaliar(f, z[candidatos])
+            residuo[candidatos] = np.where(erro_f, np.inf, np.abs(fz))
+    aceito = residuo < tolerancia_residuo
+
+    raizes, contagem = _agrupar(z[aceito])
+    estatisticas = {
+        "variavel": variavel,
+        "derivada": tipo_derivada,
+        "pontos": n,
+        "convergiram": int(aceito.sum()),
+        "falharam": int((estado == 2).sum()),
+        "sem_convergencia": int((~aceito & (estado != 2)).sum()),
+        "iteracoes_media": float(iteracoes[aceito].mean()) if aceito.any() else 0.0,
+        "iteracoes_max": int(iteracoes.max()) if n else 0,
+        "raizes_distintas": len(raizes),
+        "bacias": contagem,   # quantos pontos iniciais chegaram a cada raiz
+    }
+    return ResultadoNewton(raizes, estatisticas)
+
+
+def _agrupar(zs, tolerancia=1e-6):
+    """Raízes distintas (Complexo, ordenadas por parte real e imaginária)
+    e quantos elementos de `zs` caíram em cada uma."""
+    grupos = []   # [soma, quantidade, representante]
+    for w in sorted((complex(v) for v in zs), key=lambda w: (w.real, w.imag)):
+        for g in grupos:
+            if abs(w - g[2]) <= tolerancia * (1.0 + abs(g[2])):
+                g[0] += w
+                g[1] += 1
+                break
+        else:
+            grupos.append([w, 1, w])
+    raizes = []
+    for soma, qtd, _ in grupos:
+        m = soma / qtd
+        # zera partes que são só ruído numérico
+        a = 0.0 if abs(m.real) < 1e-12 else m.real
+        b = 0.0 if abs(m.imag) < 1e-12 else m.imag
+        raizes.append((Complexo(a, b), qtd))
+    raizes.sort(key=lambda rq: (rq[0].a, rq[0].b))
+    return [r for r, _ in raizes], [q for _, q in raizes]
@@ -0,0 +1,435 @@
+# servidor.py
+# ============================================================
+# Servidor asyncio da calculadora (TCP ou socket Unix). Cada linha
+# recebida é um registro JSON no formato do modo em lote:
+#     {"id": 1, "expr": "x**2 + 1", "vars": {"x": "1+2i"}, "lisp": true}
+# e cada linha devolvida é o resultado (ou erro) correspondente, na
+# ordem em que os pedidos chegaram na conexão. {"comando": "estatisticas"}
+# devolve os contadores do servidor e do cache.
+#
+# Os pedidos de todas as conexões são agrupados em lotes. O parse usa
+# um único CacheParse compartilhado, que guarda a AST e o bytecode de
+# cada expressão; a avaliação do bytecode vai para um pool de processos,
+# e o laço de eventos nunca executa trabalho pesado. Um lote não segura
+# as respostas prontas por mais de `retencao` segundos: o trabalhador
+# devolve o que já avaliou, e um pedido lento que passou desse prazo é
+# reenviado sozinho, depois do resto do lote, com o que sobrou do seu
+# limite de tempo. Com limites
+# (recursos.Limites), um pedido que passa de um deles recebe um erro com
+# o nome do limite em "limite" e o trabalhador continua atendendo.
+#
+# Uso:
+#   python src/servidor.py 127.0.0.1:8765
+#   python src/servidor.py unix:/tmp/calculadora.sock --processos 4
+# ============================================================
+
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+from time import monotonic
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from parser import Parser
+from cache import CacheParse
+from bytecode import codificar, executar
+from executor import (coletar_variaveis, _validar_registro, _incluir_arvores,
+                      _valores_variaveis, _registrar_erro, _mensagem_erro, _valor_json)
+from recursos import Limites, LimiteExcedido
+
+# entrada do cache: AST (para lisp/arvore), bytecode (para os trabalhadores)
+# e variáveis usadas
+Compilada = namedtuple("Compilada", "ast programa variaveis")
+
+# maior linha (pedido) aceita em uma conexão, em bytes
+_LIMITE_LINHA = 1 << 24
+
+
+class _Compilador:
+    """'Parser' do cache do servidor: devolve a expressão já compilada."""
+
+    def __init__(self, limites=None):
+        self.parser = Parser(limites=limites)
+
+    def parse(self, text):
+        ast = self.parser.parse(text)
+        variaveis = set()
+        coletar_variaveis(ast, variaveis)
+        return Compilada(ast, codificar(ast), frozenset(variaveis))
+
+
+def _avaliar_programas(itens, limites=None, retencao=None):
+    """Executado nos trabalhadores: avalia uma lista de (programa, variáveis).
+    Erros vêm como (False, mensagem, tipo, limite excedido ou None).
+
+    Com `retencao` (segundos), para de avaliar quando esse prazo passa e
+    devolve só os resultados prontos. Retorna (resultados, gasto): gasto é
+    None, ou os segundos que o item seguinte aos resultados já consumiu
+    quando chegou ao prazo no meio da avaliação (ele deve ser refeito à
+    parte).
+    """
+    resultados = []
+    prazo = None if retencao is None else monotonic() + retencao
+    for programa, vars_dict in itens:
+        lim, cortado = limites, False
+        inicio = monotonic()
+        if prazo is not None:
+            resta = prazo - inicio
+            if resta <= 0:
+                break
+            if limites is None or limites.tempo is None or limites.tempo > resta:
+                lim, cortado = _com_tempo(limites, resta), True
+        try:
+            resultados.append((True, _valor_json(executar(programa, vars_dict, limites=lim))))
+        except Exception as e:
+            if cortado and isinstance(e, LimiteExcedido) and e.limite == "tempo":
+                return resultados, monotonic() - inicio
+            resultados.append(_erro(e))
+    return resultados, None
+
+
+def _erro(e):
+    # resultado de _avaliar_programas para uma avaliação que lançou `e`
+    limite = e.limite if isinstance(e, LimiteExcedido) else None
+    return (False, _mensagem_erro(e), type(e).__name__, limite)
+
+
+def _com_tempo(limites, tempo):
+    # `limites` com o limite de tempo trocado por `tempo`
+    campos = {} if limites is None else {n: getattr(limites, n) for n in Limites.__slots__}
+    campos["tempo"] = tempo
+    return Limites(**campos)
+
+
+class Servidor:
+    """Atende pedidos JSON de várias conexões com um cache e um pool comuns.
+
+    `processos` trabalhadores avaliam os lotes (padrão: número de CPUs;
+    0 avalia em uma thread do próprio processo). Um lote junta até
+    `lote_max` pedidos que cheguem com até `espera` segundos de diferença,
+    e cada parte dele enviada a um trabalhador responde depois de no
+    máximo `retencao` segundos (None = só no fim do lote).
+    `limites` (recursos.Limites) valem para o parse e para a avaliação de
+    cada pedido.
+    """
+
+    def __init__(self, processos=None, tamanho_cache=1024, lote_max=64, espera=0.001,
+                 limites=None, retencao=0.05):
+        if processos is None:
+            processos = os.cpu_count() or 1
+        if processos < 0:
+            raise ValueError("O número de processos não pode ser negativo")
+        if lote_max < 1:
+            raise ValueError("O tamanho máximo do lote deve ser pelo menos 1")
+        if retencao is not None and not retencao > 0:
+            raise ValueError("A retenção deve ser positiva")
+        self.processos = processos
+        self.lote_max = lote_max
+        self.espera = espera
+        self.limites = limites
+        self.retencao = retencao
+        self.cache = CacheParse(tamanho=tamanho_cache, parser=_Compilador(limites))
+        self.pedidos = 0
+        self.lotes = 0
+        self._fila = None
+        self._pool = None
+        self._preparo = None
+        self._lentos = None
+        self._despacho = None
+        self._tarefas = set()
+        self._servidores = []
+
+    # ------------------ ciclo de vida ------------------
+    async def iniciar(self):
+        if self._fila is not None:
+            return
+        self._fila = asyncio.Queue()
+        # uma única thread mexe no cache: sem disputa entre lotes
+        self._preparo = ThreadPoolExecutor(max_workers=1)
+        if not self.processos:
+            # pedidos lentos avaliados fora da thread do cache, que faria
+            # o parse dos lotes seguintes esperar por eles
+            self._lentos = ThreadPoolExecutor(max_workers=1)
+        else:
+            # "spawn": fork de um processo com threads e laço de eventos ativos
+            # pode travar o filho
+            self._pool = ProcessPoolExecutor(max_workers=self.processos,
+                                             mp_context=multiprocessing.get_context("spawn"))
+            # sobe os trabalhadores já, para o primeiro lote não pagar a partida
+            loop = asyncio.get_running_loop()
+            await asyncio.gather(*(loop.run_in_executor(self._pool, _avaliar_programas, [])
+                                   for _ in range(self.processos)))
+        # lotes em andamento ao mesmo tempo (mantém o pool ocupado)
+        self._vagas = asyncio.Semaphore(2 * max(self.processos, 1))
+        self._despacho = asyncio.create_task(self._despachar())
+
+    async def escutar_tcp(self, host="127.0.0.1", porta=0):
+        """Começa a aceitar conexões TCP; retorna o asyncio.Server."""
+        await self.iniciar()
+        servidor = await asyncio.start_server(self._conexao, host, porta, limit=_LIMITE_LINHA)
+        self._servidores.append(servidor)
+        return servidor
+
+    async def escutar_unix(self, caminho):
+        await self.iniciar()
+        servidor = await asyncio.start_unix_server(self._conexao, caminho, limit=_LIMITE_LINHA)
+        self._servidores.append(servidor)
+        return servidor
+
+    async def fechar(self):
+        for servidor in self._servidores:
+            servidor.close()
+            await servidor.wait_closed()
+        self._servidores.clear()
+        if self._despacho is not None:
+            self._despacho.cancel()
+            await asyncio.gather(self._despacho, *self._tarefas, return_exceptions=True)
+            self._despacho = None
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        if self._preparo is not None:
+            self._preparo.shutdown()
+            self._preparo = None
+        if self._lentos is not None:
+            self._lentos.shutdown()
+            self._lentos = None
+        self._fila = None
+
+    async def __aenter__(self):
+        await self.iniciar()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.fechar()
+
+    # ------------------ pedidos ------------------
+    async def avaliar(self, registro):
+        """Resultado de um registro (mesmo formato de executor.avaliar_registro)."""
+        await self.iniciar()
+        futuro = asyncio.get_running_loop().create_future()
+        self._fila.put_nowait((registro, futuro))
+        return await futuro
+
+    def estatisticas(self):
+        return {"pedidos": self.pedidos, "lotes": self.lotes, "processos": self.processos,
+                "cache": self.cache.estatisticas()}
+
+    async def _despachar(self):
+        fila = self._fila
+        while True:
+            lote = [await fila.get()]
+            esperou = False
+            while len(lote) < self.lote_max:
+                try:
+                    lote.append(fila.get_nowait())
+                except asyncio.QueueEmpty:
+                    if esperou or not self.espera:
+                        break
+                    await asyncio.sleep(self.espera)
+                    esperou = True
+            await self._vagas.acquire()
+            tarefa = asyncio.create_task(self._processar(lote))
+            self._tarefas.add(tarefa)
+            tarefa.add_done_callback(self._fim_lote)
+
+    def _fim_lote(self, tarefa):
+        self._tarefas.discard(tarefa)
+        self._vagas.release()
+
+    async def _processar(self, lote):
+        self.pedidos += len(lote)
+        self.lotes += 1
+        futuros = [f for _, f in lote]
+        try:
+            loop = asyncio.get_running_loop()
+            saidas, itens, posicoes = await loop.run_in_executor(
+                self._preparo, self._preparar, [r for r, _ in lote])
+            # os pedidos sem nada a avaliar (erros de parse etc.) já saem
+            avaliar = set(posicoes)
+            for i, (futuro, saida) in enumerate(zip(futuros, saidas)):
+                if i not in avaliar and not futuro.done():
+                    futuro.set_result(saida)
+            if itens:
+                await self._avaliar_itens(list(zip(posicoes, itens)), futuros, saidas,
+                                          self.retencao)
+        except Exception as e:
+            # pool quebrado ou encerrado: os pedidos ainda sem resposta recebem o erro
+            saidas = []
+            for _ in lote:
+                saida = {}
+                _registrar_erro(saida, e)
+                saidas.append(saida)
+        for futuro, saida in zip(futuros, saidas):
+            if not futuro.done():
+                futuro.set_result(saida)
+
+    async def _avaliar_itens(self, pendentes, futuros, saidas, retencao):
+        """Avalia os (posição, item) pendentes de um lote, respondendo cada
+        parte assim que o trabalhador a devolve. Um item interrompido pela
+        retenção é refeito à parte (_avaliar_lento), junto com o resto do
+        lote."""
+        loop = asyncio.get_running_loop()
+        executor = self._pool if self._pool is not None else self._preparo
+        while pendentes:
+            resultados, gasto = await loop.run_in_executor(
+                executor, _avaliar_programas, [item for _, item in pendentes],
+                self.limites, retencao)
+            self._responder_itens(pendentes, resultados, futuros, saidas)
+            pendentes = pendentes[len(resultados):]
+            if gasto is not None:
+                lento, pendentes = pendentes[0], pendentes[1:]
+                await asyncio.gather(self._avaliar_itens(pendentes, futuros, saidas, retencao),
+                                     self._avaliar_lento(lento, gasto, futuros, saidas))
+                return
+
+    async def _avaliar_lento(self, pendente, gasto, futuros, saidas):
+        """Refaz sem prazo de retenção o (posição, item) interrompido depois
+        de `gasto` segundos, no pool ou, sem ele, em uma thread separada.
+        O limite de tempo do pedido desconta o que já foi gasto."""
+        limites = self.limites
+        if limites is not None and limites.tempo is not None:
+            if gasto >= limites.tempo:
+                erro = _erro(LimiteExcedido("tempo", limites.tempo))
+                self._responder_itens([pendente], [erro], futuros, saidas)
+                return
+            limites = _com_tempo(limites, limites.tempo - gasto)
+        executor = self._pool if self._pool is not None else self._lentos
+        resultados, _ = await asyncio.get_running_loop().run_in_executor(
+            executor, _avaliar_programas, [pendente[1]], limites)
+        if not resultados[0][0] and resultados[0][3] == "tempo":
+            # o erro informa o limite do pedido, não o que restava dele
+            resultados = [_erro(LimiteExcedido("tempo", self.limites.tempo))]
+        self._responder_itens([pendente], resultados, futuros, saidas)
+
+    @staticmethod
+    def _responder_itens(pendentes, resultados, futuros, saidas):
+        for (i, _), r in zip(pendentes, resultados):
+            saida = saidas[i]
+            if r[0]:
+                saida["resultado"] = r[1]
+            else:
+                saida["erro"], saida["tipo_erro"] = r[1], r[2]
+                if r[3] is not None:
+                    saida["limite"] = r[3]
+            if not futuros[i].done():
+                futuros[i].set_result(saida)
+
+    def _preparar(self, registros):
+        """Parse (pelo cache), lisp/arvore e variáveis de cada registro.
+        Retorna as saídas parciais e o que falta avaliar."""
+        saidas, itens, posicoes = [], [], []
+        for i, registro in enumerate(registros):
+            saida = {}
+            saidas.append(saida)
+            try:
+                expr, valores = _validar_registro(registro, saida)
+                compilada = self.cache.parse(expr)
+                _incluir_arvores(compilada.ast, saida, registro.get("lisp") is True,
+                                 registro.get("arvore") is True)
+                vars_dict = _valores_variaveis(compilada.variaveis, valores)
+            except Exception as e:
+                _registrar_erro(saida, e)
+                continue
+            itens.append((compilada.programa, vars_dict))
+            posicoes.append(i)
+        return saidas, itens, posicoes
+
+    # ------------------ conexões ------------------
+    async def _conexao(self, leitor, escritor):
+        respostas = asyncio.Queue()
+        escrita = asyncio.create_task(self._responder(respostas, escritor))
+        try:
+            while True:
+                linha = await leitor.readline()
+                if not linha:
+                    break
+                if not linha.strip():
+                    continue
+                respostas.put_nowait(self._receber(linha))
+        except ValueError:
+            # linha maior que o limite: o pedido recebe um erro e a conexão
+            # é encerrada
+            futuro = asyncio.get_running_loop().create_future()
+            futuro.set_result({"erro": f"Linha maior que o limite de {_LIMITE_LINHA} bytes",
+                               "tipo_erro": "ValueError"})
+            respostas.put_nowait(futuro)
+        except ConnectionError:
+            pass  # conexão caiu
+        finally:
+            respostas.put_nowait(None)
+            await escrita
+            escritor.close()
+            try:
+                await escritor.wait_closed()
+            except ConnectionError:
+                pass
+
+    def _receber(self, linha):
+        """Futuro com a resposta de uma linha recebida (ou, para o comando
+        de estatísticas, a função que a calcula na hora de responder)."""
+        futuro = asyncio.get_running_loop().create_future()
+        try:
+            registro = json.loads(linha)
+        except ValueError as e:
+            futuro.set_result({"erro": f"JSON inválido: {e}", "tipo_erro": "JSONDecodeError"})
+            return futuro
+        if isinstance(registro, dict) and registro.get("comando") == "estatisticas":
+            return self.estatisticas
+        self._fila.put_nowait((registro, futuro))
+        return futuro
+
+    async def _responder(self, respostas, escritor):
+        # respostas saem na ordem dos pedidos da conexão
+        while True:
+            futuro = await respostas.get()
+            if futuro is None:
+                return
+            # estatísticas são lidas depois das respostas anteriores
+            resposta = futuro() if callable(futuro) else await futuro
+            try:
+                escritor.write(json.dumps(resposta, ensure_ascii=False).encode("utf-8") + b"\n")
+                if respostas.empty():
+                    await escritor.drain()
+            except ConnectionError:
+                pass
+
+
+# ------------------ linha de comando ------------------
+async def _servir(endereco, **opcoes):
+    async with Servidor(**opcoes) as servidor:
+        if endereco.startswith("unix:"):
+            srv = await servidor.escutar_unix(endereco[len("unix:"):])
+        else:
+            host, _, porta = endereco.rpartition(":")
+            srv = await servidor.escutar_tcp(host or "127.0.0.1", int(porta))
+        nomes = ", ".join(str(s.getsockname()) for s in srv.sockets)
+        print(f"Servindo em {nomes}", file=sys.stderr, flush=True)
+        await srv.serve_forever()
+
+
+def servir(endereco, processos=None, tamanho_cache=1024, lote_max=64, limites=None):
+    """Atende em `endereco` ("host:porta", "porta" ou "unix:caminho") até Ctrl+C."""
+    try:
+        asyncio.run(_servir(endereco, processos=processos, tamanho_cache=tamanho_cache,
+                            lote_max=lote_max, limites=limites))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Servidor da calculadora de números complexos")
+    ap.add_argument("endereco", help='"host:porta", "porta" ou "unix:caminho"')
+    ap.add_argument("--processos", type=int, metavar="N",
+                    help="processos trabalhadores (padrão: número de CPUs; 0 = sem pool)")
+    ap.add_argument("--cache", type=int, default=1024, metavar="N", help="expressões no cache (padrão: 1024)")
+    ap.add_argument("--lote-max", type=int, default=64, metavar="N",
+                    help="pedidos por lote enviado ao pool (padrão: 64)")
+    ap.add_argument("--limites", type=Limites.de_texto, metavar="NOME=VALOR,...",
+                    help='limites por pedido, ex.: "tokens=10000,operacoes=1000000,tempo=0.5"')
+    args = ap.parse_args()
+    servir(args.endereco, args.processos, args.cache, args.lote_max, args.limites)
@@ -0,0 +1,179 @@
+# sessao.py
+# ============================================================
+# Reavaliação incremental de uma AST. A sessão guarda a árvore, os
+# valores atuais das variáveis e o valor de cada subárvore. Ao mudar
+# uma variável, só os nós que dependem dela (diretamente ou por um
+# descendente) são recalculados; os demais são reaproveitados.
+#
+# Uso:
+#     s = SessaoAvaliacao(Parser().parse("x * y + conj(x)"), {"x": ..., "y": ...})
+#     s.avaliar()
+#     s.definir("y", Complexo(2, 0))
+#     s.avaliar()          # recalcula só y, x * y e a soma
+#     s.estatisticas()
+# ============================================================
+
+from parser import NumberNode, VariableNode, UnaryOpNode, BinaryOpNode, SeriesNode
+from executor import (OPERADORES_UNARIOS, OPERADORES_BINARIOS, _operador_desconhecido,
+                      coletar_variaveis, funcao_serie)
+
+_VAZIO = frozenset()
+
+
+class _Erro:
+    """Exceção guardada como valor de um nó: quem depende dele falha igual."""
+    __slots__ = ("excecao",)
+
+    def __init__(self, excecao):
+        self.excecao = excecao
+
+
+class SessaoAvaliacao:
+    """Avalia `ast` com as variáveis em `valores`, guardando o valor de cada
+    subárvore entre uma avaliação e outra.
+
+    Resultados e erros são os mesmos de executor.eval_node(ast, valores):
+    uma subárvore que falha guarda a exceção, e o nó pai repassa a do filho
+    da esquerda antes da do filho da direita, como na avaliação completa.
+    Subárvores compartilhadas (ver dag.para_dag) são calculadas uma vez.
+    """
+
+    def __init__(self, ast, valores=None):
+        self.ast = ast
+        self.valores = dict(valores) if valores else {}
+        self.variaveis = set()
+        coletar_variaveis(ast, self.variaveis)
+
+        # nós em pós-ordem: os filhos sempre vêm antes do pai
+        self._nos = []           # (nó, função, índices dos filhos)
+        self._dependentes = {}   # variável -> índices dos nós que dependem dela
+        indices = {}             # id(nó) -> índice em self._nos
+        deps = []                # índice -> variáveis de que o nó depende
+        pilha = [(ast, False)]
+        while pilha:
+            node, expandido = pilha.pop()
+            if id(node) in indices:
+                continue
+            if isinstance(node, UnaryOpNode):
+                filhos = (node.child,)
+            elif isinstance(node, BinaryOpNode):
+                filhos = (node.left, node.right)
+            elif isinstance(node, SeriesNode):
+                # o termo é avaliado por somatorio a cada k: só os limites
+                # viram nós da sessão
+                filhos = (node.start, node.end)
+            elif isinstance(node, (NumberNode, VariableNode)):
+                filhos = ()
+            else:
+                raise TypeError("Nó AST desconhecido")
+            if filhos and not expandido:
+                pilha.append((node, True))
+                for filho in reversed(filhos):
+                    pilha.append((filho, False))
+                continue
+
+            filhos = tuple(indices[id(f)] for f in filhos)
+            if isinstance(node, VariableNode):
+                fn = None
+                d = frozenset((node.name,))
+            elif isinstance(node, NumberNode):
+                fn = None
+                d = _VAZIO
+            elif isinstance(node, SeriesNode):
+                fn = funcao_serie(node, self.valores)
+                livres = set()
+                coletar_variaveis(node, livres)
+                d = frozenset(livres)
+            elif len(filhos) == 1:
+                fn = OPERADORES_UNARIOS.get(node.op)
+                if fn is None:
+                    fn = _operador_desconhecido("unário", node.op)
+                d = deps[filhos[0]]
+            else:
+                fn = OPERADORES_BINARIOS.get(node.op)
+                if fn is None:
+                    fn = _operador_desconhecido("binário", node.op)
+                de, dd = deps[filhos[0]], deps[filhos[1]]
+                d = de if dd <= de else dd if de <= dd else de | dd
+
+            i = len(self._nos)
+            indices[id(node)] = i
+            self._nos.append((node, fn, filhos))
+            deps.append(d)
+            for nome in d:
+                self._dependentes.setdefault(nome, []).append(i)
+
+        self._cache = [None] * len(self._nos)
+        self._sujos = set(range(len(self._nos)))
+        self.recalculados = 0      # nós calculados na última avaliação
+        self.reaproveitados = 0    # nós cujo valor guardado foi reusado
+        self.total_recalculados = 0
+        self.total_reaproveitados = 0
+
+    def __len__(self):
+        return len(self._nos)
+
+    # ------------------ variáveis ------------------
+    def definir(self, nome, valor):
+        """Muda o valor de uma variável, invalidando só os nós que dependem dela."""
+        self.valores[nome] = valor
+        self._sujos.update(self._dependentes.get(nome, ()))
+
+    def atualizar(self, valores=None, **kwargs):
+        """Como definir, para várias variáveis de uma vez."""
+        for origem in (valores or {}), kwargs:
+            for nome, valor in origem.items():
+                self.definir(nome, valor)
+
+    def remover(self, nome):
+        """Remove a variável (avaliar passa a lançar NameError, se ela for usada)."""
+        if nome in self.valores:
+            del self.valores[nome]
+            self._sujos.update(self._dependentes.get(nome, ()))
+
+    # ------------------ avaliação ------------------
+    def avaliar(self):
+        """Valor da AST com as variáveis atuais (Complexo ou bool para '=')."""
+        cache = self._cache
+        nos = self._nos
+        valores = self.valores
+        sujos = sorted(self._sujos)
+        for i in sujos:
+            node, fn, filhos = nos[i]
+            if fn is None:
+                if isinstance(node, NumberNode):
+                    cache[i] = node.value
+                elif node.name in valores:
+                    cache[i] = valores[node.name]
+                else:
+                    cache[i] = _Erro(NameError(f"Valor para variável '{node.name}' não fornecido"))
+                continue
+            args = [cache[j] for j in filhos]
+            erro = next((a for a in args if type(a) is _Erro), None)
+            if erro is not None:
+                cache[i] = erro
+                continue
+            try:
+                cache[i] = fn(*args)
+            except Exception as e:
+                cache[i] = _Erro(e)
+        self._sujos.clear()
+
+        self.recalculados = len(sujos)
+        self.reaproveitados = len(nos) - len(sujos)
+        self.total_recalculados += self.recalculados
+        self.total_reaproveitados += self.reaproveitados
+
+        resultado = cache[-1]
+        if type(resultado) is _Erro:
+            raise resultado.excecao
+        return resultado
+
+    def estatisticas(self):
+        return {
+            "nos": len(self._nos),
+            "recalculados": self.recalculados,
+            "reaproveitados": self.reaproveitados,
+            "total_recalculados": self.total_recalculados,
+            "total_reaproveitados": self.total_reaproveitados,
+        }
@@ -0,0 +1,338 @@
+# somatorio.py
+# ============================================================
+# Avaliação de soma(expr, k, inicio, fim) e produto(expr, k, inicio, fim)
+# (SeriesNode). O intervalo de k nunca vira uma cadeia de nós na AST:
+#   - formas fechadas: termo constante e termo geométrico
+#     c * r**(a + b*k) (a e b inteiros) na soma e no produto, e termo
+#     aritmético a + b*k na soma, são calculados sem percorrer k;
+#   - os demais termos são avaliados em lotes de k: com numpy, cada
+#     lote é um array para vetorizado.avaliar_vetorizado; sem numpy (ou
+#     com soma/produto aninhados no termo), a expressão compilada é
+#     chamada para cada k.
+# O resultado é o de somar (multiplicar) os termos um a um, a menos de
+# arredondamento. Um termo que falha lança a mesma exceção que
+# eval_node lançaria para ele; intervalo vazio dá 0 (soma) ou 1 (produto).
+# Com um orçamento (recursos.Orcamento), cada termo fora das formas
+# fechadas é descontado dele, então um intervalo enorme para no limite de
+# operações ou de tempo em vez de travar a avaliação.
+# ============================================================
+
+import cmath
+
+try:
+    import numpy as np
+except ImportError:  # numpy é opcional para o resto da calculadora
+    np = None
+
+from parser import NumberNode, VariableNode, UnaryOpNode, BinaryOpNode, SeriesNode, contar_nos
+from complexos import Complexo
+from executor import coletar_variaveis, eval_node
+
+# valores de k por lote (na avaliação vetorizada, elementos por lote:
+# k vezes o tamanho dos arrays)
+LOTE = 4096
+
+# profundidade máxima examinada ao procurar uma forma fechada
+_PROFUNDIDADE_PADRAO = 32
+
+# razão mais próxima de 1 que isso: (q**n - 1)/(q - 1) perde precisão
+_TOL_RAZAO = 1e-6
+
+_UM = NumberNode(Complexo(1.0, 0.0))
+
+
+def limites(op, inicio, fim):
+    """Converte os valores dos limites em inteiros (ValueError se não forem
+    inteiros reais)."""
+    saida = []
+    for v in (inicio, fim):
+        if not isinstance(v, Complexo) or v.b != 0 or not float(v.a).is_integer():
+            raise ValueError(f"Os limites de {op} devem ser inteiros reais: {v}")
+        saida.append(int(v.a))
+    return saida
+
+
+def avaliar_serie(node, vars_dict, inicio, fim, backend=None, orcamento=None):
+    """Valor do SeriesNode `node` com os limites já avaliados.
+
+    Com um `backend` numérico (ver backends), os termos são avaliados e
+    acumulados um a um nele, sem formas fechadas nem lotes. Com um
+    `orcamento`, os termos avaliados são descontados dele.
+    """
+    if backend is not None and backend.nome != "complexo":
+        return _no_backend(node, vars_dict, inicio, fim, backend, orcamento)
+    a, b = limites(node.op, inicio, fim)
+    n = b - a + 1
+    if n <= 0:
+        return Complexo(0.0, 0.0) if node.op == "soma" else Complexo(1.0, 0.0)
+    valor = _forma_fechada(node, vars_dict, a, n)
+    if valor is not None:
+        return valor
+    return _em_lotes(node, vars_dict, a, b, orcamento)
+
+
+# ------------------ formas fechadas ------------------
+def _sem_indice(node, indice):
+    # não usa k nem '=' (o termo precisa ser numérico para as fórmulas)
+    nomes = set()
+    coletar_variaveis(node, nomes)
+    if indice in nomes:
+        return False
+    pilha = [node]
+    while pilha:
+        n = pilha.pop()
+        if isinstance(n, BinaryOpNode):
+            if n.op == "=":
+                return False
+            pilha.append(n.left)
+            pilha.append(n.right)
+        elif isinstance(n, UnaryOpNode):
+            pilha.append(n.child)
+        elif isinstance(n, SeriesNode):
+            pilha.extend((n.body, n.start, n.end))
+    return True
+
+
+def _combinar(op, x, y):
+    # x op y, com None no lugar de zero
+    if y is None:
+        return x
+    if x is None:
+        return y if op == "+" else UnaryOpNode("u-", y)
+    return BinaryOpNode(op, x, y)
+
+
+def _escalar(op, x, fator):
+    return None if x is None else BinaryOpNode(op, x, fator)
+
+
+def _afim(node, indice, prof=0):
+    """(c0, c1) tais que node = c0 + c1*k, sem k em c0 e c1 (None = zero);
+    None se o termo não tiver essa forma."""
+    if prof > _PROFUNDIDADE_PADRAO:
+        return None
+    if _sem_indice(node, indice):
+        return node, None
+    if isinstance(node, VariableNode):
+        return None, _UM
+    if isinstance(node, UnaryOpNode):
+        if node.op not in ("u+", "+", "u-", "-"):
+            return None
+        r = _afim(node.child, indice, prof + 1)
+        if r is None or node.op in ("u+", "+"):
+            return r
+        return tuple(None if c is None else UnaryOpNode("u-", c) for c in r)
+    if not isinstance(node, BinaryOpNode):
+        return None
+    op = node.op
+    if op in ("+", "-"):
+        left = _afim(node.left, indice, prof + 1)
+        right = left and _afim(node.right, indice, prof + 1)
+        if right is None:
+            return None
+        return _combinar(op, left[0], right[0]), _combinar(op, left[1], right[1])
+    if op == "*" and _sem_indice(node.left, indice):
+        r = _afim(node.right, indice, prof + 1)
+        return r and (_escalar("*", r[0], node.left), _escalar("*", r[1], node.left))
+    if op in ("*", "/") and _sem_indice(node.right, indice):
+        r = _afim(node.left, indice, prof + 1)
+        return r and (_escalar(op, r[0], node.right), _escalar(op, r[1], node.right))
+    return None
+
+
+def _geometrico(node, indice, prof=0):
+    """(coef, base, c0, c1) tais que node = coef * base**(c0 + c1*k), com c1
+    não nulo (coef e c0 None = 1 e 0); None se o termo não tiver essa forma."""
+    if prof > _PROFUNDIDADE_PADRAO or not isinstance(node, (UnaryOpNode, BinaryOpNode)):
+        return None
+    if isinstance(node, UnaryOpNode):
+        if node.op not in ("u+", "+", "u-", "-"):
+            return None
+        r = _geometrico(node.child, indice, prof + 1)
+        if r is None or node.op in ("u+", "+"):
+            return r
+        coef = UnaryOpNode("u-", r[0] if r[0] is not None else _UM)
+        return (coef,) + r[1:]
+    op = node.op
+    if op == "**" and _sem_indice(node.left, indice):
+        expoente = _afim(node.right, indice, prof + 1)
+        if expoente is None or expoente[1] is None:
+            return None
+        return (None, node.left) + expoente
+    if op == "*" and _sem_indice(node.left, indice):
+        fator, outro = node.left, node.right
+    elif op in ("*", "/") and _sem_indice(node.right, indice):
+        fator, outro = node.right, node.left
+    else:
+        return None
+    r = _geometrico(outro, indice, prof + 1)
+    if r is None:
+        return None
+    coef = r[0] if r[0] is not None else _UM
+    return (BinaryOpNode(op, coef, fator),) + r[1:]
+
+
+def _inteiro(v):
+    if isinstance(v, Complexo) and v.b == 0 and float(v.a).is_integer():
+        return int(v.a)
+    return None
+
+
+def _forma_fechada(node, vars_dict, a, n):
+    """Valor por fórmula, ou None se o termo não tiver forma fechada."""
+    body, indice = node.body, node.index
+    if _sem_indice(body, indice):
+        c = eval_node(body, vars_dict)
+        if node.op == "soma":
+            return c * Complexo(float(n), 0.0)
+        try:
+            return Complexo._cast(c) ** n
+        except OverflowError:
+            return None
+
+    if node.op == "soma":
+        afim = _afim(body, indice)
+        if afim is not None:
+            # n*c0 + c1*(a + ... + b), com a + ... + b = n*(2a + n - 1)/2
+            c0, c1 = (eval_node(c, vars_dict) if c is not None else None for c in afim)
+            total = c1 * Complexo(float(n * (2 * a + n - 1) // 2), 0.0)
+            return total if c0 is None else c0 * Complexo(float(n), 0.0) + total
+
+    geo = _geometrico(body, indice)
+    if geo is None:
+        return None
+    coef, base, c0, c1 = (eval_node(c, vars_dict) if c is not None else None for c in geo)
+    e0 = 0 if c0 is None else _inteiro(c0)
+    e1 = _inteiro(c1)
+    if e0 is None or e1 is None or not isinstance(base, Complexo) or (base.a == 0 and base.b == 0):
+        return None   # expoente não inteiro ou base nula: termo a termo
+    try:
+        q = base ** e1
+        primeiro = base ** (e0 + e1 * a)
+        if coef is not None:
+            primeiro = coef * primeiro
+        if node.op == "produto":
+            # t_a * (t_a q) * ... * (t_a q**(n-1))
+            return primeiro ** n * q ** (n * (n - 1) // 2)
+        if q.a == 1 and q.b == 0:
+            return primeiro * Complexo(float(n), 0.0)
+        if abs(q.a - 1) < _TOL_RAZAO and abs(q.b) < _TOL_RAZAO:
+            return None
+        return primeiro * (q ** n - Complexo(1.0, 0.0)) / (q - Complexo(1.0, 0.0))
+    except OverflowError:
+        return None   # a fórmula estoura antes da soma termo a termo
+
+
+# ------------------ avaliação em lotes ------------------
+def _tem_serie(node):
+    pilha = [node]
+    while pilha:
+        n = pilha.pop()
+        if isinstance(n, SeriesNode):
+            return True
+        if isinstance(n, BinaryOpNode):
+            pilha.append(n.left)
+            pilha.append(n.right)
+        elif isinstance(n, UnaryOpNode):
+            pilha.append(n.child)
+    return False
+
+
+def _em_lotes(node, vars_dict, a, b, orcamento=None):
+    soma = node.op == "soma"
+    if np is None or _tem_serie(node.body) or not all(
+            isinstance(v, Complexo) for v in vars_dict.values()):
+        return _termo_a_termo(node, vars_dict, a, b, Complexo(0.0 if soma else 1.0, 0.0),
+                              orcamento)
+
+    from vetorizado import avaliar_vetorizado
+
+    total = 0j if soma else 1 + 0j
+    arrays = dict(vars_dict)
+    custo = contar_nos(node.body)
+    for inicio in range(a, b + 1, LOTE):
+        fim = min(inicio + LOTE - 1, b)
+        if orcamento is not None:
+            orcamento.gastar((fim - inicio + 1) * custo)
+        arrays[node.index] = np.arange(inicio, fim + 1, dtype=np.float64)
+        valores, erros = avaliar_vetorizado(node.body, arrays)
+        if not erros.any():
+            with np.errstate(all="ignore"):
+                valores = valores.astype(np.complex128, copy=False)
+                lote = complex(valores.sum()) if soma else complex(valores.prod())
+            novo = total + lote if soma else total * lote
+            if cmath.isfinite(lote) and cmath.isfinite(novo):
+                total = novo
+                continue
+        # refaz o lote termo a termo: lança a exceção do primeiro termo
+        # que falha e, se a redução estourou, chega ao mesmo inf/nan que
+        # Complexo (os termos voltam a ser descontados do orçamento)
+        parcial = _termo_a_termo(node, vars_dict, inicio, fim,
+                                 Complexo(total.real, total.imag), orcamento)
+        total = complex(parcial.a, parcial.b)
+    return Complexo(total.real, total.imag)
+
+
+def _termo_a_termo(node, vars_dict, a, b, total, orcamento=None):
+    from compilar import compilar_ast
+
+    if orcamento is None:
+        fn = compilar_ast(node.body)
+    else:
+        # cada operação do termo (e de soma/produto aninhados) é descontada
+        def fn(valores):
+            return eval_node(node.body, valores, limites=orcamento)
+    local = dict(vars_dict)
+    indice = node.index
+    soma = node.op == "soma"
+    for k in range(a, b + 1):
+        local[indice] = Complexo(float(k), 0.0)
+        termo = fn(local)
+        total = total + termo if soma else total * termo
+    return total
+
+
+def _no_backend(node, vars_dict, inicio, fim, backend, orcamento=None):
+    a, b = limites(node.op, backend.para_complexo(inicio), backend.para_complexo(fim))
+    soma = node.op == "soma"
+    operacao = backend.binarios["+" if soma else "*"]
+    total = backend.numero(0.0 if soma else 1.0, 0.0)
+    local = dict(vars_dict)
+    for k in range(a, b + 1):
+        local[node.index] = backend.numero(float(k), 0.0)
+        total = operacao(total, eval_node(node.body, local, backend, orcamento))
+    return total
+
+
+# ------------------ avaliação vetorizada ------------------
+def avaliar_serie_vetorizada(node, inicio, fim, avaliar, arrays, forma):
+    """SeriesNode dentro de vetorizado._avaliar: `inicio`/`fim` são os
+    arrays dos limites, que precisam ser iguais em todo o lote; o termo é
+    avaliado com um eixo a mais para k e reduzido nesse eixo. Cada lote
+    de k tem no máximo LOTE elementos (ao menos um k por lote), então a
+    memória dos temporários não cresce com o intervalo."""
+    if inicio.size == 0:
+        return np.zeros(forma, dtype=np.complex128), np.zeros(forma, dtype=bool)
+    primeiro_inicio, primeiro_fim = inicio.flat[0], fim.flat[0]
+    if np.any(inicio != primeiro_inicio) or np.any(fim != primeiro_fim):
+        raise ValueError(f"Os limites de {node.op} devem ser os mesmos em todo o lote")
+    a, b = limites(node.op, Complexo(primeiro_inicio.real, primeiro_inicio.imag),
+                   Complexo(primeiro_fim.real, primeiro_fim.imag))
+    soma = node.op == "soma"
+    total = np.full(forma, 0j if soma else 1 + 0j)
+    erros = np.zeros(forma, dtype=bool)
+    # as variáveis já se alinham à direita com (k,) + forma por broadcasting;
+    # só k ganha a forma (lote, 1, ..., 1)
+    expandidos = dict(arrays)
+    extra = (1,) * len(forma)
+    passo = max(1, LOTE // max(1, int(np.prod(forma))))
+    for i0 in range(a, b + 1, passo):
+        i1 = min(i0 + passo - 1, b)
+        expandidos[node.index] = np.arange(i0, i1 + 1, dtype=np.complex128).reshape((-1,) + extra)
+        valores, erros_lote = avaliar(node.body, expandidos, (i1 - i0 + 1,) + forma)
+        if valores.dtype == np.bool_:
+            valores = valores.astype(np.complex128)
+        valores = np.broadcast_to(valores, (i1 - i0 + 1,) + forma)
+        total = total + valores.sum(axis=0) if soma else total * valores.prod(axis=0)
+        erros |= np.broadcast_to(erros_lote, (i1 - i0 + 1,) + forma).any(axis=0)
+    return total, erros
@@ -0,0 +1,190 @@
+# vetorizado.py
+# ============================================================
+# Avaliação de uma AST sobre arrays NumPy (complex128) de valores
+# para as variáveis: cada nó é calculado uma vez para o lote inteiro.
+# Segue a semântica de Complexo; divisão por zero e 0 elevado a
+# potência negativa não interrompem o lote, apenas marcam o elemento
+# na máscara de erros.
+# ============================================================
+
+from collections import namedtuple
+
+try:
+    import numpy as np
+except ImportError:  # numpy é opcional para o resto da calculadora
+    np = None
+
+from parser import NumberNode, VariableNode, UnaryOpNode, BinaryOpNode, SeriesNode
+from complexos import Complexo
+
+# valores: array complex128 (ou bool, para '='); erros: array bool
+ResultadoLote = namedtuple("ResultadoLote", ["valores", "erros"])
+
+# mesmas tolerâncias de Complexo
+_TOL_ZERO = 1e-15
+_TOL_IGUAL = 1e-9
+
+
+def _para_array(valor):
+    if isinstance(valor, Complexo):
+        valor = complex(valor.a, valor.b)
+    return np.asarray(valor, dtype=np.complex128)
+
+
+def _como_complexo(valor):
+    # resultado de '=' (bool) usado como número vale 0 ou 1, como em Complexo
+    if valor.dtype == np.bool_:
+        return valor.astype(np.complex128)
+    return valor
+
+
+# ------------------ operações ------------------
+def _dividir(left, right):
+    c, d = right.real, right.imag
+    erro = (np.abs(c) < _TOL_ZERO) & (np.abs(d) < _TOL_ZERO)
+    den = c * c + d * d
+    a, b = left.real, left.imag
+    valores = ((a * c + b * d) / den) + 1j * ((b * c - a * d) / den)
+    return valores, erro
+
+
+def _potencia(base, expoente):
+    """base ** expoente elemento a elemento, como Complexo.__pow__."""
+    a, b = base.real, base.imag
+    wa, wb = expoente.real, expoente.imag
+    r = np.hypot(a, b)
+    theta = np.arctan2(b, a)
+    zero = r == 0
+
+    # expoente inteiro real -> De Moivre
+    inteiro = (wb == 0) & (np.floor(wa) == wa)
+    rn = r ** wa
+    ang_int = wa * theta
+    v_int = rn * np.cos(ang_int) + 1j * (rn * np.sin(ang_int))
+
+    # caso geral: z^w = exp(w * ln z)
+    ln_r = np.log(r)
+    x = wa * ln_r - wb * theta
+    y = wa * theta + wb * ln_r
+    expx = np.exp(x)
+    v_geral = expx * np.cos(y) + 1j * (expx * np.sin(y))
+    # base nula fora do caso inteiro: 0^0 = 1, demais casos -> 0
+    v_geral = np.where(zero, np.where((wa == 0) & (wb == 0), 1 + 0j, 0j), v_geral)
+
+    valores = np.where(inteiro, v_int, v_geral)
+    erro = zero & (wb == 0) & (wa < 0)
+    # Complexo lança OverflowError quando a magnitude estoura
+    erro |= ~np.isfinite(valores) & np.isfinite(base) & np.isfinite(expoente)
+    return valores, erro
+
+
+def _raiz(base, ordem):
+    # raiz(base, ordem) -> base ** (1/ordem)
+    inverso, erro_div = _dividir(np.ones_like(ordem), ordem)
+    valores, erro = _potencia(base, inverso)
+    return valores, erro | erro_div
+
+
+def _igual(left, right):
+    d = left - right
+    return (np.abs(d.real) < _TOL_IGUAL) & (np.abs(d.imag) < _TOL_IGUAL), None
+
+
+_BINARIOS = {
+    "+": lambda l, r: (l + r, None),
+    "-": lambda l, r: (l - r, None),
+    "*": lambda l, r: (l * r, None),
+    "/": _dividir,
+    "**": _potencia,
+    "raiz": _raiz,
+    "=": _igual,
+}
+
+
+# ------------------ avaliador ------------------
+def _avaliar(node, arrays, forma):
+    """(valores, erros) de `node`. Pós-ordem com pilha explícita, como
+    executor._avaliar: a pilha guarda nós a expandir e pares (nó, aridade)
+    a aplicar sobre os últimos resultados, então a profundidade da AST não
+    é limitada pela recursão do Python."""
+    pilha = [node]
+    resultados = []
+    while pilha:
+        node = pilha.pop()
+        if type(node) is tuple:
+            node, aridade = node
+            if aridade == 1:
+                resultados[-1] = _unario(node.op, *resultados[-1])
+            else:
+                right, erros_r = resultados.pop()
+                left, erros_l = resultados[-1]
+                if isinstance(node, SeriesNode):
+                    from somatorio import avaliar_serie_vetorizada
+
+                    valores, erros = avaliar_serie_vetorizada(
+                        node, np.broadcast_to(left, forma), np.broadcast_to(right, forma),
+                        _avaliar, arrays, forma)
+                    resultados[-1] = valores, erros | erros_l | erros_r
+                    continue
+                fn = _BINARIOS.get(node.op)
+                if fn is None:
+                    raise ValueError(f"Operador binário desconhecido: {node.op}")
+                valores, erro = fn(_como_complexo(left), _como_complexo(right))
+                erros = erros_l | erros_r
+                if erro is not None:
+                    erros = erros | erro
+                resultados[-1] = valores, erros
+        elif isinstance(node, NumberNode):
+            resultados.append((_para_array(node.value), np.zeros(forma, dtype=bool)))
+        elif isinstance(node, VariableNode):
+            if node.name not in arrays:
+                raise NameError(f"Valor para variável '{node.name}' não fornecido")
+            resultados.append((arrays[node.name], np.zeros(forma, dtype=bool)))
+        elif isinstance(node, UnaryOpNode):
+            pilha.append((node, 1))
+            pilha.append(node.child)
+        elif isinstance(node, BinaryOpNode):
+            pilha.append((node, 2))
+            pilha.append(node.right)
+            pilha.append(node.left)
+        elif isinstance(node, SeriesNode):
+            # os limites entram na pilha; o termo é avaliado por somatorio
+            pilha.append((node, 2))
+            pilha.append(node.end)
+            pilha.append(node.start)
+        else:
+            raise TypeError("Nó AST desconhecido")
+    return resultados[-1]
+
+
+def _unario(op, val, erros):
+    if op in ("u+", "+"):
+        return val, erros
+    if op in ("u-", "-"):
+        return -_como_complexo(val), erros
+    if op == "conj":
+        return np.conj(_como_complexo(val)), erros
+    raise ValueError(f"Operador unário desconhecido: {op}")
+
+
+def avaliar_vetorizado(node, arrays):
+    """Avalia a AST para todos os elementos de `arrays` de uma só vez.
+
+    `arrays` mapeia nome de variável -> array (ou escalar) de valores
+    complexos; as formas precisam ser compatíveis por broadcasting.
+    Retorna ResultadoLote(valores, erros): onde `erros` é True o cálculo
+    teria lançado ErroMatematico (ou estourado) e o valor é NaN.
+    """
+    if np is None:
+        raise ImportError("A avaliação vetorizada requer o pacote numpy")
+    convertidos = {nome: _para_array(v) for nome, v in arrays.items()}
+    forma = np.broadcast_shapes(*(v.shape for v in convertidos.values()))
+    with np.errstate(all="ignore"):
+        valores, erros = _avaliar(node, convertidos, forma)
+        valores = np.broadcast_to(valores, forma)
+        erros = np.broadcast_to(erros, forma)
+        if valores.dtype == np.bool_:
+            valores = np.where(erros, False, valores)
+        else:
+            valores = np.where(erros, complex(np.nan, np.nan), valores)
+    return ResultadoLote(valores, erros.copy())
@@ -1,4 +1,6 @@
 import sys, os
+import io
+import contextlib
 
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 SRC = os.path.join(ROOT, "src")
@@ -7,7 +9,8 @@ sys.path.insert(0, ROOT)
 sys.path.insert(0, SRC)
 
 from parser import NumberNode, VariableNode, UnaryOpNode, BinaryOpNode
-from arvore import lisp
+from parser import Parser
+from arvore import lisp, arvore, escrever_lisp, no
 
 
 def test_number_node():
@@ -42,4 +45,67 @@ def test_lisp_binary_operation():
 
 def test_lisp_nested_expression():
     n = BinaryOpNode("*", BinaryOpNode("+", NumberNode(3), NumberNode(4)), NumberNode(5))
-    assert lisp(n) == "(* (+ 3 4) 5)"
\ No newline at end of file
+    assert lisp(n) == "(* (+ 3 4) 5)"
+
+def _saida_arvore(ast, **kw):
+    buf = io.StringIO()
+    arvore(ast, saida=buf, **kw)
+    return buf.getvalue()
+
+
+def test_arvore_escreve_no_stream():
+    ast = Parser().parse("x * (2 + 3i)")
+    buf = io.StringIO()
+    with contextlib.redirect_stdout(buf):
+        arvore(ast)
+    assert _saida_arvore(ast) == buf.getvalue() == (
+        "└── BinaryOp: *\n"
+        "    └── Variable: x\n"
+        "    └── BinaryOp: +\n"
+        "        └── Number: 2.0\n"
+        "        └── Number: 3.0i\n"
+    )
+
+
+def test_arvore_limites():
+    ast = Parser().parse("x * (2 + 3i)")
+    assert _saida_arvore(ast, max_profundidade=0) == (
+        "└── BinaryOp: *\n"
+        "    └── ...\n"
+        "    └── ...\n"
+    )
+    assert _saida_arvore(ast, max_nos=3) == (
+        "└── BinaryOp: *\n"
+        "    └── Variable: x\n"
+        "    └── BinaryOp: +\n"
+        "        └── ...\n"
+    )
+
+
+def test_lisp_limites():
+    ast = Parser().parse("x * (2 + -y)")
+    assert lisp(ast, max_profundidade=1) == "(* x (+ ... ...))"
+    assert lisp(ast, max_profundidade=2) == "(* x (+ 2.0 (u- ...)))"
+    assert lisp(ast, max_nos=2) == "(* x ...)"
+    assert lisp(ast, max_nos=100) == lisp(ast)
+    buf = io.StringIO()
+    escrever_lisp(ast, buf, max_profundidade=0)
+    assert buf.getvalue() == "(* ... ...)"
+
+
+def test_no_to_lisp():
+    assert no(1).to_lisp() == "1"
+    assert no("-", no(5)).to_lisp() == "(- 5)"
+    assert no("-", None, no(5)).to_lisp() == "(- 5)"
+    assert no("*", no("+", no(3), no(4)), no(5)).to_lisp() == "(* (+ 3 4) 5)"
+    fundo = no("x")
+    for _ in range(50000):
+        fundo = no("+", fundo, no(1))
+    texto = fundo.to_lisp()
+    assert texto.startswith("(+ " * 50000 + "x 1) 1)")
+
+
+def test_arvore_profunda_linear():
+    ast = Parser().parse("x" + " + 1" * 100000)
+    assert len(lisp(ast, max_profundidade=10)) < 200
+    assert _saida_arvore(ast, max_nos=5).count("\n") == 6
@@ -0,0 +1,76 @@
+import sys, os
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC = os.path.join(ROOT, "src")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, SRC)
+
+from parser import Parser, TabelaInternacao
+from executor import eval_node, parse_complex_input
+from complexos import Complexo, ErroMatematico
+from backends import BACKENDS, BackendDecimal, ComplexoDecimal, obter_backend
+
+NOMES = sorted(BACKENDS)
+
+
+def _avaliar(expr, backend, **vals):
+    b = obter_backend(backend)
+    ast = Parser(backend=b).parse(expr)
+    vals = {n: parse_complex_input(v, backend=b) for n, v in vals.items()}
+    return b, eval_node(ast, vals, backend=b)
+
+
+def _perto(a, b, tol=1e-9):
+    return abs(a.a - b.a) <= tol * max(1.0, abs(b.a)) and abs(a.b - b.b) <= tol * max(1.0, abs(b.b))
+
+
+@pytest.mark.parametrize("nome", NOMES)
+@pytest.mark.parametrize("expr", [
+    "x**3 - 2x + conj(y)/3i", "(1+i)**2.5 - raiz(x, 3)", "raiz(-8, 3)",
+    "x / y * (2 - 0.5i)**-3", "(-2)**0.5 + y**x", "soma(x/k, k, 1, 40)",
+    "produto(1 + y/k, k, 1, 6) - conj x",
+])
+def test_mesmos_resultados_que_complexo(nome, expr):
+    vals = {"x": "1.5-2i", "y": "-0.25+3i"}
+    b, obtido = _avaliar(expr, nome, **vals)
+    _, esperado = _avaliar(expr, "complexo", **vals)
+    assert _perto(b.para_complexo(obtido), esperado)
+
+
+@pytest.mark.parametrize("nome", NOMES)
+def test_semantica_de_complexo(nome):
+    b = obter_backend(nome)
+    for expr in ("1 / 0", "x / (1i - 1i)", "0**-1", "0**(-0.5)"):
+        with pytest.raises(ErroMatematico):
+            _avaliar(expr, nome, x="3")
+    assert b.para_complexo(_avaliar("0**0", nome)[1]) == Complexo(1, 0)
+    assert b.para_complexo(_avaliar("0**(2+1i)", nome)[1]) == Complexo(0, 0)
+    assert _avaliar("(1 + 0.000000000001) = 1", nome)[1] is True
+    assert _avaliar("0.0000000005 = 0.0000000004999999", nome)[1] is True
+    assert _avaliar("1.001 = 1", nome)[1] is False
+    assert isinstance(_avaliar("x", nome, x="2-1i")[1], type(b.numero(0.0, 0.0)))
+
+
+def test_decimal_alta_precisao():
+    b = BackendDecimal(precisao=40)
+    assert b.texto(_avaliar("0.1 + 0.2", b)[1]) == "0.3"
+    _, r = _avaliar("raiz(2, 2)", b)
+    assert isinstance(r, ComplexoDecimal)
+    assert str(r.a).startswith("1.4142135623730950488016887242096980785")
+    # a precisão não vaza para o contexto global do módulo decimal
+    from decimal import getcontext
+    assert getcontext().prec == 28
+
+
+def test_erros_de_configuracao():
+    with pytest.raises(ValueError, match="desconhecido"):
+        obter_backend("quaternio")
+    assert obter_backend(None) is BACKENDS["complexo"]
+    with pytest.raises(ValueError, match="outro backend"):
+        Parser(tabela=TabelaInternacao(), backend=BACKENDS["nativo"])
+    nativo = BACKENDS["nativo"]
+    p = Parser(internar=True, backend=nativo)
+    assert p.tabela.backend is nativo
+    assert p.parse("2 + 2").left is p.parse("x * 2").right
+    assert p.parse("3i").value == 3j
@@ -0,0 +1,141 @@
+import sys, os
+import random
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC = os.path.join(ROOT, "src")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, SRC)
+
+from parser import Parser, BinaryOpNode, NumberNode
+from executor import eval_node
+from arvore import lisp
+from bytecode import codificar, decodificar, executar, salvar_biblioteca, Biblioteca
+from complexos import Complexo, ErroMatematico
+from recursos import Limites, LimiteExcedido
+
+EXPRS = [
+    "x * y - raiz(z, 2) / (x + 1)",
+    "(x - y) ** 2 + conj(z) = z",
+    "-x + +3i - -0",
+    "1 / (x - x)",
+    "x * x * x + x",
+]
+VALORES = {"x": Complexo(1, 2), "y": Complexo(-0.5, 0), "z": Complexo(0, 3)}
+
+
+def _resultado(fn):
+    try:
+        return repr(fn())
+    except Exception as e:
+        return type(e).__name__, str(e)
+
+
+def test_ida_e_volta_preserva_ast():
+    p = Parser()
+    for expr in EXPRS:
+        ast = p.parse(expr)
+        assert repr(decodificar(codificar(ast))) == repr(ast)
+        assert lisp(decodificar(codificar(ast))) == lisp(ast)
+
+
+def test_executar_igual_a_eval_node():
+    p = Parser()
+    for expr in EXPRS:
+        ast = p.parse(expr)
+        programa = codificar(ast)
+        assert _resultado(lambda: executar(programa, VALORES)) == \
+            _resultado(lambda: eval_node(ast, VALORES))
+    with pytest.raises(NameError, match="'y'"):
+        executar(codificar(p.parse("x + y")), {"x": Complexo(1, 0)})
+
+
+def test_constantes_e_variaveis_unicas():
+    # x*x*x+x: uma variável, nenhuma constante; 4 VAR (5 bytes) + 3 ops
+    programa = codificar(Parser().parse("x * x * x + x"))
+    assert len(programa) == 12 + 2 + 1 + 4 * 5 + 3
+    # 0.0 e -0.0 continuam distintos
+    ast = BinaryOpNode("+", NumberNode(Complexo(0.0, 0.0)), NumberNode(Complexo(-0.0, 0.0)))
+    assert repr(decodificar(codificar(ast))) == repr(ast)
+
+
+def test_tabelas_lidas_sob_demanda(tmp_path):
+    import struct
+    from bytecode import CONST, VAR, _OP_BINARIO
+    soma = bytes((_OP_BINARIO["+"],))
+    # duas constantes e dois nomes, mas o código só usa a segunda constante
+    # e o primeiro nome; o outro nome nem é UTF-8 válido
+    programa = (struct.pack("<III", 2, 2, 11) + struct.pack("<dddd", 1, 0, 2, 3)
+                + struct.pack("<H", 1) + b"x" + struct.pack("<H", 1) + b"\xff"
+                + bytes((VAR,)) + struct.pack("<I", 0) + bytes((CONST,)) + struct.pack("<I", 1) + soma)
+    assert executar(programa, {"x": Complexo(1, 1)}) == Complexo(3, 4)
+    with pytest.raises(UnicodeDecodeError):
+        decodificar(programa)
+    with pytest.raises(IndexError):
+        executar(programa[:-5] + struct.pack("<I", 2) + soma, {"x": Complexo(1, 1)})
+    # na biblioteca as tabelas dos programas usados mais recentemente são
+    # guardadas (LRU), até o limite
+    caminho = tmp_path / "lib.cxbc"
+    salvar_biblioteca(caminho, [Parser().parse(f"x * {i} + 1") for i in range(10)])
+    with Biblioteca(caminho, tabelas=3) as lib:
+        assert lib.avaliar(2, {"x": Complexo(1, 0)}) == Complexo(3, 0)
+        tabelas = lib._tabelas[lib._entrada(2)[0]]
+        assert lib.avaliar(2, {"x": Complexo(2, 0)}) == Complexo(5, 0)
+        assert lib._tabelas[lib._entrada(2)[0]] is tabelas
+        assert lib.ast(2).left.right.value is tabelas[0][0]
+        for i in range(10):
+            lib.avaliar(i, {"x": Complexo(1, 0)})
+        assert list(lib._tabelas) == [lib._entrada(i)[0] for i in (7, 8, 9)]
+        # os limites valem também para os programas da biblioteca
+        with pytest.raises(LimiteExcedido) as info:
+            lib.avaliar(0, {"x": Complexo(1, 0)}, limites=Limites(operacoes=1))
+        assert info.value.limite == "operacoes"
+    with pytest.raises(ValueError):
+        Biblioteca(caminho, tabelas=0)
+
+
+def test_operador_desconhecido():
+    with pytest.raises(ValueError):
+        codificar(BinaryOpNode("%", NumberNode(Complexo(1, 0)), NumberNode(Complexo(2, 0))))
+
+
+def test_biblioteca_mmap(tmp_path):
+    p = Parser()
+    caminho = tmp_path / "lib.cxbc"
+    asts = [p.parse(e) for e in EXPRS]
+    assert salvar_biblioteca(caminho, iter(asts)) == len(EXPRS)
+    with Biblioteca(caminho) as lib:
+        assert len(lib) == len(EXPRS)
+        for i, ast in enumerate(asts):
+            assert lib.programa(i) == codificar(ast)
+            assert repr(lib.ast(i)) == repr(ast)
+            assert _resultado(lambda: lib.avaliar(i, VALORES)) == \
+                _resultado(lambda: eval_node(ast, VALORES))
+        with pytest.raises(ErroMatematico):
+            lib.avaliar(-2, VALORES)
+        with pytest.raises(IndexError):
+            lib.ast(len(EXPRS))
+
+
+def test_biblioteca_invalida(tmp_path):
+    caminho = tmp_path / "ruim.bin"
+    caminho.write_bytes(b"\0" * 64)
+    with pytest.raises(ValueError):
+        Biblioteca(caminho)
+
+
+def test_aleatorio_e_profundo():
+    rng = random.Random(3)
+    p = Parser()
+    atomos = ["x", "y", "2", "0.5i", "conj(x)", "raiz(y, 3)"]
+    for _ in range(300):
+        expr = rng.choice(atomos)
+        for _ in range(rng.randint(0, 8)):
+            expr = f"({expr}) {rng.choice('+-*/')} {rng.choice(atomos)}"
+        ast = p.parse(expr)
+        programa = codificar(ast)
+        assert repr(decodificar(programa)) == repr(ast)
+        assert _resultado(lambda: executar(programa, VALORES)) == \
+            _resultado(lambda: eval_node(ast, VALORES))
+    ast = p.parse("x" + " + 1" * 50000)
+    assert executar(codificar(ast), {"x": Complexo(0, 0)}) == Complexo(50000, 0)
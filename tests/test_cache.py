@@ -0,0 +1,62 @@
+import sys, os
+import pickle
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC = os.path.join(ROOT, "src")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, SRC)
+
+from cache import CacheParse
+from arvore import lisp
+from complexos import Complexo
+
+
+def test_cache_acerto_e_falha():
+    cache = CacheParse(tamanho=4)
+    a1 = cache.parse("x + 2")
+    a2 = cache.parse("x + 2")
+    assert a1 is a2
+    assert (cache.acertos, cache.falhas, cache.despejos) == (1, 1, 0)
+
+
+def test_cache_despejo_lru():
+    cache = CacheParse(tamanho=2)
+    cache.parse("1")
+    cache.parse("2")
+    cache.parse("1")          # "2" passa a ser o menos recente
+    cache.parse("3")
+    assert "1" in cache and "3" in cache and "2" not in cache
+    assert cache.despejos == 1
+    assert cache.estatisticas()["entradas"] == 2
+
+
+def test_cache_nao_guarda_erro_de_sintaxe():
+    cache = CacheParse()
+    for _ in range(2):
+        with pytest.raises(SyntaxError):
+            cache.parse("3+*4")
+    assert len(cache) == 0
+    assert cache.falhas == 2
+
+
+def test_cache_entrada_imutavel():
+    cache = CacheParse()
+    ast = cache.parse("2*(3+4i)")
+    with pytest.raises(AttributeError):
+        ast.op = "+"
+    with pytest.raises(AttributeError):
+        ast.left.value.a = 99.0
+    assert lisp(cache.parse("2*(3+4i)")) == "(* 2.0 (+ 3.0 4.0i))"
+
+
+def test_cache_tamanho_invalido():
+    with pytest.raises(ValueError):
+        CacheParse(tamanho=0)
+
+
+def test_ast_pickle():
+    ast = CacheParse().parse("conj(x) ** 2 = 1i")
+    copia = pickle.loads(pickle.dumps(ast))
+    assert lisp(copia) == lisp(ast)
+    assert copia.right.value == Complexo(0, 1)
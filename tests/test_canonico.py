@@ -0,0 +1,86 @@
+import sys, os
+import random
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC = os.path.join(ROOT, "src")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, SRC)
+
+from parser import Parser
+from executor import eval_node
+from arvore import lisp
+from complexos import Complexo, ErroMatematico
+from canonico import (canonizar, assinatura, canonizar_com_assinatura, CacheCanonico,
+                      deduplicar, avaliar_deduplicado)
+
+
+def _parse(expr):
+    return Parser().parse(expr)
+
+
+def test_comutativos_e_igualdade():
+    assert assinatura(_parse("x+2")) == assinatura(_parse("2+x")) == assinatura(_parse("(x)+2"))
+    assert lisp(canonizar(_parse("2 + x + y*3"))) == "(+ (+ x (* y 3.0)) 2.0)"
+    assert lisp(canonizar(_parse("3y + (x + 2)"))) == "(+ (+ x (* y 3.0)) 2.0)"
+    assert assinatura(_parse("a = b + 1")) == assinatura(_parse("1 + b = a"))
+    assert lisp(canonizar(_parse("+x * -y"))) == "(* x (u- y))"
+
+
+def test_nao_comutativos_continuam_distintos():
+    assert assinatura(_parse("x - 2")) != assinatura(_parse("2 - x"))
+    assert assinatura(_parse("x / y")) != assinatura(_parse("y / x"))
+    assert assinatura(_parse("raiz(x, 2)")) != assinatura(_parse("raiz(2, x)"))
+    assert assinatura(_parse("x + 2")) != assinatura(_parse("x * 2"))
+    assert len(assinatura(_parse("x"))) == 32
+
+
+def test_sem_mudanca_reaproveita_nos():
+    ast = _parse("(x - 2) / conj(y)")
+    assert canonizar(ast) is ast
+
+
+def test_mesmo_valor_que_a_original():
+    rng = random.Random(11)
+    atomos = ["x", "y", "2", "0.5i", "conj(x)", "raiz(y, 3)"]
+    vals = {"x": Complexo(0.3, -1.2), "y": Complexo(2, 0.5)}
+    for _ in range(300):
+        expr = rng.choice(atomos)
+        for _ in range(rng.randint(1, 8)):
+            expr = f"({expr}) {rng.choice(['+', '*', '-', '/', '+', '*'])} {rng.choice(atomos)}"
+        ast = _parse(expr)
+        assert eval_node(canonizar(ast), vals) == eval_node(ast, vals)
+
+
+def test_cadeia_longa_sem_recursao():
+    ast = _parse(" + ".join(f"x{i % 7}" for i in range(30000)))
+    canon, chave = canonizar_com_assinatura(ast)
+    assert canon.right.name == "x6"
+    assert chave == assinatura(_parse(" + ".join(f"x{i % 7}" for i in reversed(range(30000)))))
+
+
+def test_cache_canonico():
+    cache = CacheCanonico(tamanho=8)
+    a = cache.parse("x+2")
+    assert cache.parse("2+x") is a
+    assert cache.parse("x+2") is a
+    cache.parse("x*2")
+    est = cache.estatisticas()
+    assert (est["acertos_texto"], est["acertos_estrutura"], est["falhas"]) == (1, 1, 2)
+    with pytest.raises(SyntaxError):
+        cache.parse("2 +")
+
+
+def test_deduplicar_e_avaliar():
+    asts = [_parse(e) for e in ("x+1", "1+x", "x*2", "1+x", "1/(x-x)", "(x-x)**-1")]
+    unicos, indices = deduplicar(asts)
+    assert len(unicos) == 4 and indices == [0, 0, 1, 0, 2, 3]
+
+    x1 = {"x": Complexo(1, 0)}
+    pares = [(asts[0], x1), (asts[1], x1), (asts[1], {"x": Complexo(2, 0)}),
+             (asts[2], {"x": Complexo(1, 0), "z": Complexo(5, 0)}), (asts[2], x1), (asts[4], x1)]
+    resultados, reaproveitados = avaliar_deduplicado(pares)
+    assert resultados[:5] == [Complexo(2, 0), Complexo(2, 0), Complexo(3, 0), Complexo(2, 0), Complexo(2, 0)]
+    assert isinstance(resultados[5], ErroMatematico)
+    # 1+x com x=1 e x*2 com x=1 (a variável z não é usada)
+    assert reaproveitados == 2
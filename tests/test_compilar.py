@@ -0,0 +1,75 @@
+import sys, os
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC = os.path.join(ROOT, "src")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, SRC)
+
+from parser import Parser, UnaryOpNode, BinaryOpNode, NumberNode, VariableNode
+from executor import eval_node
+from compilar import compilar_ast
+from complexos import Complexo, ErroMatematico
+
+
+EXPRESSOES = [
+    "3+4",
+    "2*(3+4i) - x",
+    "x**2 + conj(y)/3i",
+    "-x + +y",
+    "raiz(x, 2) * 2.5",
+    "(1+i)**3 = x",
+    "conj x * 2(y - 1)",
+    "x ** 0.5",
+]
+
+
+@pytest.mark.parametrize("expr", EXPRESSOES)
+def test_compilado_igual_eval_node(expr):
+    ast = Parser().parse(expr)
+    fn = compilar_ast(ast)
+    for vars_dict in ({"x": Complexo(2, 1), "y": Complexo(-3, 0.5)},
+                      {"x": Complexo(0.25, -4), "y": Complexo(1, 1)}):
+        esperado = eval_node(ast, vars_dict)
+        obtido = fn(vars_dict)
+        assert type(obtido) is type(esperado)
+        if isinstance(esperado, Complexo):
+            assert (obtido.a, obtido.b) == (esperado.a, esperado.b)
+        else:
+            assert obtido == esperado
+
+
+def test_compilado_divisao_por_zero():
+    fn = compilar_ast(Parser().parse("x / (y - y)"))
+    with pytest.raises(ErroMatematico):
+        fn({"x": Complexo(1, 0), "y": Complexo(2, 2)})
+
+
+def test_compilado_variavel_indefinida():
+    fn = compilar_ast(Parser().parse("x + 5"))
+    with pytest.raises(NameError, match="'x'"):
+        fn({})
+
+
+def test_compilado_operador_desconhecido():
+    # como em eval_node: o erro só aparece na chamada, depois dos operandos
+    ast = BinaryOpNode("%", VariableNode("x"), UnaryOpNode("sen", NumberNode(Complexo(1, 0))))
+    fn = compilar_ast(ast)
+    for vars_dict in ({}, {"x": Complexo(1, 0)}):
+        with pytest.raises(Exception) as esperado:
+            eval_node(ast, vars_dict)
+        with pytest.raises(type(esperado.value), match=str(esperado.value)):
+            fn(vars_dict)
+    assert isinstance(esperado.value, ValueError)
+
+
+@pytest.mark.parametrize("expr", [
+    "conj(" * 50_000 + "x" + ")" * 50_000,
+    "**".join(["1"] * 50_000) + " * x",
+    "-(" * 3000 + "x + 1" + ")" * 3000 + " - soma(k, k, 1, " + "+(" * 3000 + "3" + ")" * 3000 + ")",
+])
+def test_compilado_profundo(expr):
+    ast = Parser().parse(expr)
+    fn = compilar_ast(ast)
+    vars_dict = {"x": Complexo(2, 1)}
+    assert fn(vars_dict) == eval_node(ast, vars_dict)
@@ -66,3 +66,58 @@ def test_igualdade():
     a = Complexo(2, 3)
     b = Complexo(2, 3)
     assert a == b
+    # tolerância de 1e-9, mesmo entre células diferentes da chave do hash
+    assert Complexo(5e-10, 0) == Complexo(4.999999e-10, 0)
+    assert Complexo(5e-10, 0).chave() != Complexo(4.999999e-10, 0).chave()
+    assert Complexo(1, 2) != Complexo(1, 2 + 2e-9)
+
+
+def test_imutavel():
+    a = Complexo(2, 3)
+    with pytest.raises(AttributeError):
+        a.a = 5
+    assert not hasattr(a, "__dict__")
+
+
+def test_hash_consistente_com_igualdade():
+    assert hash(Complexo(2, 3)) == hash(Complexo(2, 3 + 1e-12))
+    assert hash(Complexo(3, 0)) == hash(3)
+    assert len({Complexo(1, 1), Complexo(1, 1), Complexo(1, -1)}) == 2
+
+
+def test_operacao_com_real():
+    a = Complexo(2, 3)
+    assert a + 1 == Complexo(3, 3)
+    assert 2 * a == Complexo(4, 6)
+    assert 1 - a == Complexo(-1, -3)
+
+
+def test_potencia_inteira_exata():
+    r = Complexo(1, 1) ** 8
+    assert (r.a, r.b) == (16.0, 0.0)
+    r = Complexo(2, -3) ** 5
+    assert (r.a, r.b) == (122.0, 597.0)
+    r = Complexo(0, 2) ** -2
+    assert (r.a, r.b) == (-0.25, 0.0)
+
+
+def test_potencia_zero_expoente_negativo():
+    with pytest.raises(ErroMatematico):
+        _ = Complexo(0, 0) ** -3
+    assert Complexo(0, 0) ** 0 == Complexo(1, 0)
+
+
+def test_potencia_estouro_mantem_overflow():
+    with pytest.raises(OverflowError):
+        _ = Complexo(1e200, 1) ** 2
+
+
+def test_raiz_ordem_inteira():
+    assert Complexo(9, 0).raiz(2).a == 3.0
+    r = Complexo(-4, 0).raiz(2)
+    assert (r.a, r.b) == (0.0, 2.0)
+    for z in (Complexo(3, 4), Complexo(-2, 0.5), Complexo(0, -7), Complexo(-1, -1)):
+        for n in (2, 3, 5, -2):
+            assert z.raiz(n) == z ** (Complexo(1, 0) / Complexo(n, 0))
+    with pytest.raises(ErroMatematico):
+        Complexo(0, 0).raiz(-2)
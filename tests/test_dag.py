@@ -0,0 +1,72 @@
+import sys, os
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC = os.path.join(ROOT, "src")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, SRC)
+
+import executor
+from parser import Parser
+from executor import eval_node
+from dag import TabelaNos, para_dag, eval_dag
+from arvore import lisp
+from complexos import Complexo, ErroMatematico
+
+EXPR = " + ".join(["(x+1i)**3"] * 5)
+
+
+def test_dag_compartilha_subarvores():
+    ast = Parser().parse(EXPR)
+    dag, rel = para_dag(ast)
+    assert dag.left.right is dag.right
+    assert rel["nos_arvore"] == 29
+    assert rel["nos_unicos"] == 9
+    assert rel["compartilhados"] == 20
+
+
+def test_dag_imprime_forma_de_arvore():
+    ast = Parser().parse(EXPR)
+    dag, _ = para_dag(ast)
+    assert lisp(dag) == lisp(ast)
+
+
+def test_eval_dag_calcula_uma_vez(monkeypatch):
+    chamadas = []
+    potencia = executor.OPERADORES_BINARIOS["**"]
+
+    def contar(l, r):
+        chamadas.append(1)
+        return potencia(l, r)
+
+    monkeypatch.setitem(executor.OPERADORES_BINARIOS, "**", contar)
+    ast = Parser().parse(EXPR)
+    dag, _ = para_dag(ast)
+    vars_dict = {"x": Complexo(1, 2)}
+    assert eval_dag(dag, vars_dict) == eval_node(ast, vars_dict)
+    assert len(chamadas) == 1 + 5
+
+
+def test_tabela_compartilhada_entre_expressoes():
+    tabela = TabelaNos()
+    a, _ = para_dag(Parser().parse("(x+1)*2"), tabela)
+    b, _ = para_dag(Parser().parse("3 - (x+1)"), tabela)
+    assert a.left is b.right
+
+
+def test_eval_dag_erros():
+    dag, _ = para_dag(Parser().parse("y + 1/(x-x)"))
+    with pytest.raises(NameError):
+        eval_dag(dag, {"x": Complexo(1, 0)})
+    with pytest.raises(ErroMatematico):
+        eval_dag(dag, {"x": Complexo(1, 0), "y": Complexo(0, 0)})
+
+
+def test_dag_profundo():
+    # mais fundo que o limite de recursão: internar e eval_dag usam pilha própria
+    n = 20_000
+    ast = Parser().parse("conj(" * n + "x + 1" + ")" * n + " + " + "-(" * n + "x + 1" + ")" * n)
+    dag, rel = para_dag(ast)
+    assert (rel["nos_arvore"], rel["nos_unicos"]) == (2 * n + 7, 2 * n + 4)
+    vars_dict = {"x": Complexo(1, 2)}
+    assert eval_dag(dag, vars_dict) == eval_node(ast, vars_dict) == Complexo(4, 4)
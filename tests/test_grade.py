@@ -0,0 +1,62 @@
+import sys, os
+import tracemalloc
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC = os.path.join(ROOT, "src")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, SRC)
+
+np = pytest.importorskip("numpy")
+
+from parser import Parser
+from executor import eval_node
+from complexos import Complexo
+from grade import avaliar_grade
+
+
+def test_grade_igual_a_eval_node(tmp_path):
+    ast = Parser().parse("(z**3 - 1)/(z - 1i)")
+    # 5 x 7 pontos com passo 0.5: a grade passa exatamente por z = 1i
+    caminhos, est = avaliar_grade(ast, (-1, 1, -2, 1), (5, 7), tmp_path, bloco=3)
+    real, imag = np.load(caminhos["real"]), np.load(caminhos["imag"])
+    modulo, erros = np.load(caminhos["modulo"]), np.load(caminhos["erros"])
+    assert real.shape == (7, 5) and erros.dtype == np.bool_
+    assert est["blocos"] == 3 * 2 and est["pontos"] == 35 and est["variavel"] == "z"
+    for i in range(7):
+        for j in range(5):
+            z = Complexo(-1 + 0.5 * j, 1 - 0.5 * i)   # linha 0 = maior parte imaginária
+            if i == 0 and j == 2:
+                assert erros[i, j] and np.isnan(real[i, j])
+                continue
+            esperado = eval_node(ast, {"z": z})
+            assert not erros[i, j]
+            assert abs(real[i, j] - esperado.a) < 1e-9 and abs(imag[i, j] - esperado.b) < 1e-9
+            assert abs(modulo[i, j] - esperado.modulo()) < 1e-9
+    assert est["erros"] == 1
+
+
+def test_grade_com_outras_variaveis(tmp_path):
+    ast = Parser().parse("z**2 + c")
+    caminhos, _ = avaliar_grade(ast, (0, 0, 0, 1), (1, 2), tmp_path, variavel="z",
+                                valores={"c": Complexo(1, 1)})
+    # linha 0: z = 1i -> -1 + c; linha 1: z = 0 -> c
+    assert np.load(caminhos["real"]).tolist() == [[0.0], [1.0]]
+    assert np.allclose(np.load(caminhos["imag"]), [[1.0], [1.0]])
+    with pytest.raises(ValueError):
+        avaliar_grade(Parser().parse("z * w"), (0, 1, 0, 1), (2, 2), tmp_path)
+
+
+def test_memoria_limitada(tmp_path):
+    ast = Parser().parse("z**3 - 2z + 1")
+
+    def pico(lado):
+        tracemalloc.start()
+        avaliar_grade(ast, (-2, 2, -2, 2), (lado, lado), tmp_path / str(lado), bloco=64)
+        p = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return p
+
+    pequeno, grande = pico(128), pico(1024)
+    # 64x mais pontos, mas o pico só depende do tamanho do ladrilho
+    assert grande < 2 * pequeno + 1_000_000
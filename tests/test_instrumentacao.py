@@ -0,0 +1,83 @@
+import sys, os
+import io
+import json
+import contextlib
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC = os.path.join(ROOT, "src")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, SRC)
+
+import instrumentacao
+from instrumentacao import Instrumentacao, instrumentar
+from parser import Parser, contar_nos
+from executor import eval_node, coletar_variaveis
+from arvore import lisp, arvore
+from complexos import Complexo, ErroMatematico
+
+
+def test_desligada_por_padrao():
+    assert instrumentacao.ATIVA is None
+    ast = Parser().parse("1 + 2")
+    assert eval_node(ast, {}) == Complexo(3, 0)
+
+
+def test_etapas_e_contadores():
+    p = Parser()
+    with instrumentar() as inst:
+        ast = p.parse("x * 2 + conj(3i)")
+        vars_ = set()
+        coletar_variaveis(ast, vars_)
+        eval_node(ast, {"x": Complexo(1, 1)})
+        lisp(ast)
+        with contextlib.redirect_stdout(io.StringIO()):
+            arvore(ast)
+    assert instrumentacao.ATIVA is None
+    for etapa in ("tokenize", "parse", "coletar_variaveis", "eval_node", "lisp", "arvore"):
+        assert inst.etapas[etapa]["chamadas"] == 1
+        assert inst.etapas[etapa]["segundos"] >= 0
+    # x * 2 + conj ( 3i )
+    assert inst.contadores["tokens"] == 8
+    assert inst.contadores["nos"] == contar_nos(ast) == 6
+    assert inst.operadores == {"*": 1, "+": 1, "conj": 1}
+
+
+def test_taxa_de_erro_matematico():
+    p = Parser()
+    with instrumentar() as inst:
+        eval_node(p.parse("1 + 1"), {})
+        with pytest.raises(ErroMatematico):
+            eval_node(p.parse("1 / 0"), {})
+    assert inst.contadores["avaliacoes"] == 2
+    assert inst.contadores["erros_matematicos"] == 1
+    assert inst.resumo()["taxa_erro_matematico"] == 0.5
+    # a etapa que falhou também é medida
+    assert inst.etapas["eval_node"]["chamadas"] == 2
+
+
+def test_callback_e_json():
+    chamadas = []
+    with instrumentar(callback=lambda etapa, s: chamadas.append(etapa)) as inst:
+        Parser().parse("2 ** 3")
+    assert chamadas == ["tokenize", "parse"]
+    dados = json.loads(inst.para_json())
+    assert dados["contadores"]["tokens"] == 3
+    assert set(dados) == {"etapas", "contadores", "operadores", "taxa_erro_matematico"}
+
+
+def test_erro_lexico_preservado():
+    with instrumentar():
+        with pytest.raises(SyntaxError):
+            Parser().parse("1 + $")
+
+
+def test_ativar_desativar():
+    inst = instrumentacao.ativar(Instrumentacao())
+    try:
+        eval_node(Parser().parse("-1"), {})
+    finally:
+        instrumentacao.desativar()
+    assert inst.operadores == {"u-": 1}
+    inst.limpar()
+    assert inst.resumo()["etapas"] == {}
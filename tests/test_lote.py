@@ -0,0 +1,50 @@
+import sys, os
+import io
+import json
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC = os.path.join(ROOT, "src")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, SRC)
+
+from parser import Parser
+from executor import executar_lote, avaliar_registro
+
+
+def rodar(linhas, **kw):
+    entrada = io.StringIO("".join(json.dumps(l) + "\n" if not isinstance(l, str) else l for l in linhas))
+    saida = io.StringIO()
+    total, erros = executar_lote(entrada, saida, **kw)
+    return [json.loads(l) for l in saida.getvalue().splitlines()], total, erros
+
+
+def test_lote_resultados_e_erros():
+    res, total, erros = rodar([
+        {"expr": "x + y", "vars": {"x": "1+2i", "y": "3"}},
+        {"id": "b", "expr": "1/(x-x)", "vars": {"x": "2"}},
+        "\n",
+        "isto não é json\n",
+        {"expr": "x + z", "vars": {"x": "1"}},
+        {"expr": "(1+i)**2 = 2i"},
+    ])
+    assert (total, erros) == (5, 3)
+    assert res[0] == {"linha": 1, "expr": "x + y", "resultado": "4.0 + 2.0i"}
+    assert res[1]["id"] == "b" and res[1]["erro"] == "divisão por zero"
+    assert res[2]["linha"] == 4 and res[2]["tipo_erro"] == "JSONDecodeError"
+    assert res[3]["tipo_erro"] == "NameError"
+    assert res[4]["resultado"] is True
+
+
+def test_lote_lisp_e_arvore_opcionais():
+    res, _, _ = rodar([{"expr": "-x", "vars": {"x": "1"}}])
+    assert "lisp" not in res[0] and "arvore" not in res[0]
+    res, _, _ = rodar([{"expr": "-x", "vars": {"x": "1"}}], com_lisp=True, com_arvore=True)
+    assert res[0]["lisp"] == "(u- x)"
+    assert res[0]["arvore"] == "└── UnaryOp: u-\n    └── Variable: x\n"
+
+
+def test_registro_invalido():
+    saida = avaliar_registro({"vars": {}}, Parser())
+    assert saida["tipo_erro"] == "ValueError"
+    saida = avaliar_registro({"expr": "x", "vars": {"x": "abc"}}, Parser())
+    assert "Entrada numérica inválida" in saida["erro"]
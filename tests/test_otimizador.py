@@ -0,0 +1,93 @@
+import sys, os
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC = os.path.join(ROOT, "src")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, SRC)
+
+from parser import Parser, NumberNode, BinaryOpNode
+from executor import eval_node
+from otimizador import otimizar
+from arvore import lisp
+from complexos import Complexo, ErroMatematico
+
+
+def otim(expr):
+    return otimizar(Parser().parse(expr))
+
+
+def test_dobra_constantes():
+    ast = otim("2*(3+4i)*x + conj(5)")
+    assert lisp(ast) == "(+ (* 6.0 + 8.0i x) 5.0)"
+
+
+@pytest.mark.parametrize("expr", ["x*1", "1*x", "x+0", "0+x", "x-0", "x/1",
+                                  "x**1", "conj(conj(x))", "-(-x)", "+x"])
+def test_identidades(expr):
+    assert lisp(otim(expr)) == "x"
+
+
+def test_nao_remove_zero_vezes_x():
+    assert lisp(otim("0*y")) == "(* 0.0 y)"
+
+
+def test_nao_dobra_operacao_com_erro():
+    ast = otim("x + 1/0")
+    assert lisp(ast) == "(+ x (/ 1.0 0.0))"
+    with pytest.raises(ErroMatematico):
+        eval_node(ast, {"x": Complexo(1, 0)})
+    with pytest.raises(ErroMatematico):
+        eval_node(otim("0 ** -1"), {})
+
+
+def test_nao_aplica_identidade_em_igualdade():
+    ast = otim("(x = 1) + 0")
+    assert ast.op == "+"
+
+
+def test_resultado_preservado():
+    expr = "2*(3+4i)*x + 0*y + conj(5) - raiz(4, 2)*y**1"
+    vars_dict = {"x": Complexo(1, 2), "y": Complexo(-1, 0.5)}
+    original = Parser().parse(expr)
+    assert eval_node(otimizar(original), vars_dict) == eval_node(original, vars_dict)
+
+
+def test_original_inalterada():
+    original = BinaryOpNode("+", NumberNode(Complexo(1, 0)), NumberNode(Complexo(2, 0)))
+    antes = lisp(original)
+    otimizar(original)
+    assert lisp(original) == antes
+    sem_mudanca = Parser().parse("x + y")
+    assert otimizar(sem_mudanca) is sem_mudanca
+
+
+def test_arvore_profunda():
+    # mais fundo que o limite de recursão
+    n = 20_000
+    ast = Parser().parse("(" * n + "x" + " + 0)" * n + " * " + "-(" * n + "-(1 + 2)" + ")" * n)
+    otim = otimizar(ast)
+    assert lisp(otim) == "(* x -3.0)"
+    assert eval_node(otim, {"x": Complexo(1, 2)}) == eval_node(ast, {"x": Complexo(1, 2)})
+
+
+@pytest.mark.parametrize("otimizar_ast", [False, True])
+def test_repl_pede_todas_as_variaveis(monkeypatch, capsys, otimizar_ast):
+    import builtins
+    from executor import repl
+
+    entradas = iter(["(1+2)*x + y", "5", "2", "sair"])
+    pedidos = []
+
+    def falso_input(prompt):
+        pedidos.append(prompt)
+        return next(entradas)
+
+    monkeypatch.setattr(builtins, "input", falso_input)
+    repl(otimizar_ast=otimizar_ast)
+    saida = capsys.readouterr().out
+    # as variáveis pedidas são as da expressão digitada
+    assert [p for p in pedidos if p.startswith("Valor")] == [
+        "Valor para x (formato a+bi): ", "Valor para y (formato a+bi): "]
+    assert saida.rstrip().endswith("17.0")
+    assert ("Árvore otimizada" in saida) == otimizar_ast
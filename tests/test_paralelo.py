@@ -0,0 +1,42 @@
+import sys, os
+import io
+import json
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC = os.path.join(ROOT, "src")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, SRC)
+
+from executor import executar_lote
+from paralelo import executar_lote_paralelo
+
+
+def entrada():
+    linhas = []
+    for i in range(57):
+        if i % 10 == 3:
+            linhas.append("\n")
+        elif i % 10 == 7:
+            linhas.append(json.dumps({"expr": "1/(x-x)", "vars": {"x": str(i)}}) + "\n")
+        else:
+            linhas.append(json.dumps({"id": i, "expr": "x**2 + conj(x)", "vars": {"x": f"{i}+1i"}}) + "\n")
+    return linhas
+
+
+def test_paralelo_igual_sequencial():
+    seq = io.StringIO()
+    esperado = executar_lote(entrada(), seq, com_lisp=True)
+    par = io.StringIO()
+    obtido = executar_lote_paralelo(entrada(), par, processos=2, bloco=4, com_lisp=True)
+    assert obtido == esperado
+    assert par.getvalue() == seq.getvalue()
+    numeros = [json.loads(l)["linha"] for l in par.getvalue().splitlines()]
+    assert numeros == sorted(numeros)
+
+
+def test_paralelo_parametros_invalidos():
+    with pytest.raises(ValueError):
+        executar_lote_paralelo([], io.StringIO(), bloco=0)
+    with pytest.raises(ValueError):
+        executar_lote_paralelo([], io.StringIO(), processos=0)
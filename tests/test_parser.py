@@ -6,7 +6,7 @@ SRC = os.path.join(ROOT, "src")
 sys.path.insert(0, ROOT)
 sys.path.insert(0, SRC)
 
-from parser import Parser
+from parser import Parser, UnaryOpNode, BinaryOpNode
 from complexos import Complexo, ErroMatematico
 
 
@@ -46,3 +46,109 @@ def test_erro_sintaxe_parêntese_aberto():
 def test_erro_sintaxe_token_invalido():
     with pytest.raises(SyntaxError):
         parse("3 + $ 4")
+
+
+def test_tokenize_tipos_e_valores():
+    from parser import Parser
+    toks = Parser().tokenize("2.5i*x**3 + (1)")
+    assert [(t.type, t.value) for t in toks] == [
+        ("IMAG", 2.5), ("TIMES", "*"), ("NAME", "x"), ("POW", "**"), ("NUMBER", 3.0),
+        ("PLUS", "+"), ("LPAREN", "("), ("NUMBER", 1.0), ("RPAREN", ")"), ("EOF", None),
+    ]
+
+
+def test_tokens_sob_demanda():
+    from parser import iter_tokens
+    fluxo = iter_tokens("1 + 2 $")
+    assert next(fluxo).value == 1.0
+    assert next(fluxo).type == "PLUS"
+
+
+def test_caractere_invalido_tem_prioridade():
+    # mesmo com leitura sob demanda, o erro léxico adiante vence o sintático
+    with pytest.raises(SyntaxError, match=r"Caractere inválido: #"):
+        parse("3+*4 #")
+    with pytest.raises(SyntaxError, match=r"Token extra após expressão"):
+        parse("3 4)")
+
+
+def test_internacao_compartilha_folhas():
+    from parser import TabelaInternacao
+    from arvore import lisp
+    p = Parser(internar=True)
+    a = p.parse("x * 2 + i")
+    b = p.parse("2 - x + i(3)")
+    assert a.left.left is b.left.right          # x
+    assert a.left.right is b.left.left          # 2
+    assert a.right is b.right.left              # i
+    assert a.left.right.value is b.left.left.value
+    assert lisp(a) == lisp(parse("x * 2 + i"))
+    assert p.tabela.estatisticas() == {"numeros": 3, "variaveis": 1, "pedidos": 7, "reaproveitados": 3}
+
+    # tabela comum a dois parsers
+    tabela = TabelaInternacao()
+    assert Parser(tabela=tabela).parse("y").name is Parser(tabela=tabela).parse("y").name
+    tabela.limpar()
+    assert len(tabela) == 0
+    assert Parser().tabela is None
+
+
+def test_parser_compartilhado_entre_threads():
+    import random
+    from concurrent.futures import ThreadPoolExecutor
+    from arvore import lisp
+    from parser import parse as parse_sem_estado
+
+    rng = random.Random(5)
+    atomos = ["x", "2", "3.5i", "i", "conj(y)", "raiz(x, 3)", "(y - 1)"]
+    textos = []
+    for _ in range(400):
+        expr = rng.choice(atomos)
+        for _ in range(rng.randint(1, 12)):
+            expr = f"{expr} {rng.choice(['+', '-', '*', '/', '**'])} {rng.choice(atomos)}"
+        textos.append(expr)
+    textos += ["3 +", "(x", "2 # 3"] * 10   # erros também não podem se misturar
+
+    def resultado(p, texto):
+        try:
+            return lisp(p.parse(texto))
+        except SyntaxError as erro:
+            return str(erro)
+
+    esperado = [resultado(Parser(), t) for t in textos]
+    compartilhados = [Parser(), Parser(internar=True)]
+    antigo = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)   # força trocas de thread no meio das análises
+    internado = Parser(internar=True)   # tabela vazia: folhas criadas em paralelo
+    try:
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            for p in compartilhados:
+                for _ in range(3):
+                    assert list(pool.map(lambda t: resultado(p, t), textos)) == esperado
+            assert [lisp(a) for a in pool.map(parse_sem_estado, textos[:400])] == esperado[:400]
+            rodadas = [list(pool.map(internado.parse, textos[:400])) for _ in range(3)]
+    finally:
+        sys.setswitchinterval(antigo)
+
+    def folhas(ast):
+        saida, pilha = [], [ast]
+        while pilha:
+            n = pilha.pop()
+            if isinstance(n, UnaryOpNode):
+                pilha.append(n.child)
+            elif isinstance(n, BinaryOpNode):
+                pilha += [n.right, n.left]
+            else:
+                saida.append(n)
+        return saida
+
+    # o mesmo texto, analisado em threads diferentes e depois em uma só,
+    # dá a mesma árvore com exatamente as mesmas folhas internadas
+    for i, texto in enumerate(textos[:400]):
+        unica = internado.parse(texto)
+        referencia = folhas(unica)
+        for rodada in rodadas:
+            assert lisp(rodada[i]) == lisp(unica) == esperado[i]
+            obtidas = folhas(rodada[i])
+            assert len(obtidas) == len(referencia)
+            assert all(a is b for a, b in zip(obtidas, referencia))
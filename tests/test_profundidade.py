@@ -0,0 +1,53 @@
+import sys, os
+import io
+import contextlib
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC = os.path.join(ROOT, "src")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, SRC)
+
+from parser import Parser
+from executor import eval_node, coletar_variaveis
+from arvore import lisp, arvore
+from complexos import Complexo
+
+N = 100_000
+
+
+def test_cadeia_conj_profunda():
+    ast = Parser().parse("conj(" * N + "x" + ")" * N)
+    assert eval_node(ast, {"x": Complexo(1, 2)}) == Complexo(1, 2)
+    vs = set()
+    coletar_variaveis(ast, vs)
+    assert vs == {"x"}
+    assert lisp(ast) == "(conj " * N + "x" + ")" * N
+
+
+def test_parenteses_profundos():
+    ast = Parser().parse("(" * N + "1+2i" + ")" * N)
+    assert lisp(ast) == "(+ 1.0 2.0i)"
+
+
+def test_cadeia_potencia_profunda():
+    ast = Parser().parse("**".join(["1"] * N))
+    # associatividade à direita: 1 ** (1 ** (...))
+    assert ast.op == "**" and ast.right.op == "**"
+    assert eval_node(ast, {}) == Complexo(1, 0)
+    assert lisp(ast).startswith("(** 1.0 (** 1.0 ")
+
+
+def test_soma_longa():
+    ast = Parser().parse("+".join(["x"] * N))
+    assert eval_node(ast, {"x": Complexo(1, 1)}) == Complexo(N, N)
+
+
+def test_arvore_profunda():
+    n = 5000
+    ast = Parser().parse("-" * n + "x")
+    buf = io.StringIO()
+    with contextlib.redirect_stdout(buf):
+        arvore(ast)
+    linhas = buf.getvalue().splitlines()
+    assert len(linhas) == n + 1
+    assert linhas[-1] == "    " * n + "└── Variable: x"
@@ -0,0 +1,210 @@
+import sys, os
+import asyncio
+import io
+import json
+import pickle
+import time
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC = os.path.join(ROOT, "src")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, SRC)
+
+from parser import Parser
+from arvore import lisp
+from executor import eval_node, avaliar_registro, executar_lote
+from complexos import Complexo
+from bytecode import codificar, executar
+from recursos import Limites, LimiteExcedido
+import somatorio
+
+
+def _limite(fn):
+    with pytest.raises(LimiteExcedido) as info:
+        fn()
+    return info.value.limite
+
+
+def test_configuracao():
+    lim = Limites.de_texto("tokens=100, tempo=0.5,magnitude=1e100")
+    assert (lim.tokens, lim.tempo, lim.magnitude, lim.nos) == (100, 0.5, 1e100, None)
+    assert pickle.loads(pickle.dumps(lim)).tokens == 100
+    e = pickle.loads(pickle.dumps(LimiteExcedido("tempo", 0.5)))
+    assert (e.limite, e.maximo) == ("tempo", 0.5)
+    for ruim in ("tokens", "passos=3", "tokens=x", "nos=0", "tempo=-1"):
+        with pytest.raises(ValueError):
+            Limites.de_texto(ruim)
+    with pytest.raises(AttributeError):
+        lim.tokens = 5
+
+
+def test_limites_do_parse():
+    p = Parser(limites=Limites(tokens=9, nos=6, profundidade=4))
+    assert eval_node(p.parse("1 + 2 * x"), {"x": Complexo(2, 0)}) == Complexo(5, 0)
+    assert _limite(lambda: p.parse("1 + 2 + 3 + 4")) == "nos"
+    assert _limite(lambda: p.parse("----1")) == "profundidade"
+    assert p.parse("((((1))))").value == Complexo(1, 0)
+    assert _limite(lambda: p.parse("(((((1)))))")) == "profundidade"
+    # o texto além do limite não chega a ser tokenizado, e os limites de
+    # nós e de profundidade param a análise antes de a AST ficar pronta
+    enorme = "1+" * 2_000_000 + "1"
+    casos = [(Limites(tokens=1000), "tokens", texto)
+             for texto in (enorme, "-" * 2_000_000 + "1", "(" * 2_000_000 + "1")]
+    casos += [(Limites(profundidade=50), "profundidade", texto)
+              for texto in (enorme, "-" * 2_000_000 + "1", "(" * 2_000_000 + "1")]
+    casos.append((Limites(nos=1000), "nos", enorme))
+    for lim, nome, texto in casos:
+        inicio = time.perf_counter()
+        assert _limite(lambda: Parser(limites=lim).parse(texto)) == nome
+        assert time.perf_counter() - inicio < 1.0
+    # parênteses não são nós: só a profundidade limita o aninhamento
+    assert lisp(Parser(limites=Limites(nos=5)).parse("((((((((x))))))))")) == "x"
+    assert _limite(lambda: Parser(limites=Limites(nos=5, profundidade=4)).parse(
+        "((((((((x))))))))")) == "profundidade"
+    # dentro dos limites a AST é a mesma
+    texto = "soma(conj(x)**2 / k, k, 1, n) - raiz(3i, 2) = (x)"
+    assert lisp(Parser(limites=Limites(nos=15, profundidade=7)).parse(texto)) == lisp(Parser().parse(texto))
+    assert _limite(lambda: Parser(limites=Limites(nos=14)).parse(texto)) == "nos"
+    assert _limite(lambda: Parser(limites=Limites(profundidade=6)).parse(texto)) == "profundidade"
+    # um erro de sintaxe dentro do limite continua sendo SyntaxError
+    with pytest.raises(SyntaxError):
+        p.parse("1 +")
+
+
+@pytest.mark.parametrize("avaliador", ["eval_node", "bytecode"])
+def test_limites_da_avaliacao(avaliador):
+    def avaliar(expr, limites, **vals):
+        ast = Parser().parse(expr)
+        if avaliador == "eval_node":
+            return eval_node(ast, vals, limites=limites)
+        return executar(codificar(ast), vals, limites=limites)
+
+    x = Complexo(1, 1)
+    assert avaliar("x**2 + 3", Limites(operacoes=2), x=x) == Complexo(3, 2)
+    assert _limite(lambda: avaliar("x**2 + 3 - x", Limites(operacoes=2), x=x)) == "operacoes"
+    # sem limites, o estouro segue como antes; com limites (mesmo sem o de
+    # magnitude) ele é relatado como magnitude
+    with pytest.raises(OverflowError):
+        avaliar("(2+3i)**10000000000000000000000", None)
+    assert _limite(lambda: avaliar("(2+3i)**10000000000000000000000",
+                                   Limites(operacoes=10))) == "magnitude"
+    assert _limite(lambda: avaliar("(2+3i)**10000000000000000000000",
+                                   Limites(magnitude=1e300))) == "magnitude"
+    assert _limite(lambda: avaliar("((2+3i)**100)**3", Limites(magnitude=1e100))) == "magnitude"
+    assert avaliar("(2+3i)**10 = (2+3i)**10", Limites(magnitude=1e12)) is True
+
+
+@pytest.mark.parametrize("com_numpy", [True, False])
+def test_series_descontam_cada_termo(monkeypatch, com_numpy):
+    if not com_numpy:
+        monkeypatch.setattr(somatorio, "np", None)
+    p = Parser()
+    # forma fechada: o intervalo não é percorrido
+    lim = Limites(operacoes=10)
+    assert eval_node(p.parse("soma(k, k, 1, 10**12)"), {}, limites=lim) == Complexo(500000000000500000000000, 0)
+    enorme = p.parse("soma(1/k**2 + x/k, k, 1, 10**12)")
+    assert _limite(lambda: eval_node(enorme, {"x": Complexo(1, 0)},
+                                     limites=Limites(operacoes=100_000))) == "operacoes"
+    inicio = time.perf_counter()
+    aninhada = p.parse("soma(soma(j, j, 1, 10**9) / k**2, k, 1, 10**9)")
+    assert _limite(lambda: eval_node(aninhada, {}, limites=Limites(tempo=0.2))) == "tempo"
+    assert time.perf_counter() - inicio < 2.0
+    # dentro do limite o resultado é o mesmo
+    pequena = p.parse("soma(1/k**2 + x/k, k, 1, 300)")
+    vals = {"x": Complexo(0, 1)}
+    assert eval_node(pequena, vals, limites=Limites(operacoes=10_000)) == eval_node(pequena, vals)
+
+
+def test_backend_e_series_no_backend():
+    from backends import BACKENDS
+
+    b = BACKENDS["nativo"]
+    ast = Parser(backend=b).parse("soma(1/k, k, 1, 10**9)")
+    assert _limite(lambda: eval_node(ast, {}, backend=b, limites=Limites(operacoes=1000))) == "operacoes"
+    assert _limite(lambda: eval_node(Parser(backend=b).parse("(2+3i)**400"), {}, backend=b,
+                                     limites=Limites(magnitude=1e200))) == "magnitude"
+
+
+def test_backend_decimal():
+    from decimal import Overflow
+    from backends import BackendDecimal
+
+    b = BackendDecimal(precisao=30)
+    p = Parser(backend=b)
+    grande = p.parse("(10**999999)**2 + x")
+    vals = {"x": b.numero(1.0, 0.0)}
+    with pytest.raises(Overflow):
+        eval_node(grande, vals, backend=b)
+    for lim in (Limites(operacoes=100), Limites(magnitude=1e300)):
+        assert _limite(lambda: eval_node(grande, vals, backend=b, limites=lim)) == "magnitude"
+    assert _limite(lambda: eval_node(p.parse("(2+3i)**10000000000000000000000"), {}, backend=b,
+                                     limites=Limites(tempo=1.0))) == "magnitude"
+    # Decimal passa de 1e308 sem estourar: o limite de magnitude compara com ele
+    assert _limite(lambda: eval_node(p.parse("10**400"), {}, backend=b,
+                                     limites=Limites(magnitude=1e300))) == "magnitude"
+    assert b.para_complexo(eval_node(p.parse("10**400 / 10**399"), {}, backend=b,
+                                     limites=Limites(operacoes=10))) == Complexo(10, 0)
+    assert _limite(lambda: eval_node(p.parse("soma(1/k, k, 1, 10**9)"), {}, backend=b,
+                                     limites=Limites(operacoes=500))) == "operacoes"
+
+
+def test_lote_relata_o_limite_e_continua():
+    lim = Limites(tokens=50, operacoes=1000)
+    linhas = [
+        json.dumps({"id": 1, "expr": "x + " * 40 + "1", "vars": {"x": "1"}}),
+        json.dumps({"id": 2, "expr": "soma(1/k, k, 1, 10**9)"}),
+        json.dumps({"id": 3, "expr": "x * 2", "vars": {"x": "3"}}),
+    ]
+    saida = io.StringIO()
+    assert executar_lote(linhas, saida, limites=lim) == (3, 2)
+    r = [json.loads(l) for l in saida.getvalue().splitlines()]
+    assert [x.get("limite") for x in r] == ["tokens", "operacoes", None]
+    assert r[0]["tipo_erro"] == "LimiteExcedido" and r[2]["resultado"] == "6.0"
+    # avaliar_registro sem limites: comportamento de antes
+    assert "limite" not in avaliar_registro({"expr": "1/0"}, Parser())
+
+
+def test_paralelo_e_servidor_relatam_o_limite():
+    from paralelo import executar_lote_paralelo
+    from servidor import Servidor
+
+    lim = Limites(tokens=50, operacoes=1000)
+    registros = [
+        {"id": 1, "expr": "soma(1/k, k, 1, 10**9)"},
+        {"id": 2, "expr": "1" + " + 1" * 60},
+        {"id": 3, "expr": "x * 2", "vars": {"x": "3"}},
+    ]
+    saida = io.StringIO()
+    executar_lote_paralelo([json.dumps(r) for r in registros], saida, processos=1, limites=lim)
+    r = [json.loads(l) for l in saida.getvalue().splitlines()]
+    assert [x.get("limite") for x in r] == ["operacoes", "tokens", None]
+
+    async def rodar():
+        async with Servidor(processos=0, limites=lim) as s:
+            return await asyncio.gather(*(s.avaliar(r) for r in registros))
+
+    respostas = asyncio.run(rodar())
+    assert [x.get("limite") for x in respostas] == ["operacoes", "tokens", None]
+    assert respostas[2]["resultado"] == "6.0"
+
+    # o prazo de retenção do lote não se confunde com o limite de tempo
+    async def lento(retencao):
+        async with Servidor(processos=0, limites=Limites(tempo=0.1), retencao=retencao) as s:
+            return await asyncio.gather(s.avaliar({"expr": "soma(1/k + x, k, 1, 10**9)", "vars": {"x": "1"}}),
+                                        s.avaliar(registros[2]))
+
+    for retencao in (0.02, 0.5, None):
+        respostas = asyncio.run(lento(retencao))
+        assert [x.get("limite") for x in respostas] == ["tempo", None]
+
+    # o pedido refeito depois da retenção só tem o que sobrou do seu limite
+    async def cronometrar():
+        async with Servidor(processos=0, limites=Limites(tempo=0.4), retencao=0.3) as s:
+            inicio = asyncio.get_running_loop().time()
+            resposta = await s.avaliar({"expr": "soma(1/k + x, k, 1, 10**9)", "vars": {"x": "1"}})
+            return resposta, asyncio.get_running_loop().time() - inicio
+
+    resposta, tempo = asyncio.run(cronometrar())
+    assert resposta["limite"] == "tempo" and "máximo: 0.4" in resposta["erro"]
+    assert tempo < 0.6
@@ -0,0 +1,90 @@
+import sys, os
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC = os.path.join(ROOT, "src")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, SRC)
+
+np = pytest.importorskip("numpy")
+
+from parser import Parser
+from executor import eval_node
+from arvore import lisp
+from complexos import Complexo
+from resolvedor import resolver, derivar, DerivadaIndisponivel, funcao_da_equacao
+
+
+def _parse(expr):
+    return Parser().parse(expr)
+
+
+def test_derivadas_simbolicas():
+    assert lisp(derivar(_parse("x**3 - 2x"), "x")) == "(- (* 3.0 (** x 2.0)) 2.0)"
+    assert lisp(derivar(_parse("y * 5"), "x")) == "0.0"
+    assert lisp(derivar(_parse("-x"), "x")) == "-1.0"
+    # confere numericamente d/dx em um ponto
+    for expr in ("x * x / (x + 1)", "raiz(x, 3) - 1/x", "(2x + 1i)**4"):
+        ast = _parse(expr)
+        d = derivar(ast, "x")
+        z, h = Complexo(0.7, 0.3), 1e-6
+        numerica = (eval_node(ast, {"x": z + h}) - eval_node(ast, {"x": z - h})) / (2 * h)
+        assert abs((eval_node(d, {"x": z}) - numerica).modulo()) < 1e-6
+
+
+def test_derivada_indisponivel():
+    for expr in ("conj(x)", "2 ** x", "raiz(4, x)"):
+        with pytest.raises(DerivadaIndisponivel):
+            derivar(_parse(expr), "x")
+
+
+def test_cubica_do_pedido():
+    eq = _parse("x**3 - 2x = 1i")
+    raizes, est = resolver(eq)
+    assert len(raizes) == 3 and est["raizes_distintas"] == 3
+    assert est["derivada"] == "simbolica" and est["variavel"] == "x"
+    assert est["convergiram"] + est["falharam"] + est["sem_convergencia"] == est["pontos"]
+    assert sum(est["bacias"]) == est["convergiram"]
+    for r in raizes:
+        assert eval_node(eq, {"x": r}) is True
+
+
+def test_raizes_da_unidade_e_outras_variaveis():
+    raizes, _ = resolver(_parse("x**4 = a"), variavel="x", valores={"a": 1}, quantidade=200)
+    assert raizes == [Complexo(-1, 0), Complexo(0, -1), Complexo(0, 1), Complexo(1, 0)]
+    with pytest.raises(ValueError):
+        resolver(_parse("x * y = 1"))
+    with pytest.raises(NameError):
+        resolver(_parse("x * y = 1"), variavel="x")
+
+
+def test_derivada_numerica_e_pontos_proprios():
+    raizes, est = resolver(_parse("2 ** x = 8"), pontos=[1 + 0j, 2.5 + 0.1j])
+    assert est["derivada"] == "numerica" and est["pontos"] == 2
+    assert raizes == [Complexo(3, 0)]
+
+
+def test_sem_raiz_e_erros():
+    raizes, est = resolver(_parse("1 / x = 0"), quantidade=16)
+    assert raizes == [] and est["convergiram"] == 0
+    with pytest.raises(ValueError):
+        funcao_da_equacao(_parse("(x = 1) + 1"))
+
+
+def test_equacao_profunda():
+    # mais funda que o limite de recursão: derivada, otimizador e avaliação
+    # vetorizada usam pilha própria
+    n = 1500
+    raizes, est = resolver(_parse("(" * n + "x" + "+1)" * n + " = 3000"))
+    assert raizes == [Complexo(1500, 0)] and est["derivada"] == "simbolica"
+    d = derivar(_parse("soma(" * 3 + "k * x**2" + ", k, 1, 2)" * 3 + " + " + "-(" * n + "x" + ")" * n), "x")
+    assert eval_node(d, {"x": Complexo(1, 0)}) == Complexo(3 * 2 * 2 * 2 + 1, 0)
+
+
+def test_linha_de_comando_relata_erro():
+    import subprocess
+
+    r = subprocess.run([sys.executable, os.path.join(SRC, "executor.py"), "--resolver", "x * y = 1"],
+                       capture_output=True, text=True)
+    assert r.returncode == 1 and "Traceback" not in r.stderr
+    assert r.stderr.startswith("Erro: Informe a variável")
@@ -0,0 +1,153 @@
+import sys, os
+import asyncio
+import json
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC = os.path.join(ROOT, "src")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, SRC)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from parser import Parser
+from executor import avaliar_registro
+from servidor import Servidor
+from carga_servidor import percentis
+
+REGISTROS = [
+    {"id": 1, "expr": "x**2 + conj(x)", "vars": {"x": "1+2i"}},
+    {"id": 2, "expr": "1/(x-x)", "vars": {"x": "3"}},
+    {"id": 3, "expr": "x + y", "vars": {"x": "1"}},
+    {"id": 4, "expr": "2 +", "vars": {}},
+    {"id": 5, "expr": "x * 2", "vars": {"x": "abc"}},
+    {"expr": 7},
+    {"id": 6, "expr": "(1+i) = (1+i)"},
+]
+
+
+async def _conversar(abrir, linhas):
+    leitor, escritor = await abrir()
+    escritor.write("".join(linhas).encode())
+    await escritor.drain()
+    escritor.write_eof()
+    respostas = [json.loads(l) async for l in leitor]
+    escritor.close()
+    return respostas
+
+
+def test_avaliar_igual_ao_modo_em_lote():
+    async def rodar():
+        async with Servidor(processos=0) as s:
+            return await asyncio.gather(*(s.avaliar(r) for r in REGISTROS)), s.estatisticas()
+
+    obtidos, est = asyncio.run(rodar())
+    p = Parser()
+    assert obtidos == [avaliar_registro(r, p) for r in REGISTROS]
+    assert est["pedidos"] == len(REGISTROS)
+    assert est["lotes"] < len(REGISTROS)   # pedidos simultâneos foram agrupados
+
+
+def test_tcp_ordem_lisp_e_cache():
+    async def rodar():
+        async with Servidor(processos=0, lote_max=3) as s:
+            srv = await s.escutar_tcp("127.0.0.1", 0)
+            porta = srv.sockets[0].getsockname()[1]
+            linhas = [json.dumps({"id": i, "expr": "x * 2", "vars": {"x": str(i)}, "lisp": True}) + "\n"
+                      for i in range(20)]
+            linhas.insert(5, "{quebrado\n")
+            linhas.insert(8, "\n")
+            linhas.append(json.dumps({"comando": "estatisticas"}) + "\n")
+            return await _conversar(lambda: asyncio.open_connection("127.0.0.1", porta), linhas)
+
+    respostas = asyncio.run(rodar())
+    assert respostas[5]["tipo_erro"] == "JSONDecodeError"
+    del respostas[5]
+    est = respostas.pop()
+    assert [r["id"] for r in respostas] == list(range(20))
+    assert respostas[3] == {"id": 3, "expr": "x * 2", "lisp": "(* x 2.0)", "resultado": "6.0"}
+    assert est["cache"]["falhas"] == 1 and est["cache"]["acertos"] == 19
+
+
+@pytest.mark.skipif(not hasattr(asyncio, "start_unix_server"), reason="sem sockets Unix")
+def test_unix_com_pool_de_processos(tmp_path):
+    caminho = str(tmp_path / "calc.sock")
+
+    async def rodar():
+        async with Servidor(processos=1) as s:
+            await s.escutar_unix(caminho)
+            linhas = [json.dumps(r) + "\n" for r in REGISTROS]
+            return await _conversar(lambda: asyncio.open_unix_connection(caminho), linhas)
+
+    p = Parser()
+    assert asyncio.run(rodar()) == [avaliar_registro(r, p) for r in REGISTROS]
+
+
+@pytest.mark.parametrize("processos", [0, 1])
+def test_pedido_lento_nao_segura_o_lote(processos):
+    lento = {"id": "lento", "expr": "soma(1/k**2 + x/k, k, 1, 2*10**6)", "vars": {"x": "1"}}
+    registros = [dict(r, id=i) for i, r in enumerate(REGISTROS)]
+    registros.insert(1, lento)
+
+    async def rodar():
+        async with Servidor(processos=processos, retencao=0.02) as s:
+            loop = asyncio.get_running_loop()
+            inicio = loop.time()
+            tempos = {}
+
+            async def pedir(r):
+                resposta = await s.avaliar(r)
+                tempos[r["id"]] = loop.time() - inicio
+                return resposta
+
+            respostas = await asyncio.gather(*(pedir(r) for r in registros))
+            return respostas, tempos, s.estatisticas()
+
+    respostas, tempos, est = asyncio.run(rodar())
+    p = Parser()
+    assert respostas == [avaliar_registro(r, p) for r in registros]
+    assert est["lotes"] == 1
+    # os outros pedidos do mesmo lote não esperam pelo lento
+    assert max(t for i, t in tempos.items() if i != "lento") < tempos["lento"] / 2
+
+
+def test_percentis():
+    lat = [i / 100 for i in range(1, 101)]
+    assert percentis(lat) == {"p50": 0.5, "p90": 0.9, "p99": 0.99, "max": 1.0}
+    assert percentis([]) == {}
+
+
+def test_linha_maior_que_o_limite(monkeypatch):
+    import servidor
+    monkeypatch.setattr(servidor, "_LIMITE_LINHA", 1000)
+
+    async def rodar():
+        async with Servidor(processos=0) as s:
+            srv = await s.escutar_tcp("127.0.0.1", 0)
+            porta = srv.sockets[0].getsockname()[1]
+            linhas = [json.dumps({"id": 1, "expr": "1 + 1"}) + "\n",
+                      json.dumps({"id": 2, "expr": "1" + " + 1" * 500}) + "\n"]
+            return await _conversar(lambda: asyncio.open_connection("127.0.0.1", porta), linhas)
+
+    # as respostas anteriores saem e a linha longa recebe um erro antes
+    # de a conexão ser encerrada
+    respostas = asyncio.run(rodar())
+    assert respostas[0]["resultado"] == "2.0"
+    assert respostas[1] == {"erro": "Linha maior que o limite de 1000 bytes", "tipo_erro": "ValueError"}
+
+
+def test_pedido_lento_nao_segura_o_parse():
+    # sem pool, o pedido lento refeito à parte não ocupa a thread do cache:
+    # um pedido que chega depois dele é respondido antes
+    lento = {"id": "lento", "expr": "soma(1/k**2 + x/k, k, 1, 2*10**6)", "vars": {"x": "1"}}
+
+    async def rodar():
+        async with Servidor(processos=0, retencao=0.02) as s:
+            tarefa = asyncio.ensure_future(s.avaliar(lento))
+            await asyncio.sleep(0.2)
+            rapido = await s.avaliar({"id": "rapido", "expr": "x + 1", "vars": {"x": "2"}})
+            return rapido, tarefa.done(), await tarefa
+
+    rapido, lento_pronto, resposta = asyncio.run(rodar())
+    assert rapido["resultado"] == "3.0"
+    assert not lento_pronto
+    assert resposta == avaliar_registro(lento, Parser())
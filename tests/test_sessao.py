@@ -0,0 +1,88 @@
+import sys, os
+import random
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC = os.path.join(ROOT, "src")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, SRC)
+
+from parser import Parser
+from executor import eval_node
+from sessao import SessaoAvaliacao
+from dag import para_dag
+from complexos import Complexo, ErroMatematico
+
+
+def _sessao(expr, **valores):
+    return SessaoAvaliacao(Parser().parse(expr), valores)
+
+
+def test_primeira_avaliacao_calcula_tudo():
+    s = _sessao("x * y + conj(x)", x=Complexo(1, 2), y=Complexo(3, 0))
+    assert s.avaliar() == Complexo(4, 4)
+    assert s.variaveis == {"x", "y"}
+    assert (s.recalculados, s.reaproveitados) == (len(s), 0)
+
+
+def test_recalcula_so_dependentes():
+    # nós: x, y, *, x, conj, 2, +, +
+    s = _sessao("x * y + conj(x) + 2", x=Complexo(1, 2), y=Complexo(3, 0))
+    s.avaliar()
+    s.definir("y", Complexo(0, 1))
+    assert s.avaliar() == Complexo(1, -1)
+    assert (s.recalculados, s.reaproveitados) == (4, 4)
+    # sem mudanças, nada é recalculado
+    s.avaliar()
+    assert (s.recalculados, s.reaproveitados) == (0, 8)
+    assert s.estatisticas()["total_recalculados"] == 12
+
+
+def test_erros_iguais_a_eval_node():
+    s = _sessao("1 / (x - y) + z", x=Complexo(1, 0), y=Complexo(1, 0))
+    with pytest.raises(ErroMatematico):
+        s.avaliar()
+    s.definir("y", Complexo(2, 0))
+    with pytest.raises(NameError):
+        s.avaliar()
+    s.definir("z", Complexo(0, 1))
+    assert s.avaliar() == Complexo(-1, 1)
+    s.remover("z")
+    with pytest.raises(NameError):
+        s.avaliar()
+
+
+def test_ast_compartilhada():
+    dag, _ = para_dag(Parser().parse("(x * x + 1) * (x * x + 1)"))
+    s = SessaoAvaliacao(dag, {"x": Complexo(2, 0)})
+    assert s.avaliar() == Complexo(25, 0)
+    assert len(s) == 5   # x, x*x, 1, +, * (subárvores iguais viram um nó só)
+
+
+def test_equivale_a_eval_node_aleatorio():
+    rng = random.Random(7)
+    p = Parser()
+    exprs = ["x * y - raiz(z, 2) / (x + 1)", "(x - y) ** 2 + conj(z) = z", "1 / (x - y) * z"]
+    for expr in exprs:
+        ast = p.parse(expr)
+        valores = {n: Complexo(1, 0) for n in "xyz"}
+        s = SessaoAvaliacao(ast, valores)
+        for _ in range(50):
+            nome = rng.choice("xyz")
+            valores[nome] = Complexo(rng.choice([0, 1, -1, 0.5]), rng.choice([0, 2]))
+            s.definir(nome, valores[nome])
+            try:
+                esperado = eval_node(ast, valores)
+            except Exception as e:
+                with pytest.raises(type(e), match=str(e)):
+                    s.avaliar()
+            else:
+                assert s.avaliar() == esperado
+
+
+def test_profundidade_grande():
+    expr = "x" + " + 1" * 20000
+    s = _sessao(expr, x=Complexo(0, 0))
+    assert s.avaliar() == Complexo(20000, 0)
+    s.definir("x", Complexo(1, 0))
+    assert s.avaliar() == Complexo(20001, 0)
@@ -0,0 +1,183 @@
+import sys, os
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC = os.path.join(ROOT, "src")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, SRC)
+
+from parser import Parser, SeriesNode
+from executor import eval_node, coletar_variaveis
+from complexos import Complexo, ErroMatematico
+from arvore import lisp
+import somatorio
+
+
+def _parse(expr):
+    return Parser().parse(expr)
+
+
+def _valor(expr, **vals):
+    return eval_node(_parse(expr), vals)
+
+
+def _desenrolado(termo, inicio, fim, op="+", **vals):
+    # a mesma conta escrita por extenso, como os usuários faziam
+    partes = [f"({termo.replace('k', f'({k})')})" for k in range(inicio, fim + 1)]
+    return _valor(f" {op} ".join(partes), **vals)
+
+
+def _perto(a, b, tol=1e-9):
+    return abs(a.a - b.a) <= tol * max(1.0, abs(b.a)) and abs(a.b - b.b) <= tol * max(1.0, abs(b.b))
+
+
+def test_parse_e_lisp():
+    ast = _parse("soma(1/k**2, k, 1, n) + 2")
+    assert isinstance(ast.left, SeriesNode) and ast.left.index == "k"
+    assert lisp(ast) == "(+ (soma (/ 1.0 (** k 2.0)) k 1.0 n) 2.0)"
+    assert lisp(_parse("produto(x - k, k, 0, 3)")) == "(produto (- x k) k 0.0 3.0)"
+    for ruim in ("soma(k, 2, 1, 3)", "soma(k, k, 1)", "soma(k, i, 1, 3)", "produto(k, soma, 1, 3)"):
+        with pytest.raises(SyntaxError):
+            _parse(ruim)
+
+
+def test_indice_e_variavel_ligada():
+    vs = set()
+    coletar_variaveis(_parse("soma(k * x, k, a, 3) + k"), vs)
+    assert vs == {"x", "a", "k"}
+    # o k de fora não interfere no de dentro
+    assert _valor("soma(k, k, 1, 3) + k", k=Complexo(10, 0)) == Complexo(16, 0)
+
+
+@pytest.mark.parametrize("termo,op", [
+    ("x", "+"), ("3k - 2 + x", "+"), ("-(k/2) * x", "+"), ("2**k", "+"),
+    ("x * 3**(2k + 1) / 2", "+"), ("-(0.5i)**(k - 1)", "+"), ("x", "*"),
+    ("2 * 3**k", "*"), ("(1i)**(2k)", "*"),
+])
+def test_formas_fechadas_iguais_ao_desenrolado(termo, op):
+    x = Complexo(0.5, -1.5)
+    nome = "soma" if op == "+" else "produto"
+    for inicio, fim in ((1, 12), (-3, 4), (0, 0)):
+        obtido = _valor(f"{nome}({termo}, k, {inicio}, {fim})", x=x)
+        assert _perto(obtido, _desenrolado(termo, inicio, fim, op, x=x))
+
+
+def test_forma_fechada_nao_percorre_o_intervalo():
+    assert _valor("soma(k, k, 1, 10**12)") == Complexo(500000000000500000000000, 0)
+    assert _perto(_valor("soma(0.5**k, k, 1, 10**9)"), Complexo(1, 0))
+    assert _perto(_valor("produto(x, k, 1, 10**6)", x=Complexo(1, 0)), Complexo(1, 0))
+
+
+def test_termo_geral_em_lotes(monkeypatch):
+    esperado = _desenrolado("1/k**2 + x/k", 1, 3000, x=Complexo(0, 1))
+    assert _perto(_valor("soma(1/k**2 + x/k, k, 1, 3000)", x=Complexo(0, 1)), esperado)
+    # sem numpy: a expressão compilada é chamada para cada k
+    monkeypatch.setattr(somatorio, "np", None)
+    assert _perto(_valor("soma(1/k**2 + x/k, k, 1, 3000)", x=Complexo(0, 1)), esperado)
+    assert _perto(_valor("produto(1 + 1/k, k, 1, 999)"), Complexo(1000, 0))
+
+
+def test_aninhados_e_intervalo_vazio():
+    assert _valor("soma(soma(j*k, j, 1, k), k, 1, 4)") == Complexo(65, 0)
+    assert _valor("soma(produto(j, j, 1, k) / k, k, 1, 5)") == Complexo(34, 0)
+    assert _valor("soma(1/(k-3), k, 5, 4)") == Complexo(0, 0)
+    assert _valor("produto(1/(k-3), k, 5, 4)") == Complexo(1, 0)
+
+
+@pytest.mark.parametrize("com_numpy", [True, False])
+def test_erros(monkeypatch, com_numpy):
+    if not com_numpy:
+        monkeypatch.setattr(somatorio, "np", None)
+    with pytest.raises(ErroMatematico):
+        _valor("soma(1/(k-3), k, 1, 5000)")
+    with pytest.raises(ErroMatematico):
+        _valor("soma(k/x, k, 1, 5)", x=Complexo(0, 0))
+    with pytest.raises(NameError):
+        _valor("soma(k * y, k, 1, 5)")
+    with pytest.raises(ValueError, match="inteiros reais"):
+        _valor("soma(k, k, 1, 2.5)")
+    with pytest.raises(ValueError, match="inteiros reais"):
+        _valor("produto(k, k, 1i, 3)")
+
+
+def test_outros_avaliadores():
+    from compilar import compilar_ast
+    from bytecode import codificar, decodificar, executar
+    from dag import para_dag, eval_dag
+    from otimizador import otimizar
+    from sessao import SessaoAvaliacao
+    from canonico import assinatura
+
+    ast = _parse("soma(x**k / k, k, 1, n) + produto(1 + x/k, k, 1, 3) * soma(k, k, 1, 4)")
+    vals = {"x": Complexo(0.3, 0.4), "n": Complexo(25, 0)}
+    esperado = eval_node(ast, vals)
+    assert compilar_ast(ast)(vals) == esperado
+    programa = codificar(ast)
+    assert executar(programa, vals) == esperado
+    assert lisp(decodificar(programa)) == lisp(ast)
+    assert eval_dag(para_dag(ast)[0], vals) == esperado
+    assert eval_node(otimizar(ast), vals) == esperado
+    assert lisp(otimizar(_parse("soma(k, k, 1, 4) + x"))) == "(+ 10.0 x)"
+
+    s = SessaoAvaliacao(ast, vals)
+    assert s.avaliar() == esperado
+    s.definir("n", Complexo(3, 0))
+    assert s.avaliar() == eval_node(ast, {**vals, "n": Complexo(3, 0)})
+
+    assert assinatura(_parse("soma(2 + k, k, 1, 3)")) == assinatura(_parse("soma(k + 2, k, 1, 3)"))
+    assert assinatura(_parse("soma(k, k, 1, 3)")) != assinatura(_parse("produto(k, k, 1, 3)"))
+
+
+def test_vetorizado_e_derivada():
+    np = pytest.importorskip("numpy")
+    from vetorizado import avaliar_vetorizado
+    from resolvedor import derivar
+
+    ast = _parse("soma(z**k / k, k, 1, 30) + produto(1 + z/k, k, 1, 5)")
+    zs = np.array([0.5 + 0.5j, -1.2, 0.3j])
+    valores, erros = avaliar_vetorizado(ast, {"z": zs})
+    assert not erros.any()
+    for z, v in zip(zs, valores):
+        e = eval_node(ast, {"z": Complexo(z.real, z.imag)})
+        assert abs(v - complex(e.a, e.b)) < 1e-9
+
+    d = derivar(_parse("soma(x**k, k, 0, 3)"), "x")
+    assert eval_node(d, {"x": Complexo(2, 0)}) == Complexo(1 + 4 + 12, 0)
+
+
+def test_estouro_no_lote_igual_ao_termo_a_termo(monkeypatch):
+    import warnings
+    from recursos import Limites, LimiteExcedido
+
+    casos = ("produto(k, k, 1, 171)", "produto(k, k, 1, 200)", "soma(10**300 * k, k, 1, 5000)")
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        em_lotes = [repr(_valor(e)) for e in casos]
+        assert em_lotes[0] == repr(Complexo(float("inf"), 0))
+        # o lote que estoura é refeito termo a termo, ainda dentro do orçamento
+        with pytest.raises(LimiteExcedido):
+            eval_node(_parse("produto(2k, k, 1, 1100)"), {}, limites=Limites(operacoes=4000))
+    monkeypatch.setattr(somatorio, "np", None)
+    assert [repr(_valor(e)) for e in casos] == em_lotes
+
+
+@pytest.mark.parametrize("forma", [(3,), (64, 64), (256, 256)])
+def test_lote_vetorizado_limitado_pelo_tamanho(forma):
+    np = pytest.importorskip("numpy")
+    from vetorizado import _avaliar
+
+    formas = []
+
+    def avaliar(node, arrays, forma_lote):
+        formas.append(forma_lote)
+        return _avaliar(node, arrays, forma_lote)
+
+    ast = _parse("soma(z / k**2, k, 1, 300)")
+    z = np.full(forma, 1 + 1j)
+    n = np.full(forma, 1 + 0j)
+    total, erros = somatorio.avaliar_serie_vetorizada(ast, n, n * 300, avaliar, {"z": z}, forma)
+    assert all(f[1:] == forma and np.prod(f) <= max(somatorio.LOTE, np.prod(forma)) for f in formas)
+    assert sum(f[0] for f in formas) == 300
+    assert not erros.any()
+    esperado = _valor("soma(z / k**2, k, 1, 300)", z=Complexo(1, 1))
+    assert abs(total.flat[-1] - complex(esperado.a, esperado.b)) < 1e-9
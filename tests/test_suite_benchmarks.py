@@ -0,0 +1,31 @@
+import sys, os
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC = os.path.join(ROOT, "src")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, SRC)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from suite import gerar_caso, comparar
+from parser import Parser
+from executor import coletar_variaveis
+
+
+def test_gerador_reprodutivel():
+    assert gerar_caso("pequena", 7)[0] == gerar_caso("pequena", 7)[0]
+    assert gerar_caso("pequena", 7)[0] != gerar_caso("pequena", 8)[0]
+
+
+def test_expressoes_geradas_sao_validas():
+    exprs, valores = gerar_caso("media", 1)
+    for e in exprs:
+        vs = set()
+        coletar_variaveis(Parser().parse(e), vs)
+        assert vs <= set(valores)
+
+
+def test_comparar_marca_regressao():
+    base = {"a/parse": {"ops_s": 100.0}, "a/lisp": {"ops_s": 100.0}}
+    atual = {"a/parse": {"ops_s": 85.0}, "a/lisp": {"ops_s": 95.0}, "b/parse": {"ops_s": 1.0}}
+    regressoes = comparar(atual, base, 0.10)
+    assert [r[0] for r in regressoes] == ["a/parse"]
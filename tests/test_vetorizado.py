@@ -0,0 +1,85 @@
+import sys, os
+import random
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC = os.path.join(ROOT, "src")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, SRC)
+
+np = pytest.importorskip("numpy")
+
+from parser import Parser
+from executor import eval_node
+from vetorizado import avaliar_vetorizado
+from complexos import Complexo, ErroMatematico
+
+
+def pontos(n, seed=7):
+    rng = random.Random(seed)
+    return [complex(rng.uniform(-3, 3), rng.uniform(-3, 3)) for _ in range(n)]
+
+
+@pytest.mark.parametrize("expr", [
+    "x**2 + conj(y)/3i",
+    "raiz(x, 3) - y*2i",
+    "(x - y) ** 0.5",
+    "x ** y",
+    "-(x + 1) * +conj(y)",
+    "2(x - 1i) ** -2",
+])
+def test_vetorizado_igual_eval_node(expr):
+    ast = Parser().parse(expr)
+    xs, ys = pontos(50, 1), pontos(50, 2)
+    res = avaliar_vetorizado(ast, {"x": np.array(xs), "y": np.array(ys)})
+    assert not res.erros.any()
+    for x, y, v in zip(xs, ys, res.valores):
+        esperado = eval_node(ast, {"x": Complexo(x.real, x.imag), "y": Complexo(y.real, y.imag)})
+        assert abs(esperado.a - v.real) < 1e-6 * max(1, abs(v))
+        assert abs(esperado.b - v.imag) < 1e-6 * max(1, abs(v))
+
+
+def test_vetorizado_mascara_divisao_por_zero():
+    ast = Parser().parse("1 / x")
+    res = avaliar_vetorizado(ast, {"x": np.array([2, 0, 1j])})
+    assert res.erros.tolist() == [False, True, False]
+    assert res.valores[0] == 0.5
+    assert np.isnan(res.valores[1])
+    with pytest.raises(ErroMatematico):
+        eval_node(ast, {"x": Complexo(0, 0)})
+
+
+def test_vetorizado_mascara_zero_potencia_negativa():
+    ast = Parser().parse("x ** y")
+    res = avaliar_vetorizado(ast, {"x": np.array([0, 0, 0, 2]), "y": np.array([-2, 0, 3, -1])})
+    assert res.erros.tolist() == [True, False, False, False]
+    assert res.valores[1:].tolist() == [1, 0, 0.5]
+
+
+def test_vetorizado_igualdade():
+    ast = Parser().parse("x = 1 + 1i")
+    res = avaliar_vetorizado(ast, {"x": np.array([1 + 1j, 1 + 1.5j, 0])})
+    assert res.valores.tolist() == [True, False, False]
+    res = avaliar_vetorizado(Parser().parse("x = 0.0000000005"), {"x": np.array([4.999999e-10, 2e-9])})
+    assert res.valores.tolist() == [True, False]
+
+
+def test_vetorizado_escalar_e_broadcast():
+    ast = Parser().parse("x + y")
+    res = avaliar_vetorizado(ast, {"x": np.arange(3), "y": Complexo(0, 1)})
+    assert res.valores.tolist() == [1j, 1 + 1j, 2 + 1j]
+
+
+def test_vetorizado_variavel_indefinida():
+    with pytest.raises(NameError):
+        avaliar_vetorizado(Parser().parse("x + z"), {"x": np.zeros(2)})
+
+
+def test_vetorizado_profundo():
+    # mais fundo que o limite de recursão
+    n = 20_000
+    ast = Parser().parse("(" * n + "x" + " + 1)" * n + " * " + "conj(" * n + "y" + ")" * n)
+    xs = np.array(pontos(5))
+    res = avaliar_vetorizado(ast, {"x": xs, "y": 1j})
+    assert not res.erros.any()
+    assert np.allclose(res.valores, (xs + n) * 1j)